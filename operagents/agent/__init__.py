@@ -1,13 +1,30 @@
+import time
 from types import TracebackType
 from typing import TYPE_CHECKING
 from typing_extensions import Self
 
 from operagents import backend
-from operagents.backend import Backend, GeneratePropUsage, GenerateResponse, Message
-from operagents.config import AgentConfig, TemplateConfig
+from operagents.backend import (
+    Backend,
+    GeneratePropUsage,
+    GenerateResponse,
+    Message,
+    response_validator,
+)
+from operagents.backend.cache import message_cache_key
+from operagents.cache import canonical_hash, without_secrets
+from operagents.config import AgentConfig, BackendConfig, TemplateConfig
+from operagents.config.const import (
+    AGENT_SESSION_SUMMARY_SYSTEM_TEMPLATE,
+    AGENT_SESSION_SUMMARY_USER_TEMPLATE,
+    AGENT_SHARED_SESSION_SUMMARY_SYSTEM_TEMPLATE,
+    AGENT_SHARED_SESSION_SUMMARY_USER_TEMPLATE,
+)
 from operagents.exception import TimelineNotStarted
 from operagents.log import logger
 from operagents.timeline.event import TimelineEventSessionAct, TimelineEventSessionEnd
+from operagents.tracing import span
+from operagents.usage import usage_scope
 from operagents.utils import get_template_renderer
 
 from .memory import AgentEvent as AgentEvent
@@ -33,11 +50,14 @@ class Agent:
         user_template: TemplateConfig,
         session_summary_system_template: TemplateConfig,
         session_summary_user_template: TemplateConfig,
+        backend_config: BackendConfig | None = None,
     ):
         self.name: str = name
         """The name of the agent."""
         self.backend: "Backend" = backend
         """The backend to use for generating text."""
+        self.backend_config: BackendConfig | None = backend_config
+        """The config of the backend, identifying requests shared by agents."""
 
         self.system_template = system_template
         """The system template to use for generating text."""
@@ -60,6 +80,19 @@ class Agent:
         self.session_summary_user_renderer = get_template_renderer(
             self.session_summary_user_template
         )
+        # the default summary templates are agent specific, summaries shared
+        # between agents are rendered from the timeline only
+        self.shared_session_summary_system_renderer = (
+            get_template_renderer(AGENT_SHARED_SESSION_SUMMARY_SYSTEM_TEMPLATE)
+            if self.session_summary_system_template
+            == AGENT_SESSION_SUMMARY_SYSTEM_TEMPLATE
+            else self.session_summary_system_renderer
+        )
+        self.shared_session_summary_user_renderer = (
+            get_template_renderer(AGENT_SHARED_SESSION_SUMMARY_USER_TEMPLATE)
+            if self.session_summary_user_template == AGENT_SESSION_SUMMARY_USER_TEMPLATE
+            else self.session_summary_user_renderer
+        )
 
     def __repr__(self) -> str:
         return (
@@ -76,6 +109,7 @@ class Agent:
             user_template=config.user_template,
             session_summary_system_template=config.session_summary_system_template,
             session_summary_user_template=config.session_summary_user_template,
+            backend_config=config.backend,
         )
 
     @property
@@ -105,6 +139,7 @@ class Agent:
                 "raw_params": memory_event.prop_raw_params,
                 "params": memory_event.prop_params,
                 "result": memory_event.prop_result,
+                "duration": memory_event.prop_duration,
             }
 
         # This should never happen
@@ -120,7 +155,13 @@ class Agent:
             )
         )
 
-    def _do_response(self, timeline: "Timeline", response: str) -> None:
+    def _do_response(
+        self,
+        timeline: "Timeline",
+        response: str,
+        *,
+        generation_duration: float | None = None,
+    ) -> None:
         """Make the agent respond to a message."""
         self.logger.info(
             "{response}",
@@ -135,6 +176,7 @@ class Agent:
                 scene=timeline.current_scene,
                 character=timeline.current_character,
                 content=response,
+                generation_duration=generation_duration,
             )
         )
 
@@ -142,6 +184,8 @@ class Agent:
         self, timeline: "Timeline", response: str, do_observe: bool = True
     ) -> TimelineEventSessionAct:
         """Make the agent act with a given response."""
+        # summarize the past sessions before the memory gets new events
+        await self.resolve_summaries(timeline)
 
         new_message = (
             (
@@ -171,24 +215,31 @@ class Agent:
     async def act(self, timeline: "Timeline") -> TimelineEventSessionAct:
         """Make the agent act."""
 
-        system_message = (
-            await self.system_renderer.render_async(agent=self, timeline=timeline)
-        ).strip()
-        new_message = (
-            await self.user_renderer.render_async(agent=self, timeline=timeline)
-        ).strip()
-        memory_events = self.memory.get_memory(timeline)
-        messages: list["Message"] = [
-            {
-                "role": "system",
-                "content": system_message,
-            },
-            *(self._memory_to_message(memory_event) for memory_event in memory_events),
-            {
-                "role": "user",
-                "content": new_message,
-            },
-        ]
+        start = time.perf_counter()
+        await self.resolve_summaries(timeline)
+        with span("agent.render", "agent", agent=self.name):
+            system_message = (
+                await self.system_renderer.render_async(agent=self, timeline=timeline)
+            ).strip()
+            new_message = (
+                await self.user_renderer.render_async(agent=self, timeline=timeline)
+            ).strip()
+        with span("agent.memory", "agent", agent=self.name):
+            memory_events = self.memory.get_memory(timeline)
+            messages: list["Message"] = [
+                {
+                    "role": "system",
+                    "content": system_message,
+                },
+                *(
+                    self._memory_to_message(memory_event)
+                    for memory_event in memory_events
+                ),
+                {
+                    "role": "user",
+                    "content": new_message,
+                },
+            ]
 
         props = timeline.current_character.props
 
@@ -202,55 +253,96 @@ class Agent:
         )
 
         self._do_observe(timeline, new_message)
-        async for response in self.backend.generate(timeline, messages, props):
-            if isinstance(response, GeneratePropUsage):
-                for prop_message in response.props:
-                    self.memory.remember(
-                        AgentEventUseProp(
-                            session_id=timeline.current_session_id,
-                            scene=timeline.current_scene,
-                            character=timeline.current_character,
-                            usage_id=prop_message["usage_id"],
-                            prop=prop_message["prop"],
-                            prop_raw_params=prop_message["raw_params"],
-                            prop_params=prop_message["params"],
-                            prop_result=prop_message["result"],
+        with (
+            usage_scope(
+                "agent",
+                agent=self.name,
+                character=timeline.current_character.name,
+                scene=timeline.current_scene.name,
+                session_id=timeline.current_session_id,
+            ),
+            span("backend.generate", "backend", agent=self.name),
+        ):
+            generation_start = time.perf_counter()
+            prop_duration: float | None = None
+            used_props: list[str] = []
+            async for response in self.backend.generate(timeline, messages, props):
+                if isinstance(response, GeneratePropUsage):
+                    for prop_message in response.props:
+                        used_props.append(prop_message["prop"].name)
+                        if (duration := prop_message.get("duration")) is not None:
+                            prop_duration = (prop_duration or 0.0) + duration
+                        self.memory.remember(
+                            AgentEventUseProp(
+                                session_id=timeline.current_session_id,
+                                scene=timeline.current_scene,
+                                character=timeline.current_character,
+                                usage_id=prop_message["usage_id"],
+                                prop=prop_message["prop"],
+                                prop_raw_params=prop_message["raw_params"],
+                                prop_params=prop_message["params"],
+                                prop_result=prop_message["result"],
+                                prop_duration=prop_message.get("duration"),
+                            )
                         )
+                elif isinstance(response, GenerateResponse):
+                    end = time.perf_counter()
+                    self._do_response(
+                        timeline,
+                        response.content,
+                        generation_duration=end - generation_start,
+                    )
+                    return TimelineEventSessionAct(
+                        session_id=timeline.current_session_id,
+                        scene=timeline.current_scene,
+                        character=timeline.current_character,
+                        content=response.content,
+                        duration=end - start,
+                        generation_duration=end - generation_start,
+                        prop_duration=prop_duration,
+                        props=used_props,
                     )
-            elif isinstance(response, GenerateResponse):
-                self._do_response(timeline, response.content)
-                return TimelineEventSessionAct(
-                    session_id=timeline.current_session_id,
-                    scene=timeline.current_scene,
-                    character=timeline.current_character,
-                    content=response.content,
-                )
 
         # This should never happen
         raise RuntimeError("The backend did not return a response.")
 
-    async def summary(
-        self, timeline: "Timeline", event: TimelineEventSessionEnd
-    ) -> None:
-        """Make the agent summarize the scene session when it ends"""
+    async def render_summary(
+        self,
+        timeline: "Timeline",
+        event: TimelineEventSessionEnd,
+        *,
+        shared: bool = False,
+    ) -> list["Message"]:
+        """Render the messages summarizing the scene session.
 
+        With `shared`, the default templates are replaced by templates not
+        specific to the agent, so that agents can share the summary.
+        """
         session_id = event.session_id
         scene = event.scene
-
-        if self.memory.summarized(session_id):
-            return
-
-        system_message = (
-            await self.session_summary_system_renderer.render_async(
-                agent=self, timeline=timeline, session_id=session_id, scene=scene
+        system_renderer, user_renderer = (
+            (
+                self.shared_session_summary_system_renderer,
+                self.shared_session_summary_user_renderer,
             )
-        ).strip()
-        summary_message = (
-            await self.session_summary_user_renderer.render_async(
-                agent=self, timeline=timeline, session_id=session_id, scene=scene
+            if shared
+            else (
+                self.session_summary_system_renderer,
+                self.session_summary_user_renderer,
             )
-        ).strip()
-        messages: list["Message"] = [
+        )
+        with span("agent.render", "agent", agent=self.name, summary=True):
+            system_message = (
+                await system_renderer.render_async(
+                    agent=self, timeline=timeline, session_id=session_id, scene=scene
+                )
+            ).strip()
+            summary_message = (
+                await user_renderer.render_async(
+                    agent=self, timeline=timeline, session_id=session_id, scene=scene
+                )
+            ).strip()
+        return [
             {
                 "role": "system",
                 "content": system_message,
@@ -260,29 +352,96 @@ class Agent:
                 "content": summary_message,
             },
         ]
+
+    def summary_key(self, messages: list["Message"]) -> str:
+        """Identify the summary request, agents with the same key can share it."""
+        return canonical_hash(
+            {
+                "backend": (
+                    without_secrets(
+                        self.backend_config.model_dump(mode="json", by_alias=True)
+                    )
+                    if self.backend_config is not None
+                    else id(self.backend)
+                ),
+                "messages": [message_cache_key(message) for message in messages],
+            }
+        )
+
+    async def generate_summary(
+        self,
+        timeline: "Timeline",
+        event: TimelineEventSessionEnd,
+        messages: list["Message"],
+    ) -> AgentEventSessionSummary:
+        """Generate the summary of the scene session without remembering it."""
+        session_id = event.session_id
+        scene = event.scene
         self.logger.debug(
             "Summarizing with messages: {messages}",
             session_id=session_id,
             scene=scene,
             messages=messages,
         )
-        async for response in self.backend.generate(timeline, messages):
-            self.logger.debug(
-                "Summary: {response}",
-                session_id=session_id,
-                scene=scene,
-                response=response.content,
-            )
-
-            self.memory.remember(
-                AgentEventSessionSummary(
-                    session_id=session_id, scene=scene, content=response.content
+        with (
+            usage_scope(
+                "summary", agent=self.name, scene=scene.name, session_id=session_id
+            ),
+            span("backend.generate", "backend", agent=self.name, summary=True),
+            response_validator(lambda content: bool(content.strip())),
+        ):
+            generation_start = time.perf_counter()
+            async for response in self.backend.generate(timeline, messages):
+                self.logger.debug(
+                    "Summary: {response}",
+                    session_id=session_id,
+                    scene=scene,
+                    response=response.content,
+                )
+                return AgentEventSessionSummary(
+                    session_id=session_id,
+                    scene=scene,
+                    content=response.content,
+                    generation_duration=time.perf_counter() - generation_start,
                 )
-            )
 
         # This should never happen
         raise RuntimeError("The backend did not return a response.")
 
+    async def summary(
+        self, timeline: "Timeline", event: TimelineEventSessionEnd
+    ) -> None:
+        """Make the agent summarize the scene session when it ends"""
+        if self.memory.summarized(event.session_id):
+            return
+
+        messages = await self.render_summary(timeline, event)
+        self.memory.remember_summary(
+            await self.generate_summary(timeline, event, messages), event.monotonic
+        )
+
+    async def resolve_summaries(self, timeline: "Timeline") -> None:
+        """Generate the pending session summaries before the memory is used.
+
+        Sessions failing to summarize stay pending and are retried the next
+        time the memory is used.
+        """
+        pending_summaries = self.memory.pending_summaries
+        for session_id, pending in list(pending_summaries.items()):
+            try:
+                if pending.task is not None:
+                    # prefetching logs its failures, summarize again if failed
+                    await pending.task
+                    pending.task = None
+                await self.summary(timeline, pending.event)
+            except Exception:
+                self.logger.opt(exception=True).warning(
+                    "Summarizing session {session_id} failed.",
+                    session_id=session_id,
+                )
+            else:
+                pending_summaries.pop(session_id, None)
+
     async def __aenter__(self) -> Self:
         self._memory = AgentMemory()
         return self
@@ -293,4 +452,8 @@ class Agent:
         exc_value: BaseException | None,
         traceback: TracebackType | None,
     ) -> None:
+        if self._memory is not None:
+            for pending in self._memory.pending_summaries.values():
+                if pending.task is not None:
+                    pending.task.cancel()
         self._memory = None
@@ -1,3 +1,5 @@
+import asyncio
+from dataclasses import dataclass
 from typing import TYPE_CHECKING, Annotated, Any, Generic, Literal, TypeAlias
 from typing_extensions import TypeVar
 from uuid import UUID
@@ -9,6 +11,7 @@ from operagents.exception import SceneFinished
 from operagents.prop import Prop
 from operagents.scene import Scene
 from operagents.utils import (
+    TimestampedEvent,
     any_serializer,
     character_serializer,
     prop_serializer,
@@ -17,12 +20,13 @@ from operagents.utils import (
 
 if TYPE_CHECKING:
     from operagents.timeline import Timeline
+    from operagents.timeline.event import TimelineEventSessionEnd
 
 
 P = TypeVar("P", bound=BaseModel, default=BaseModel)
 
 
-class AgentEventObserve(BaseModel):
+class AgentEventObserve(TimestampedEvent):
     """Other agent acts observed by an agent.
 
     a.k.a. Agent short term memory.
@@ -38,7 +42,7 @@ class AgentEventObserve(BaseModel):
     _serialize_scene = field_serializer("scene")(scene_serializer)
 
 
-class AgentEventSessionSummary(BaseModel):
+class AgentEventSessionSummary(TimestampedEvent):
     """Summary of observed events for one whole scene session.
 
     a.k.a. Agent long term memory.
@@ -54,11 +58,12 @@ class AgentEventSessionSummary(BaseModel):
     session_id: UUID
     scene: Scene
     content: str
+    generation_duration: float | None = None
 
     _serialize_scene = field_serializer("scene")(scene_serializer)
 
 
-class AgentEventAct(BaseModel):
+class AgentEventAct(TimestampedEvent):
     """Agent self acts."""
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
@@ -68,12 +73,13 @@ class AgentEventAct(BaseModel):
     scene: Scene
     character: Character
     content: str
+    generation_duration: float | None = None
 
     _serialize_scene = field_serializer("scene")(scene_serializer)
     _serialize_character = field_serializer("character")(character_serializer)
 
 
-class AgentEventUseProp(BaseModel, Generic[P]):
+class AgentEventUseProp(TimestampedEvent, Generic[P]):
     """Agent use prop."""
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
@@ -87,6 +93,7 @@ class AgentEventUseProp(BaseModel, Generic[P]):
     prop_raw_params: str
     prop_params: SerializeAsAny[BaseModel] | None
     prop_result: Any
+    prop_duration: float | None = None
 
     _serialize_scene = field_serializer("scene")(scene_serializer)
     _serialize_character = field_serializer("character")(character_serializer)
@@ -102,10 +109,32 @@ AgentEvent: TypeAlias = Annotated[
 ]
 
 
+@dataclass(eq=False, kw_only=True)
+class PendingSummary:
+    """A session summary deferred until the agent needs its memory again."""
+
+    event: "TimelineEventSessionEnd"
+    """The end of the session to summarize."""
+    task: "asyncio.Task[None] | None" = None
+    """The summary prefetching in the background."""
+
+
 class AgentMemory:
     def __init__(self) -> None:
         self.events: list[AgentEvent] = []
         """Memorized events of the agent."""
+        self.pending_summaries: dict[UUID, PendingSummary] = {}
+        """The sessions to summarize before the memory is used."""
+
+    def defer_summary(
+        self,
+        event: "TimelineEventSessionEnd",
+        task: "asyncio.Task[None] | None" = None,
+    ) -> None:
+        """Mark the session as pending summary."""
+        self.pending_summaries[event.session_id] = PendingSummary(
+            event=event, task=task
+        )
 
     def summarized(self, session_id: UUID) -> bool:
         return any(
@@ -122,6 +151,25 @@ class AgentMemory:
             raise SceneFinished()
         self.events.append(event)
 
+    def remember_summary(
+        self, summary: AgentEventSessionSummary, ended_at: float
+    ) -> None:
+        """Remember a session summary ahead of the events after the session end.
+
+        Summaries generated lazily would otherwise come after the events of
+        later sessions. `ended_at` is the monotonic time of the session end.
+        """
+        index = next(
+            (
+                i
+                for i, event in enumerate(self.events)
+                if not isinstance(event, AgentEventSessionSummary)
+                and event.monotonic > ended_at
+            ),
+            len(self.events),
+        )
+        self.events.insert(index, summary)
+
     def get_memory(self, timeline: "Timeline") -> list[AgentEvent]:
         """Get the agent memory for acting in the current scene."""
 
@@ -9,6 +9,12 @@ from ._base import Message as Message
 from ._base import PropMessage as PropMessage
 from ._base import SystemMessage as SystemMessage
 from ._base import UserMessage as UserMessage
+from .cache import CacheBackend as CacheBackend
+from .cascade import CascadeBackend as CascadeBackend
+from .cascade import response_validator as response_validator
+from .cassette import CassetteBackend as CassetteBackend
+from .coalesce import CoalesceBackend as CoalesceBackend
+from .mock import MockBackend as MockBackend
 from .openai import OpenAIBackend as OpenAIBackend
 from .user import UserBackend as UserBackend
 
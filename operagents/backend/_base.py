@@ -11,7 +11,7 @@ from typing import (
     TypeAlias,
     overload,
 )
-from typing_extensions import Self, TypedDict, TypeVar
+from typing_extensions import NotRequired, Self, TypedDict, TypeVar
 
 from pydantic import BaseModel, Field
 
@@ -58,6 +58,8 @@ class PropMessage(TypedDict, Generic[P]):
     """The parameter of the prop that the message is about."""
     result: Any
     """The result of the prop message."""
+    duration: NotRequired[float | None]
+    """The time taken by the prop usage in seconds."""
 
 
 Message: TypeAlias = Annotated[
@@ -0,0 +1,191 @@
+import asyncio
+from collections.abc import AsyncGenerator
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, overload
+from typing_extensions import Self, override
+
+from operagents import backend
+from operagents.cache import CacheStats, DiskCache, MemoryCache, canonical_hash
+from operagents.config import CacheBackendConfig, ResponseCacheConfig
+from operagents.log import logger
+
+from ._base import Backend, GeneratePropUsage, GenerateResponse, Message
+
+if TYPE_CHECKING:
+    from operagents.prop import Prop
+    from operagents.timeline import Timeline
+
+
+class ResponseCache:
+    """Two-level cache of backend responses.
+
+    Lookups are served from an in-memory LRU first and fall back to the
+    optional on-disk store, which persists responses between runs.
+    """
+
+    def __init__(
+        self,
+        path: Path | None = None,
+        *,
+        max_entries: int = 1024,
+        ttl: float | None = None,
+        max_size: int | None = None,
+    ) -> None:
+        self.memory: MemoryCache[Any] = MemoryCache(max_entries=max_entries, ttl=ttl)
+        """The in-memory LRU level."""
+        self.disk: DiskCache | None = (
+            DiskCache(path, ttl=ttl, max_size=max_size) if path is not None else None
+        )
+        """The on-disk level."""
+
+        self.stats = CacheStats()
+        """The hit and miss counters of both levels."""
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}("
+            f"memory={self.memory!r}, disk={self.disk!r}, "
+            f"hits={self.stats.hits}, misses={self.stats.misses}"
+            ")"
+        )
+
+    @classmethod
+    def from_config(cls, config: ResponseCacheConfig) -> Self:
+        return cls(
+            path=Path(config.path) if config.path is not None else None,
+            max_entries=config.max_entries,
+            ttl=config.ttl,
+            max_size=config.max_size,
+        )
+
+    async def get(self, key: str) -> Any | None:
+        """Get a cached response, reading the disk in a thread."""
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = await asyncio.to_thread(self.disk.get, key)
+            if value is not None:
+                self.memory.set(key, value)
+
+        if value is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        """Cache a json serializable response, writing the disk in a thread."""
+        self.memory.set(key, value)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, value)
+
+
+_response_caches: dict[str, ResponseCache] = {}
+
+
+def get_response_cache(config: ResponseCacheConfig) -> ResponseCache:
+    """Get the response cache shared by all backends with the same config."""
+    key = canonical_hash(config)
+    if (cache := _response_caches.get(key)) is None:
+        cache = _response_caches[key] = ResponseCache.from_config(config)
+    return cache
+
+
+def message_cache_key(message: Message) -> dict[str, Any]:
+    """Get the cacheable representation of a message."""
+    if message["role"] == "prop":
+        return {
+            "role": message["role"],
+            "usage_id": message["usage_id"],
+            "prop": message["prop"].name,
+            "raw_params": message["raw_params"],
+            "result": message["result"],
+        }
+    return dict(message)
+
+
+def prop_cache_key(prop: "Prop") -> dict[str, Any]:
+    """Get the cacheable representation of a prop."""
+    return prop.tool_definition
+
+
+class CacheBackend(Backend):
+    """Cache the final responses of another backend.
+
+    Generations that used props are not cached since props may have side effects.
+    Use the completion cache of the wrapped backend (if any) for those.
+    """
+
+    type_ = "cache"
+
+    def __init__(
+        self, backend: Backend, cache: ResponseCache, *, namespace: Any = None
+    ) -> None:
+        super().__init__()
+
+        self.backend: Backend = backend
+        """The wrapped backend."""
+        self.cache: ResponseCache = cache
+        """The response cache."""
+        self.namespace: Any = namespace
+        """Extra data identifying the wrapped backend in cache keys."""
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(backend={self.backend!r}, cache={self.cache!r})"
+        )
+
+    @classmethod
+    @override
+    def from_config(  # pyright: ignore[reportIncompatibleMethodOverride]
+        cls, config: CacheBackendConfig
+    ) -> Self:
+        return cls(
+            backend=backend.from_config(config.backend),
+            cache=get_response_cache(config.cache),
+            namespace=config.backend.model_dump(
+                mode="json", by_alias=True, exclude={"api_key"}
+            ),
+        )
+
+    @overload
+    def generate(
+        self,
+        timeline: "Timeline",
+        messages: list[Message],
+        props: None = None,
+    ) -> AsyncGenerator[GenerateResponse, None]: ...
+
+    @overload
+    def generate(
+        self,
+        timeline: "Timeline",
+        messages: list[Message],
+        props: list["Prop"],
+    ) -> AsyncGenerator[GenerateResponse | GeneratePropUsage, None]: ...
+
+    @override
+    async def generate(
+        self,
+        timeline: "Timeline",
+        messages: list[Message],
+        props: list["Prop"] | None = None,
+    ) -> AsyncGenerator[GenerateResponse | GeneratePropUsage, None]:
+        key = canonical_hash(
+            {
+                "backend": self.namespace,
+                "messages": [message_cache_key(message) for message in messages],
+                "tools": [prop_cache_key(prop) for prop in props or ()],
+            }
+        )
+        if (cached := await self.cache.get(key)) is not None:
+            logger.debug("Response cache hit: {key}", key=key)
+            yield GenerateResponse(content=cached["content"])
+            return
+
+        used_props = False
+        async for response in self.backend.generate(timeline, messages, props):
+            if isinstance(response, GeneratePropUsage):
+                used_props = True
+            elif not used_props:
+                await self.cache.set(key, {"content": response.content})
+            yield response
@@ -0,0 +1,185 @@
+from collections.abc import AsyncGenerator, Callable, Generator
+from contextlib import aclosing, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import json
+import re
+from typing import TYPE_CHECKING, TypeAlias, overload
+from typing_extensions import Self, override
+
+from operagents import backend
+from operagents.config import CascadeBackendConfig
+from operagents.log import logger
+
+from ._base import Backend, GeneratePropUsage, GenerateResponse, Message
+
+if TYPE_CHECKING:
+    from operagents.prop import Prop
+    from operagents.timeline import Timeline
+
+ResponseValidator: TypeAlias = Callable[[str], bool]
+
+_current_validator: ContextVar[ResponseValidator | None] = ContextVar(
+    "operagents_response_validator", default=None
+)
+
+
+@contextmanager
+def response_validator(validator: ResponseValidator) -> Generator[None, None, None]:
+    """Validate the responses generated in the context.
+
+    Cascade backends escalate to the next backend when a response is invalid.
+    """
+    token = _current_validator.set(validator)
+    try:
+        yield
+    finally:
+        _current_validator.reset(token)
+
+
+def is_json_object(content: str) -> bool:
+    """Check whether the content is a JSON object."""
+    try:
+        return isinstance(json.loads(content), dict)
+    except ValueError:
+        return False
+
+
+@dataclass(kw_only=True)
+class CascadeStats:
+    """Counters of a cascade backend."""
+
+    requests: int = 0
+    """The number of requests."""
+    escalations: int = 0
+    """The number of times a request was escalated to the next backend."""
+    answered: list[int] = field(default_factory=list)
+    """The number of requests answered by each backend."""
+    exhausted: int = 0
+    """The number of requests no backend answered validly, the last answer is used."""
+
+    @property
+    def escalation_rate(self) -> float:
+        """The ratio of requests escalated beyond the first backend."""
+        if not self.requests:
+            return 0.0
+        return (self.requests - (self.answered[0] if self.answered else 0)) / (
+            self.requests
+        )
+
+
+class CascadeBackend(Backend):
+    """Try backends from the cheapest to the strongest.
+
+    A request is escalated to the next backend when the response fails the
+    validation of the config or of the caller (see `response_validator`).
+    The response of the last backend is always used. Responses generated with
+    prop usages are never escalated since props may have side effects.
+    """
+
+    type_ = "cascade"
+
+    def __init__(
+        self,
+        backends: list[Backend],
+        *,
+        require_json: bool = False,
+        pattern: str | None = None,
+    ) -> None:
+        super().__init__()
+
+        self.backends: list[Backend] = backends
+        """The backends from the cheapest to the strongest."""
+        self.require_json: bool = require_json
+        """Whether valid responses must be a JSON object."""
+        self.pattern: re.Pattern[str] | None = (
+            re.compile(pattern) if pattern is not None else None
+        )
+        """The regular expression valid responses must contain."""
+
+        self.stats = CascadeStats(answered=[0] * len(backends))
+        """The escalation counters."""
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}("
+            f"backends={self.backends!r}, stats={self.stats!r}"
+            ")"
+        )
+
+    @classmethod
+    @override
+    def from_config(  # pyright: ignore[reportIncompatibleMethodOverride]
+        cls, config: CascadeBackendConfig
+    ) -> Self:
+        return cls(
+            backends=[backend.from_config(c) for c in config.backends],
+            require_json=config.require_json,
+            pattern=config.pattern,
+        )
+
+    def validate(self, content: str) -> bool:
+        """Check whether the response is good enough to stop escalating."""
+        if self.require_json and not is_json_object(content):
+            return False
+        if self.pattern is not None and not self.pattern.search(content):
+            return False
+        if (validator := _current_validator.get()) is not None:
+            return validator(content)
+        return True
+
+    @overload
+    def generate(
+        self,
+        timeline: "Timeline",
+        messages: list[Message],
+        props: None = None,
+    ) -> AsyncGenerator[GenerateResponse, None]: ...
+
+    @overload
+    def generate(
+        self,
+        timeline: "Timeline",
+        messages: list[Message],
+        props: list["Prop"],
+    ) -> AsyncGenerator[GenerateResponse | GeneratePropUsage, None]: ...
+
+    @override
+    async def generate(
+        self,
+        timeline: "Timeline",
+        messages: list[Message],
+        props: list["Prop"] | None = None,
+    ) -> AsyncGenerator[GenerateResponse | GeneratePropUsage, None]:
+        self.stats.requests += 1
+        last = len(self.backends) - 1
+        for tier, tier_backend in enumerate(self.backends):
+            used_props = False
+            async with aclosing(
+                tier_backend.generate(timeline, messages, props)
+            ) as generate:
+                async for response in generate:
+                    if isinstance(response, GeneratePropUsage):
+                        used_props = True
+                        yield response
+                        continue
+
+                    if used_props or self.validate(response.content):
+                        self.stats.answered[tier] += 1
+                    elif tier < last:
+                        self.stats.escalations += 1
+                        logger.debug(
+                            "Escalating invalid response of {backend}: {content}",
+                            backend=tier_backend,
+                            content=response.content,
+                        )
+                        break
+                    else:
+                        self.stats.exhausted += 1
+                        logger.warning(
+                            "No cascade backend responded validly, "
+                            "using the last response: {content}",
+                            content=response.content,
+                        )
+                    yield response
+                    return
@@ -0,0 +1,325 @@
+from collections import defaultdict, deque
+from collections.abc import AsyncGenerator
+import json
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any, Literal, overload
+from typing_extensions import Self, override
+
+from pydantic import ValidationError
+from pydantic_core import to_jsonable_python
+
+from operagents import backend
+from operagents.cache import canonical_hash
+from operagents.config import CassetteBackendConfig
+from operagents.exception import BackendError, OperaFinished
+from operagents.log import logger
+
+from ._base import Backend, GeneratePropUsage, GenerateResponse, Message, PropMessage
+from .cache import message_cache_key, prop_cache_key
+
+if TYPE_CHECKING:
+    from operagents.prop import Prop
+    from operagents.timeline import Timeline
+
+
+class Cassette:
+    """A JSON lines file of recorded backend interactions.
+
+    Each line holds the request key, the request itself for inspection and
+    the responses yielded by the backend in order. Identical requests are
+    replayed in the order they were recorded.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path: Path = path
+        """The path of the cassette file."""
+
+        # interactions indexed by the key with and without the backend identity
+        self._interactions: dict[str, deque[dict[str, Any]]] | None = None
+        self._requests: dict[str, deque[dict[str, Any]]] = defaultdict(deque)
+        self._file: IO[str] | None = None
+        self._recorded: bool = False
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(path={self.path!r})"
+
+    def _load(self) -> dict[str, deque[dict[str, Any]]]:
+        if self._interactions is None:
+            self._interactions = defaultdict(deque)
+            if self.path.exists():
+                with self.path.open(encoding="utf-8") as f:
+                    for line in f:
+                        if line.strip():
+                            interaction = json.loads(line)
+                            interaction["replayed"] = False
+                            self._interactions[interaction["key"]].append(interaction)
+                            if request_key := interaction.get("request_key"):
+                                self._requests[request_key].append(interaction)
+        return self._interactions
+
+    def pop(
+        self, key: str, request_key: str | None = None
+    ) -> list[dict[str, Any]] | None:
+        """Take the next recorded responses of the request.
+
+        Without the backend identity in the key, requests are matched by the
+        request key only.
+        """
+        interactions = self._load()
+        queue = interactions.get(key)
+        if not queue and request_key is not None:
+            queue = self._requests.get(request_key)
+        while queue:
+            interaction = queue.popleft()
+            if not interaction["replayed"]:
+                interaction["replayed"] = True
+                return interaction["responses"]
+        return None
+
+    def append(
+        self,
+        key: str,
+        request: dict[str, Any],
+        responses: list[dict[str, Any]],
+        request_key: str | None = None,
+    ) -> None:
+        """Record an interaction.
+
+        The cassette file is overwritten by the first recorded interaction.
+        """
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.path.open(
+                "a" if self._recorded else "w", encoding="utf-8"
+            )
+            self._recorded = True
+        self._file.write(
+            json.dumps(
+                {
+                    "key": key,
+                    "request_key": request_key,
+                    "request": request,
+                    "responses": responses,
+                },
+                ensure_ascii=False,
+            )
+            + "\n"
+        )
+        self._file.flush()
+
+    def close(self) -> None:
+        """Close the cassette file opened for recording."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+_cassettes: dict[Path, Cassette] = {}
+
+
+def get_cassette(path: str | Path) -> Cassette:
+    """Get the cassette shared by all backends with the same path."""
+    path = Path(path).resolve()
+    if (cassette := _cassettes.get(path)) is None:
+        cassette = _cassettes[path] = Cassette(path)
+    return cassette
+
+
+def close_cassettes() -> None:
+    """Close all cassettes opened for recording."""
+    for cassette in _cassettes.values():
+        cassette.close()
+
+
+def dump_response(response: GenerateResponse | GeneratePropUsage) -> dict[str, Any]:
+    """Get the recordable representation of a generated response."""
+    if isinstance(response, GenerateResponse):
+        return {"type": "response", "content": response.content}
+    return {
+        "type": "prop_usage",
+        "props": [
+            {
+                "usage_id": usage["usage_id"],
+                "prop": usage["prop"].name,
+                "raw_params": usage["raw_params"],
+                "result": to_jsonable_python(usage["result"], fallback=str),
+                "duration": usage.get("duration"),
+            }
+            for usage in response.props
+        ],
+    }
+
+
+class CassetteBackend(Backend):
+    """Record the interactions of another backend or replay them.
+
+    Replayed prop usages are yielded with the recorded results, the props
+    are not used again, so their side effects are not reproduced. A prop
+    ending the opera is recorded and the replay ends the opera at the same
+    point.
+    """
+
+    type_ = "cassette"
+
+    def __init__(
+        self,
+        backend: Backend | None,
+        cassette: Cassette,
+        *,
+        mode: Literal["record", "replay"] = "replay",
+        on_mismatch: Literal["error", "passthrough"] = "error",
+        namespace: Any = None,
+    ) -> None:
+        super().__init__()
+
+        if backend is None and (mode == "record" or on_mismatch == "passthrough"):
+            raise ValueError("A backend is required to record or pass through.")
+
+        self.backend: Backend | None = backend
+        """The wrapped backend."""
+        self.cassette: Cassette = cassette
+        """The cassette to record to or replay from."""
+        self.mode: Literal["record", "replay"] = mode
+        """Whether to record or replay the interactions."""
+        self.on_mismatch: Literal["error", "passthrough"] = on_mismatch
+        """What to do if a request is not found in the cassette when replaying."""
+        self.namespace: Any = namespace
+        """Extra data identifying the wrapped backend in cassette keys."""
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}("
+            f"backend={self.backend!r}, cassette={self.cassette!r}, "
+            f"mode={self.mode!r}, on_mismatch={self.on_mismatch!r}"
+            ")"
+        )
+
+    @classmethod
+    @override
+    def from_config(  # pyright: ignore[reportIncompatibleMethodOverride]
+        cls, config: CassetteBackendConfig
+    ) -> Self:
+        return cls(
+            backend=(
+                backend.from_config(config.backend)
+                if config.backend is not None
+                else None
+            ),
+            cassette=get_cassette(config.path),
+            mode=config.mode,
+            on_mismatch=config.on_mismatch,
+            namespace=(
+                config.backend.model_dump(
+                    mode="json", by_alias=True, exclude={"api_key"}
+                )
+                if config.backend is not None
+                else None
+            ),
+        )
+
+    def _load_response(
+        self, data: dict[str, Any], props: dict[str, "Prop"]
+    ) -> GenerateResponse | GeneratePropUsage:
+        if data["type"] == "response":
+            return GenerateResponse(content=data["content"])
+        elif data["type"] == "finished":
+            raise OperaFinished()
+
+        usages: list[PropMessage] = []
+        for usage in data["props"]:
+            if (prop := props.get(usage["prop"])) is None:
+                raise BackendError(f"Recorded prop {usage['prop']} is not available")
+            try:
+                params = (
+                    prop.params.model_validate_json(usage["raw_params"])
+                    if prop.params
+                    else None
+                )
+            except ValidationError as e:
+                raise BackendError(
+                    f"Recorded params of prop {prop.name} are invalid"
+                ) from e
+            usages.append(
+                PropMessage(
+                    role="prop",
+                    usage_id=usage["usage_id"],
+                    prop=prop,
+                    raw_params=usage["raw_params"],
+                    params=params,
+                    result=usage["result"],
+                    duration=usage.get("duration"),
+                )
+            )
+        return GeneratePropUsage(props=usages)
+
+    @overload
+    def generate(
+        self,
+        timeline: "Timeline",
+        messages: list[Message],
+        props: None = None,
+    ) -> AsyncGenerator[GenerateResponse, None]: ...
+
+    @overload
+    def generate(
+        self,
+        timeline: "Timeline",
+        messages: list[Message],
+        props: list["Prop"],
+    ) -> AsyncGenerator[GenerateResponse | GeneratePropUsage, None]: ...
+
+    @override
+    async def generate(
+        self,
+        timeline: "Timeline",
+        messages: list[Message],
+        props: list["Prop"] | None = None,
+    ) -> AsyncGenerator[GenerateResponse | GeneratePropUsage, None]:
+        request = {
+            "messages": [message_cache_key(message) for message in messages],
+            "tools": [prop_cache_key(prop) for prop in props or ()],
+        }
+        request_key = canonical_hash(request)
+        key = canonical_hash({"backend": self.namespace, **request})
+
+        if self.mode == "replay":
+            recorded = self.cassette.pop(
+                key, request_key if self.namespace is None else None
+            )
+            if recorded is not None:
+                available_props = {prop.name: prop for prop in props or ()}
+                for data in recorded:
+                    yield self._load_response(data, available_props)
+                return
+
+            if self.on_mismatch == "error" or self.backend is None:
+                raise BackendError(f"Request {key} is not recorded in the cassette")
+            logger.warning(
+                "Request {key} is not recorded in the cassette, passing through",
+                key=key,
+            )
+            async for response in self.backend.generate(timeline, messages, props):
+                yield response
+            return
+
+        assert self.backend is not None
+        responses: list[dict[str, Any]] = []
+        try:
+            async for response in self.backend.generate(timeline, messages, props):
+                responses.append(dump_response(response))
+                # consumers stop iterating at the final response
+                if isinstance(response, GenerateResponse):
+                    self.cassette.append(
+                        key,
+                        to_jsonable_python(request, fallback=str),
+                        responses,
+                        request_key,
+                    )
+                yield response
+        except OperaFinished:
+            # a prop ended the opera during the generation
+            responses.append({"type": "finished"})
+            self.cassette.append(
+                key, to_jsonable_python(request, fallback=str), responses, request_key
+            )
+            raise
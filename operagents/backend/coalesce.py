@@ -0,0 +1,207 @@
+import asyncio
+from collections.abc import AsyncGenerator
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, overload
+from typing_extensions import Self, override
+
+from operagents import backend
+from operagents.cache import canonical_hash
+from operagents.config import BackendConfig, CoalesceBackendConfig
+from operagents.log import logger
+
+from ._base import Backend, GeneratePropUsage, GenerateResponse, Message
+from .cache import message_cache_key
+
+if TYPE_CHECKING:
+    from operagents.prop import Prop
+    from operagents.timeline import Timeline
+
+
+@dataclass(kw_only=True)
+class CoalesceStats:
+    """Counters of a single flight group."""
+
+    requests: int = 0
+    """The number of requests passed through the group."""
+    executed: int = 0
+    """The number of requests actually sent to the backend."""
+    coalesced: int = 0
+    """The number of requests served by another identical in-flight request."""
+
+
+class _Flight:
+    def __init__(self) -> None:
+        self.items: list[GenerateResponse | GeneratePropUsage] = []
+        self.completed: bool = False
+        self.exception: Exception | None = None
+        self.done = asyncio.Event()
+
+
+class SingleFlight:
+    """Track in-flight requests so that identical ones are executed only once."""
+
+    def __init__(self) -> None:
+        self.stats = CoalesceStats()
+        """The counters of the group."""
+
+        self._flights: dict[str, _Flight] = {}
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(stats={self.stats!r})"
+
+    async def run(
+        self,
+        key: str,
+        generate: AsyncGenerator[GenerateResponse | GeneratePropUsage, None],
+    ) -> AsyncGenerator[GenerateResponse | GeneratePropUsage, None]:
+        """Run the generation or wait for the identical in-flight one."""
+        self.stats.requests += 1
+
+        coalesced = False
+        while (flight := self._flights.get(key)) is not None:
+            if not coalesced:
+                coalesced = True
+                self.stats.coalesced += 1
+                logger.debug("Coalescing identical in-flight request: {key}", key=key)
+            await flight.done.wait()
+            if flight.completed:
+                await generate.aclose()
+                for item in flight.items:
+                    yield item
+                return
+            if flight.exception is not None:
+                await generate.aclose()
+                raise flight.exception
+            # the leading request was cancelled, wait for another one or run
+
+        if coalesced:
+            self.stats.coalesced -= 1
+        flight = self._flights[key] = _Flight()
+        self.stats.executed += 1
+        try:
+            async for item in generate:
+                flight.items.append(item)
+                if isinstance(item, GenerateResponse):
+                    self._finish(key, flight)
+                yield item
+        except Exception as e:
+            self._finish(key, flight, e)
+            raise
+        finally:
+            # cancelled or closed before the final response
+            self._finish(key, flight)
+
+    def _finish(
+        self, key: str, flight: _Flight, exception: Exception | None = None
+    ) -> None:
+        if flight.done.is_set():
+            return
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        flight.completed = exception is None and any(
+            isinstance(item, GenerateResponse) for item in flight.items
+        )
+        flight.exception = exception
+        flight.done.set()
+
+
+single_flight = SingleFlight()
+"""The single flight group shared by all coalesce backends."""
+
+
+def is_deterministic(config: BackendConfig) -> bool:
+    """Check whether the (wrapped) backend is configured with zero temperature."""
+    data: dict[str, Any] = config.model_dump()
+    while "temperature" not in data and isinstance(data.get("backend"), dict):
+        data = data["backend"]
+    return data.get("temperature") == 0
+
+
+class CoalesceBackend(Backend):
+    """Coalesce identical concurrent requests to another backend.
+
+    Only the first request is sent to the wrapped backend, the others wait for it
+    and receive the same responses. Requests with props are not coalesced since
+    props may have side effects, they are passed through to the wrapped backend.
+    """
+
+    type_ = "coalesce"
+
+    def __init__(
+        self,
+        backend: Backend,
+        *,
+        enabled: bool = True,
+        namespace: Any = None,
+        group: SingleFlight = single_flight,
+    ) -> None:
+        super().__init__()
+
+        self.backend: Backend = backend
+        """The wrapped backend."""
+        self.enabled: bool = enabled
+        """Whether to coalesce requests."""
+        self.namespace: Any = namespace
+        """Extra data identifying the wrapped backend in request keys."""
+        self.group: SingleFlight = group
+        """The single flight group tracking in-flight requests."""
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}("
+            f"backend={self.backend!r}, enabled={self.enabled}, group={self.group!r}"
+            ")"
+        )
+
+    @classmethod
+    @override
+    def from_config(  # pyright: ignore[reportIncompatibleMethodOverride]
+        cls, config: CoalesceBackendConfig
+    ) -> Self:
+        return cls(
+            backend=backend.from_config(config.backend),
+            enabled=not config.deterministic_only or is_deterministic(config.backend),
+            namespace=config.backend.model_dump(
+                mode="json", by_alias=True, exclude={"api_key"}
+            ),
+        )
+
+    @overload
+    def generate(
+        self,
+        timeline: "Timeline",
+        messages: list[Message],
+        props: None = None,
+    ) -> AsyncGenerator[GenerateResponse, None]: ...
+
+    @overload
+    def generate(
+        self,
+        timeline: "Timeline",
+        messages: list[Message],
+        props: list["Prop"],
+    ) -> AsyncGenerator[GenerateResponse | GeneratePropUsage, None]: ...
+
+    @override
+    async def generate(
+        self,
+        timeline: "Timeline",
+        messages: list[Message],
+        props: list["Prop"] | None = None,
+    ) -> AsyncGenerator[GenerateResponse | GeneratePropUsage, None]:
+        generate = self.backend.generate(timeline, messages, props)
+        # props of followers would not be used, their effects only apply to
+        # the leading request
+        if not self.enabled or props:
+            async for response in generate:
+                yield response
+            return
+
+        key = canonical_hash(
+            {
+                "backend": self.namespace,
+                "messages": [message_cache_key(message) for message in messages],
+            }
+        )
+        async for response in self.group.run(key, generate):
+            yield response
@@ -0,0 +1,202 @@
+import asyncio
+import bisect
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+import time
+from typing import Any, TypeVar
+from typing_extensions import Self
+
+from operagents.config import OpenaiHedgeConfig
+from operagents.log import logger
+from operagents.report import percentile
+
+T = TypeVar("T")
+
+
+class LatencyTracker:
+    """Track latency percentiles over a sliding window of recent requests."""
+
+    def __init__(self, window: int = 1000) -> None:
+        self.window: int = window
+        """The number of recent latencies kept."""
+
+        self._recent: deque[float] = deque()
+        self._sorted: list[float] = []
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(window={self.window}, count={len(self)})"
+
+    def __len__(self) -> int:
+        return len(self._recent)
+
+    def add(self, latency: float) -> None:
+        """Record the latency of a request."""
+        self._recent.append(latency)
+        bisect.insort(self._sorted, latency)
+        if len(self._recent) > self.window:
+            oldest = self._recent.popleft()
+            del self._sorted[bisect.bisect_left(self._sorted, oldest)]
+
+    def percentile(self, q: float) -> float | None:
+        """Get the latency at the percentile, `q` between 0 and 1."""
+        return percentile(self._sorted, q) if self._sorted else None
+
+
+@dataclass(kw_only=True)
+class HedgeStats:
+    """Counters of a hedging policy."""
+
+    requests: int = 0
+    """The number of requests sent through the policy."""
+    hedged: int = 0
+    """The number of duplicate requests sent, i.e. the extra cost."""
+    wins: int = 0
+    """The number of duplicate requests finished before the original one."""
+    cancelled: int = 0
+    """The number of losing requests cancelled.
+
+    Cancelled requests may still be billed by the provider. Backends record
+    them in the usage with the prompt tokens of the winner, the tokens they
+    generated before being cancelled are unknown. Losers finished together
+    with the winner are not cancelled and recorded with their own usage.
+    """
+
+    @property
+    def hedge_rate(self) -> float:
+        """The ratio of duplicate requests to requests."""
+        return self.hedged / self.requests if self.requests else 0.0
+
+
+class HedgePolicy:
+    """Send a duplicate of requests that are slower than usual.
+
+    A request not finished after the latency percentile is duplicated, the
+    first finished one wins and the other is cancelled. The ratio of duplicate
+    requests is capped by the budget.
+    """
+
+    def __init__(
+        self,
+        *,
+        percentile: float = 0.95,
+        initial_delay: float | None = None,
+        min_samples: int = 20,
+        window: int = 1000,
+        budget: float = 0.1,
+    ) -> None:
+        self.percentile: float = percentile
+        """The latency percentile to send the duplicate request at."""
+        self.initial_delay: float | None = initial_delay
+        """The delay before enough latencies are tracked, `None` to not hedge."""
+        self.min_samples: int = min_samples
+        """The number of latencies required to use the percentile."""
+        self.budget: float = budget
+        """The maximum ratio of duplicate requests to requests."""
+
+        self.tracker = LatencyTracker(window)
+        """The latencies of the recent requests."""
+        self.stats = HedgeStats()
+        """The counters of the policy."""
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}("
+            f"percentile={self.percentile}, budget={self.budget}, "
+            f"stats={self.stats!r}"
+            ")"
+        )
+
+    @classmethod
+    def from_config(cls, config: OpenaiHedgeConfig) -> Self:
+        return cls(
+            percentile=config.percentile,
+            initial_delay=config.initial_delay,
+            min_samples=config.min_samples,
+            window=config.window,
+            budget=config.budget,
+        )
+
+    def delay(self) -> float | None:
+        """Get the delay before hedging the current request."""
+        if len(self.tracker) < self.min_samples:
+            return self.initial_delay
+        return self.tracker.percentile(self.percentile)
+
+    def _within_budget(self) -> bool:
+        return self.stats.hedged + 1 <= self.budget * self.stats.requests
+
+    async def _timed(self, call: Callable[[], Awaitable[T]]) -> tuple[T, float]:
+        start = time.perf_counter()
+        result = await call()
+        return result, time.perf_counter() - start
+
+    async def run(self, call: Callable[[], Awaitable[T]]) -> T:
+        """Run the request with hedging."""
+        result, _ = await self.run_counted(call)
+        return result
+
+    async def run_counted(
+        self, call: Callable[[], Awaitable[T]]
+    ) -> tuple[T, list[T | None]]:
+        """Run the request with hedging.
+
+        Return the result and the outcomes of the losing requests, the result
+        of the losers also finished and `None` for the cancelled ones.
+        """
+        self.stats.requests += 1
+        start = time.perf_counter()
+        primary = asyncio.create_task(self._timed(call))
+        tasks: list[asyncio.Task[tuple[T, float]]] = [primary]
+        try:
+            delay = self.delay()
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done and self._within_budget():
+                    self.stats.hedged += 1
+                    logger.debug(
+                        "Request not finished after {delay:.3f}s, hedging", delay=delay
+                    )
+                    tasks.append(asyncio.create_task(self._timed(call)))
+
+            pending: set[asyncio.Task[Any]] = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                # prefer a success, fail only if all requests failed
+                for task in sorted(done, key=lambda task: task is not primary):
+                    if task.exception() is None:
+                        self._track(primary, start)
+                        if task is not primary:
+                            self.stats.wins += 1
+                        # the losers still running are cancelled below
+                        return task.result()[0], [
+                            self._outcome(loser) for loser in tasks if loser is not task
+                        ]
+            # all failed, raise the error of the original request
+            return primary.result()[0], []
+        finally:
+            if losers := [task for task in tasks if not task.done()]:
+                self.stats.cancelled += len(losers)
+                for task in losers:
+                    task.cancel()
+                await asyncio.wait(losers)
+
+    def _track(self, primary: "asyncio.Task[tuple[Any, float]]", start: float) -> None:
+        """Track the latency of the original request.
+
+        The latency of the duplicate would bias the percentile towards the
+        fast requests. An original request still running is tracked with its
+        elapsed time, a lower bound of its latency.
+        """
+        if not primary.done():
+            self.tracker.add(time.perf_counter() - start)
+        elif primary.exception() is None:
+            self.tracker.add(primary.result()[1])
+
+    @staticmethod
+    def _outcome(task: "asyncio.Task[tuple[T, float]]") -> T | None:
+        if task.done() and task.exception() is None:
+            return task.result()[0]
+        return None
@@ -0,0 +1,233 @@
+import asyncio
+from collections.abc import AsyncGenerator, Mapping, Sequence
+import json
+import math
+import random
+import time
+from typing import TYPE_CHECKING, Any, Literal, overload
+from typing_extensions import Self, override
+from uuid import uuid4
+
+from pydantic import ValidationError
+
+from operagents.config import MockBackendConfig, MockConfig, MockToolCallConfig
+from operagents.exception import BackendError
+from operagents.usage import record_usage
+from operagents.utils import get_template_renderer
+
+from ._base import Backend, GeneratePropUsage, GenerateResponse, Message, PropMessage
+
+if TYPE_CHECKING:
+    from operagents.prop import Prop
+    from operagents.timeline import Timeline
+
+
+def estimate_tokens(content: str) -> int:
+    """Roughly estimate the number of tokens of a text."""
+    return max(1, math.ceil(len(content) / 4))
+
+
+def messages_tokens(messages: Sequence[Mapping[str, Any]]) -> int:
+    """Roughly estimate the number of prompt tokens of messages."""
+    return sum(
+        estimate_tokens(str(message.get("content") or message.get("result") or ""))
+        for message in messages
+    )
+
+
+class MockResponder:
+    """Deterministic behavior shared by the mock backend and the mock server."""
+
+    def __init__(self, config: MockConfig) -> None:
+        self.config: MockConfig = config
+        """The mock behavior config."""
+
+        self.random = random.Random(config.seed)
+        self.reply_renderer = get_template_renderer(config.reply_template)
+        self.request_count: int = 0
+        """The number of requests responded."""
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(request_count={self.request_count})"
+
+    def next_index(self) -> int:
+        """Count a new request and return its index."""
+        index = self.request_count
+        self.request_count += 1
+        return index
+
+    def failure(self) -> Literal["error", "rate_limit"] | None:
+        """Decide whether to inject a failure into the request."""
+        value = self.random.random()
+        if value < self.config.rate_limit_rate:
+            return "rate_limit"
+        if value < self.config.rate_limit_rate + self.config.error_rate:
+            return "error"
+        return None
+
+    def latency(self, content: str = "") -> float:
+        """Sample the latency of a response in seconds."""
+        config = self.config.latency
+        if config.distribution == "constant":
+            latency = config.mean
+        elif config.distribution == "uniform":
+            latency = self.random.uniform(
+                config.mean - config.std, config.mean + config.std
+            )
+        elif config.distribution == "normal":
+            latency = self.random.gauss(config.mean, config.std)
+        else:
+            # lognormal with the given mean and std of the latency itself
+            latency = 0.0
+            if config.mean > 0:
+                sigma2 = math.log(1 + (config.std / config.mean) ** 2)
+                latency = self.random.lognormvariate(
+                    math.log(config.mean) - sigma2 / 2, math.sqrt(sigma2)
+                )
+        latency = max(config.min, latency)
+        if config.max is not None:
+            latency = min(config.max, latency)
+
+        if self.config.tokens_per_second and content:
+            latency += estimate_tokens(content) / self.config.tokens_per_second
+        return latency
+
+    def tool_calls(self, round_: int) -> list[MockToolCallConfig]:
+        """Get the scripted tool calls of the round."""
+        if round_ < len(self.config.tool_call_rounds):
+            return self.config.tool_call_rounds[round_]
+        return []
+
+    async def reply(
+        self, index: int, messages: Sequence[Mapping[str, Any]], **context: Any
+    ) -> str:
+        """Get the scripted or rendered reply of the request."""
+        if self.config.replies:
+            return self.config.replies[index % len(self.config.replies)]
+        return await self.reply_renderer.render_async(
+            index=index,
+            messages=messages,
+            last_message=messages[-1].get("content") if messages else None,
+            **context,
+        )
+
+
+def tool_call_arguments(call: MockToolCallConfig) -> str:
+    """Get the raw json arguments of a scripted tool call."""
+    if isinstance(call.arguments, str):
+        return call.arguments
+    return json.dumps(call.arguments, ensure_ascii=False)
+
+
+class MockBackend(Backend):
+    """A backend with scripted responses for testing and benchmarking.
+
+    It costs nothing and works without network.
+    """
+
+    type_ = "mock"
+
+    def __init__(self, responder: MockResponder) -> None:
+        super().__init__()
+
+        self.responder: MockResponder = responder
+        """The mock behavior."""
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(responder={self.responder!r})"
+
+    @classmethod
+    @override
+    def from_config(  # pyright: ignore[reportIncompatibleMethodOverride]
+        cls, config: MockBackendConfig
+    ) -> Self:
+        return cls(responder=MockResponder(config))
+
+    def _inject_failure(self) -> None:
+        failure = self.responder.failure()
+        if failure == "rate_limit":
+            raise BackendError("Mock backend rate limit exceeded")
+        elif failure == "error":
+            raise BackendError("Mock backend injected error")
+
+    async def _use_prop(
+        self, timeline: "Timeline", prop: "Prop", call: MockToolCallConfig
+    ) -> PropMessage:
+        args = tool_call_arguments(call)
+        try:
+            params = prop.params.model_validate_json(args) if prop.params else None
+        except ValidationError as e:
+            raise BackendError(f"Mock tool call to {prop.name} is invalid") from e
+        start = time.perf_counter()
+        result = await prop.use(timeline, params)
+        return PropMessage(
+            role="prop",
+            usage_id=f"call_{uuid4().hex}",
+            prop=prop,
+            raw_params=args,
+            params=params,
+            result=result,
+            duration=time.perf_counter() - start,
+        )
+
+    @overload
+    def generate(
+        self,
+        timeline: "Timeline",
+        messages: list[Message],
+        props: None = None,
+    ) -> AsyncGenerator[GenerateResponse, None]: ...
+
+    @overload
+    def generate(
+        self,
+        timeline: "Timeline",
+        messages: list[Message],
+        props: list["Prop"],
+    ) -> AsyncGenerator[GenerateResponse | GeneratePropUsage, None]: ...
+
+    @override
+    async def generate(
+        self,
+        timeline: "Timeline",
+        messages: list[Message],
+        props: list["Prop"] | None = None,
+    ) -> AsyncGenerator[GenerateResponse | GeneratePropUsage, None]:
+        available_props = {prop.name: prop for prop in props} if props else {}
+
+        round_ = 0
+        while available_props and (calls := self.responder.tool_calls(round_)):
+            self.responder.next_index()
+            await asyncio.sleep(self.responder.latency())
+            self._inject_failure()
+
+            if missing := {c.prop for c in calls} - set(available_props):
+                raise BackendError(f"Mock tool call to unknown props: {missing}")
+            record_usage(
+                "mock",
+                prompt_tokens=messages_tokens(messages),
+                completion_tokens=sum(
+                    estimate_tokens(tool_call_arguments(call)) for call in calls
+                ),
+            )
+            results = await asyncio.gather(
+                *(
+                    self._use_prop(timeline, available_props[call.prop], call)
+                    for call in calls
+                )
+            )
+            yield GeneratePropUsage(props=list(results))
+            round_ += 1
+
+        index = self.responder.next_index()
+        content = await self.responder.reply(
+            index, messages, timeline=timeline, props=props
+        )
+        await asyncio.sleep(self.responder.latency(content))
+        self._inject_failure()
+        record_usage(
+            "mock",
+            prompt_tokens=messages_tokens(messages),
+            completion_tokens=estimate_tokens(content),
+        )
+        yield GenerateResponse(content=content)
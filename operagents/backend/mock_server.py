@@ -0,0 +1,192 @@
+import asyncio
+from http import HTTPStatus
+import json
+import time
+from typing import Any
+from uuid import uuid4
+
+from operagents.log import logger
+
+from .mock import (
+    MockResponder,
+    estimate_tokens,
+    messages_tokens,
+    tool_call_arguments,
+)
+
+CHAT_COMPLETION_ROUTES = {"/chat/completions", "/v1/chat/completions"}
+
+
+def _tool_call_round(messages: list[dict[str, Any]]) -> int:
+    """Count the tool call rounds since the last system or user message."""
+    round_ = 0
+    for message in reversed(messages):
+        if message.get("role") in ("system", "user"):
+            break
+        if message.get("role") == "assistant" and message.get("tool_calls"):
+            round_ += 1
+    return round_
+
+
+class MockServer:
+    """A local OpenAI compatible chat completions stub server.
+
+    Point the `base_url` of the openai backend at the server to measure
+    the framework overhead including the real http client.
+    """
+
+    def __init__(
+        self, responder: MockResponder, host: str = "127.0.0.1", port: int = 8000
+    ) -> None:
+        self.responder: MockResponder = responder
+        """The mock behavior."""
+        self.host: str = host
+        """The host to listen on."""
+        self.port: int = port
+        """The port to listen on, 0 for a random free port."""
+
+        self._server: asyncio.Server | None = None
+
+    @property
+    def base_url(self) -> str:
+        """The base url for the openai client."""
+        if self._server is not None:
+            host, port = self._server.sockets[0].getsockname()[:2]
+        else:
+            host, port = self.host, self.port
+        return f"http://{host}:{port}/v1"
+
+    async def start(self) -> None:
+        """Start listening."""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        logger.info("Mock server listening on {base_url}", base_url=self.base_url)
+
+    async def serve_forever(self) -> None:
+        """Start listening and serve until cancelled."""
+        if self._server is None:
+            await self.start()
+        assert self._server is not None
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        """Stop listening."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            headers: dict[str, str] = {}
+            while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+            if len(request_line) < 2:
+                status, data = HTTPStatus.BAD_REQUEST, {}
+            else:
+                method, path = request_line[0], request_line[1].partition("?")[0]
+                if method != "POST" or path not in CHAT_COMPLETION_ROUTES:
+                    status, data = HTTPStatus.NOT_FOUND, self._error("Not found")
+                else:
+                    status, data = await self._chat_completion(json.loads(body))
+        except Exception as e:
+            logger.opt(exception=True).warning("Mock server request failed")
+            status, data = HTTPStatus.BAD_REQUEST, self._error(str(e))
+
+        content = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        writer.write(
+            (
+                f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(content)}\r\n"
+                "Connection: close\r\n\r\n"
+            ).encode("latin-1")
+            + content
+        )
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    def _error(self, message: str, type_: str = "invalid_request_error") -> dict:
+        return {"error": {"message": message, "type": type_}}
+
+    async def _chat_completion(
+        self, request: dict[str, Any]
+    ) -> tuple[HTTPStatus, dict[str, Any]]:
+        if request.get("stream"):
+            return HTTPStatus.BAD_REQUEST, self._error("Streaming is not supported")
+
+        index = self.responder.next_index()
+        messages: list[dict[str, Any]] = request.get("messages", [])
+        tool_names = {
+            tool["function"]["name"]
+            for tool in request.get("tools", [])
+            if tool.get("type") == "function"
+        }
+        calls = (
+            self.responder.tool_calls(_tool_call_round(messages))
+            if tool_names and request.get("tool_choice") != "none"
+            else []
+        )
+        calls = [call for call in calls if call.prop in tool_names]
+
+        message: dict[str, Any]
+        if calls:
+            message = {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [
+                    {
+                        "id": f"call_{uuid4().hex}",
+                        "type": "function",
+                        "function": {
+                            "name": call.prop,
+                            "arguments": tool_call_arguments(call),
+                        },
+                    }
+                    for call in calls
+                ],
+            }
+            content = json.dumps(message["tool_calls"])
+        else:
+            content = await self.responder.reply(index, messages, request=request)
+            message = {"role": "assistant", "content": content}
+
+        await asyncio.sleep(self.responder.latency(content))
+        failure = self.responder.failure()
+        if failure == "rate_limit":
+            return HTTPStatus.TOO_MANY_REQUESTS, self._error(
+                "Mock rate limit exceeded", "rate_limit_error"
+            )
+        elif failure == "error":
+            return HTTPStatus.INTERNAL_SERVER_ERROR, self._error(
+                "Mock injected error", "server_error"
+            )
+
+        prompt_tokens = messages_tokens(messages)
+        completion_tokens = estimate_tokens(content)
+        return HTTPStatus.OK, {
+            "id": f"chatcmpl-{uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "tool_calls" if calls else "stop",
+                    "message": message,
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
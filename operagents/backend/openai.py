@@ -1,12 +1,15 @@
 import abc
 import asyncio
 from collections.abc import AsyncGenerator, Awaitable, Callable
-from typing import TYPE_CHECKING, Literal, cast, overload
+import time
+from typing import TYPE_CHECKING, Any, Literal, cast, overload
 from typing_extensions import Self, override
 
 import openai
+from openai.types.chat import ChatCompletion
 from pydantic import ValidationError
 
+from operagents.cache import canonical_hash
 from operagents.config import (
     OpenaiBackendAutoToolChoiceConfig,
     OpenaiBackendConfig,
@@ -15,10 +18,15 @@ from operagents.config import (
     TemplateConfig,
 )
 from operagents.exception import BackendError
+from operagents.log import logger
 from operagents.prop import Prop
+from operagents.usage import record_usage
 from operagents.utils import get_template_renderer, resolve_dot_notation
 
 from ._base import Backend, GeneratePropUsage, GenerateResponse, Message, PropMessage
+from .cache import ResponseCache, get_response_cache
+from .hedge import HedgePolicy
+from .pool import EndpointPool, get_endpoint_pool
 
 if TYPE_CHECKING:
     from openai.types.chat.chat_completion_assistant_message_param import (
@@ -34,6 +42,7 @@ if TYPE_CHECKING:
         ChatCompletionToolMessageParam,
     )
     from openai.types.chat.chat_completion_tool_param import ChatCompletionToolParam
+    from openai.types.shared_params.function_definition import FunctionDefinition
 
     from operagents.timeline import Timeline
 
@@ -100,20 +109,45 @@ class OpenAIBackend(Backend):
         response_format: Literal["text", "json_object"] = "text",
         tool_choice: OpenAIBackendToolChoice,
         prop_validation_error_template: TemplateConfig,
+        prop_timeout_template: TemplateConfig,
+        prop_timeout: float | None = None,
+        max_concurrent_props: int | None = None,
+        max_prop_rounds: int | None = None,
+        cache: ResponseCache | None = None,
+        pool: EndpointPool | None = None,
+        hedge: HedgePolicy | None = None,
     ) -> None:
         super().__init__()
 
-        self.client = openai.AsyncOpenAI(
-            api_key=api_key, base_url=base_url, max_retries=max_retries
+        # the endpoints of a pool may have their own api keys
+        self.client = (
+            pool.endpoints[0].client
+            if pool is not None
+            else openai.AsyncOpenAI(
+                api_key=api_key, base_url=base_url, max_retries=max_retries
+            )
         )
         self.model: str = model
         self.temperature: float | None = temperature
         self.response_format: Literal["text", "json_object"] = response_format
         self.tool_choice = tool_choice
+        self.prop_timeout: float | None = prop_timeout
+        """The default deadline of a single prop usage in seconds."""
+        self.max_concurrent_props: int | None = max_concurrent_props
+        """The maximum number of concurrent prop usages in one generation."""
+        self.max_prop_rounds: int | None = max_prop_rounds
+        """The maximum number of tool call rounds in one generation."""
+        self.cache: ResponseCache | None = cache
+        """The cache of chat completions, including tool call turns."""
+        self.pool: EndpointPool | None = pool
+        """The endpoints to route requests across instead of the single client."""
+        self.hedge: HedgePolicy | None = hedge
+        """The policy to duplicate slow requests with."""
 
         self.prop_validation_error_renderer = get_template_renderer(
             prop_validation_error_template
         )
+        self.prop_timeout_renderer = get_template_renderer(prop_timeout_template)
 
     @classmethod
     @override
@@ -129,6 +163,29 @@ class OpenAIBackend(Backend):
             max_retries=config.max_retries,
             tool_choice=openai_backend_tool_choice_from_config(config.tool_choice),
             prop_validation_error_template=config.prop_validation_error_template,
+            prop_timeout_template=config.prop_timeout_template,
+            prop_timeout=config.prop_timeout,
+            max_concurrent_props=config.max_concurrent_props,
+            max_prop_rounds=config.max_prop_rounds,
+            cache=(
+                get_response_cache(config.cache) if config.cache is not None else None
+            ),
+            pool=(
+                get_endpoint_pool(
+                    config.endpoints,
+                    config.pool,
+                    api_key=config.api_key,
+                    base_url=config.base_url,
+                    max_retries=config.max_retries,
+                )
+                if config.endpoints
+                else None
+            ),
+            hedge=(
+                HedgePolicy.from_config(config.hedge)
+                if config.hedge is not None
+                else None
+            ),
         )
 
     async def _use_prop(
@@ -151,13 +208,31 @@ class OpenAIBackend(Backend):
                     ),
                 )
 
+        timeout = prop.timeout if prop.timeout is not None else self.prop_timeout
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(prop.use(timeline, param), timeout)
+        except asyncio.TimeoutError:
+            # a timeout raised by the prop itself before the deadline is an error
+            if timeout is None or time.perf_counter() - start < timeout:
+                raise
+            logger.warning(
+                "Prop {prop.name} timed out after {timeout} seconds",
+                prop=prop,
+                timeout=timeout,
+            )
+            result = await self.prop_timeout_renderer.render_async(
+                prop=prop, timeout=timeout
+            )
+
         return PropMessage(
             role="prop",
             usage_id=usage_id,
             prop=prop,
             raw_params=args,
             params=param,
-            result=await prop.use(timeline, param),
+            result=result,
+            duration=time.perf_counter() - start,
         )
 
     def _messages_to_openai(
@@ -218,7 +293,7 @@ class OpenAIBackend(Backend):
                         "content": message["content"],
                     }
                 )
-            elif message["role"] == "tool":
+            elif message["role"] == "prop":
                 tool_calls.append(message)
             else:
                 # This should never happen
@@ -228,23 +303,81 @@ class OpenAIBackend(Backend):
         return result
 
     def _prop_to_tool(self, prop: Prop) -> "ChatCompletionToolParam":
-        if prop.params is None:
-            return {
-                "type": "function",
-                "function": {
-                    "name": prop.name,
-                    "description": prop.description,
-                },
-            }
+        return {
+            "type": "function",
+            "function": cast("FunctionDefinition", prop.tool_definition),
+        }
+
+    def _compile_props(
+        self, timeline: "Timeline", props: list[Prop] | None
+    ) -> tuple[list["ChatCompletionToolParam"], dict[str, Prop]]:
+        if not props:
+            return [], {}
+        character = timeline.current_character
+        if props is character.props:
+            # reuse the tools compiled when the character was loaded
+            return (
+                cast("list[ChatCompletionToolParam]", character.tools),
+                character.props_by_name,
+            )
+        return (
+            [self._prop_to_tool(prop) for prop in props],
+            {prop.name: prop for prop in props},
+        )
+
+    async def _send_completion(self, **params: Any) -> ChatCompletion:
+        if self.pool is None:
+            return await self.client.chat.completions.create(**params)
+        return await self.pool.request(
+            lambda client: client.chat.completions.create(**params)
+        )
+
+    async def _request_completion(self, **params: Any) -> ChatCompletion:
+        losers: list[ChatCompletion | None] = []
+        if self.hedge is None:
+            response = await self._send_completion(**params)
         else:
-            return {
-                "type": "function",
-                "function": {
-                    "name": prop.name,
-                    "description": prop.description,
-                    "parameters": prop.params.model_json_schema(),
-                },
-            }
+            # the duplicate request may be routed to another endpoint of the pool
+            response, losers = await self.hedge.run_counted(
+                lambda: self._send_completion(**params)
+            )
+
+        for loser in losers:
+            if loser is not None:
+                self._record_usage(loser)
+            elif response.usage is not None:
+                # cancelled requests sent the same prompt, their completion is unknown
+                record_usage(self.model, prompt_tokens=response.usage.prompt_tokens)
+        self._record_usage(response)
+        return response
+
+    def _record_usage(self, response: ChatCompletion) -> None:
+        if (usage := response.usage) is not None:
+            details = usage.prompt_tokens_details
+            record_usage(
+                self.model,
+                prompt_tokens=usage.prompt_tokens,
+                completion_tokens=usage.completion_tokens,
+                cached_tokens=(details.cached_tokens or 0) if details else 0,
+            )
+
+    async def _create_completion(self, **params: Any) -> ChatCompletion:
+        if self.cache is None:
+            return await self._request_completion(**params)
+
+        base_url = (
+            [str(e.client.base_url) for e in self.pool.endpoints]
+            if self.pool is not None
+            else str(self.client.base_url)
+        )
+        key = canonical_hash({"base_url": base_url, **params})
+        if (cached := await self.cache.get(key)) is not None:
+            logger.debug("Chat completion cache hit: {key}", key=key)
+            return ChatCompletion.model_validate(cached)
+
+        response = await self._request_completion(**params)
+        await self.cache.set(key, response.model_dump(mode="json", exclude_unset=True))
+        return response
 
     @overload
     def generate(
@@ -269,32 +402,49 @@ class OpenAIBackend(Backend):
         messages: list[Message],
         props: list["Prop"] | None = None,
     ) -> AsyncGenerator[GenerateResponse | GeneratePropUsage, None]:
-        tools: list["ChatCompletionToolParam"] = (
-            [self._prop_to_tool(prop) for prop in props] if props else []
-        )
+        tools, available_props = self._compile_props(timeline, props)
         openai_messages = self._messages_to_openai(messages)
 
-        async def _make_completion():
+        async def _make_completion(rounds: int):
             if props:
-                return await self.client.chat.completions.create(
+                return await self._create_completion(
                     model=self.model,
                     temperature=self.temperature,
                     response_format={"type": self.response_format},  # type: ignore
                     messages=openai_messages,
                     tools=tools,
                     tool_choice=(
-                        await self.tool_choice.choose(timeline, openai_messages, props)
+                        # force a text response once the round limit is reached
+                        "none"
+                        if self.max_prop_rounds is not None
+                        and rounds >= self.max_prop_rounds
+                        else await self.tool_choice.choose(
+                            timeline, openai_messages, props
+                        )
                     ),
                 )
             else:
-                return await self.client.chat.completions.create(
+                return await self._create_completion(
                     model=self.model,
                     temperature=self.temperature,
                     response_format={"type": self.response_format},  # type: ignore
                     messages=openai_messages,
                 )
 
-        response = await _make_completion()
+        act_limit = (
+            asyncio.Semaphore(self.max_concurrent_props)
+            if self.max_concurrent_props is not None
+            else None
+        )
+
+        async def _use_prop_limited(prop: Prop, usage_id: str, args: str):
+            if act_limit is None:
+                return await self._use_prop(timeline, prop, usage_id, args)
+            async with act_limit:
+                return await self._use_prop(timeline, prop, usage_id, args)
+
+        rounds = 0
+        response = await _make_completion(rounds)
         reply = response.choices[0].message
 
         while reply.tool_calls:
@@ -302,6 +452,12 @@ class OpenAIBackend(Backend):
                 raise BackendError(
                     "OpenAI returned tool calls but no props were provided"
                 )
+            if self.max_prop_rounds is not None and rounds >= self.max_prop_rounds:
+                raise BackendError(
+                    f"OpenAI exceeded the limit of {self.max_prop_rounds} "
+                    "tool call rounds"
+                )
+            rounds += 1
 
             openai_messages.append(
                 cast(
@@ -310,44 +466,37 @@ class OpenAIBackend(Backend):
                 )
             )
 
-            available_props = {prop.name: prop for prop in props}
-
             # wait for all prop result or first exception
-            results: list[PropMessage] = []
-            done, pending = await asyncio.wait(
-                {
-                    asyncio.create_task(
-                        self._use_prop(
-                            timeline,
-                            available_props[call.function.name],
-                            call.id,
-                            call.function.arguments,
-                        )
+            tasks = [
+                asyncio.create_task(
+                    _use_prop_limited(
+                        available_props[call.function.name],
+                        call.id,
+                        call.function.arguments,
                     )
-                    for call in reply.tool_calls
-                },
-                return_when=asyncio.FIRST_EXCEPTION,
-            )
-            results.extend(
-                msg for t in done if not t.cancelled() and (msg := t.result())
-            )
-            if pending:
-                # first exception occurred
-                exc = next(
-                    e for t in done if not t.cancelled() and (e := t.exception())
-                )
-                # wait for all remaining tasks completed
-                remain, _ = await asyncio.wait(
-                    pending, return_when=asyncio.ALL_COMPLETED
                 )
-                results.extend(
-                    msg for t in remain if not t.cancelled() and (msg := t.result())
-                )
-                yield GeneratePropUsage(props=results)
-                # reraise the first exception
+                for call in reply.tool_calls
+            ]
+            try:
+                await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            finally:
+                # cancel the remaining props if failed or cancelled
+                if pending := [t for t in tasks if not t.done()]:
+                    for t in pending:
+                        t.cancel()
+                    await asyncio.wait(pending)
+
+            results: list[PropMessage] = [
+                t.result() for t in tasks if not t.cancelled() and not t.exception()
+            ]
+            yield GeneratePropUsage(props=results)
+            # reraise the first exception
+            if exc := next(
+                (e for t in tasks if not t.cancelled() and (e := t.exception())),
+                None,
+            ):
                 raise exc
 
-            yield GeneratePropUsage(props=results)
             openai_messages.extend(
                 cast(
                     "ChatCompletionToolMessageParam",
@@ -360,7 +509,7 @@ class OpenAIBackend(Backend):
                 for result in results
             )
 
-            response = await _make_completion()
+            response = await _make_completion(rounds)
             reply = response.choices[0].message
 
         if reply.content is None:
@@ -0,0 +1,284 @@
+from collections import deque
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import dataclass
+import random
+import time
+from typing import Literal, TypeAlias, TypeVar
+from typing_extensions import Self
+
+import openai
+
+from operagents.cache import canonical_hash
+from operagents.config import OpenaiEndpointConfig, OpenaiEndpointPoolConfig
+from operagents.log import logger
+
+T = TypeVar("T")
+
+PoolStrategy: TypeAlias = Literal["least_outstanding", "latency_weighted"]
+CircuitState: TypeAlias = Literal["closed", "open", "half_open"]
+
+
+def is_endpoint_failure(exc: BaseException) -> bool:
+    """Whether the error is caused by the endpoint rather than the request."""
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code == 429 or exc.status_code >= 500
+    return isinstance(exc, openai.APIConnectionError)
+
+
+@dataclass(kw_only=True)
+class EndpointStats:
+    """Counters of an endpoint."""
+
+    requests: int = 0
+    """The number of requests sent to the endpoint."""
+    failures: int = 0
+    """The number of requests failed by the endpoint."""
+    ejections: int = 0
+    """The number of times the endpoint was ejected by the circuit breaker."""
+
+
+class Endpoint:
+    """An OpenAI compatible endpoint with its load and health."""
+
+    def __init__(
+        self, client: openai.AsyncOpenAI, *, weight: float = 1.0, window: int = 20
+    ) -> None:
+        self.client: openai.AsyncOpenAI = client
+        """The client of the endpoint."""
+        self.weight: float = weight
+        """The relative capacity of the endpoint."""
+
+        self.outstanding: int = 0
+        """The number of in-flight requests."""
+        self.latency: float | None = None
+        """The moving average of successful request latencies in seconds."""
+        self.outcomes: deque[bool] = deque(maxlen=window)
+        """Whether the recent requests succeeded."""
+        self.state: CircuitState = "closed"
+        """The circuit breaker state."""
+        self.opened_at: float = 0.0
+        """When the circuit breaker was opened."""
+
+        self.stats = EndpointStats()
+        """The counters of the endpoint."""
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}("
+            f"base_url={str(self.client.base_url)!r}, state={self.state!r}, "
+            f"outstanding={self.outstanding}, latency={self.latency!r}"
+            ")"
+        )
+
+    @property
+    def error_rate(self) -> float:
+        """The failure rate of the recent requests."""
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+
+class EndpointPool:
+    """Route requests across OpenAI compatible endpoints.
+
+    Endpoints failing too often are ejected by a circuit breaker and get a
+    single probe request after the cooldown. A successful probe reinstates
+    the endpoint. Failed requests are retried on the other endpoints.
+    """
+
+    def __init__(
+        self,
+        endpoints: Sequence[Endpoint],
+        *,
+        strategy: PoolStrategy = "least_outstanding",
+        min_requests: int = 5,
+        failure_threshold: float = 0.5,
+        cooldown: float = 30.0,
+        latency_decay: float = 0.2,
+    ) -> None:
+        if not endpoints:
+            raise ValueError("At least one endpoint is required.")
+
+        self.endpoints: list[Endpoint] = list(endpoints)
+        """The endpoints of the pool."""
+        self.strategy: PoolStrategy = strategy
+        """How to choose the endpoint of a request."""
+        self.min_requests: int = min_requests
+        """The number of recent requests required to eject an endpoint."""
+        self.failure_threshold: float = failure_threshold
+        """The error rate to eject an endpoint at."""
+        self.cooldown: float = cooldown
+        """The time in seconds before an ejected endpoint is probed."""
+        self.latency_decay: float = latency_decay
+        """The weight of the latest latency in the moving average."""
+
+        self.random = random.Random()
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}("
+            f"endpoints={self.endpoints!r}, strategy={self.strategy!r}"
+            ")"
+        )
+
+    @classmethod
+    def from_config(
+        cls,
+        endpoints: Sequence[OpenaiEndpointConfig],
+        config: OpenaiEndpointPoolConfig,
+        *,
+        api_key: str | None = None,
+        base_url: str | None = None,
+        max_retries: int = 2,
+    ) -> Self:
+        return cls(
+            [
+                Endpoint(
+                    openai.AsyncOpenAI(
+                        api_key=endpoint.api_key or api_key,
+                        base_url=endpoint.base_url or base_url,
+                        max_retries=max_retries,
+                    ),
+                    weight=endpoint.weight,
+                    window=config.window,
+                )
+                for endpoint in endpoints
+            ],
+            strategy=config.strategy,
+            min_requests=config.min_requests,
+            failure_threshold=config.failure_threshold,
+            cooldown=config.cooldown,
+            latency_decay=config.latency_decay,
+        )
+
+    def _available(self, exclude: Sequence[Endpoint]) -> list[Endpoint]:
+        now = time.monotonic()
+        available: list[Endpoint] = []
+        for endpoint in self.endpoints:
+            if endpoint in exclude:
+                continue
+            if endpoint.state == "open" and now - endpoint.opened_at >= self.cooldown:
+                endpoint.state = "half_open"
+            if endpoint.state == "closed" or (
+                # only one probe request at a time
+                endpoint.state == "half_open" and endpoint.outstanding == 0
+            ):
+                available.append(endpoint)
+        return available
+
+    def select(self, exclude: Sequence[Endpoint] = ()) -> Endpoint | None:
+        """Choose the endpoint of the next request."""
+        candidates = self._available(exclude)
+        if not candidates:
+            # all ejected, fall back to the one ejected first
+            if ejected := [e for e in self.endpoints if e not in exclude]:
+                return min(ejected, key=lambda e: e.opened_at)
+            return None
+
+        if self.strategy == "least_outstanding":
+            load = min(e.outstanding / e.weight for e in candidates)
+            candidates = [e for e in candidates if e.outstanding / e.weight == load]
+            return self.random.choice(candidates)
+
+        # prefer endpoints without latency samples to explore them
+        if unknown := [e for e in candidates if e.latency is None]:
+            return self.random.choice(unknown)
+        return self.random.choices(
+            candidates,
+            weights=[
+                e.weight / (max(e.latency or 0.0, 1e-3) * (e.outstanding + 1))
+                for e in candidates
+            ],
+        )[0]
+
+    def _record(self, endpoint: Endpoint, success: bool, latency: float) -> None:
+        endpoint.outcomes.append(success)
+        if success:
+            endpoint.latency = (
+                latency
+                if endpoint.latency is None
+                else self.latency_decay * latency
+                + (1 - self.latency_decay) * endpoint.latency
+            )
+            if endpoint.state == "half_open":
+                logger.info("Endpoint {endpoint} reinstated", endpoint=endpoint)
+                endpoint.state = "closed"
+                endpoint.outcomes.clear()
+            return
+
+        endpoint.stats.failures += 1
+        if endpoint.state == "half_open" or (
+            endpoint.state == "closed"
+            and len(endpoint.outcomes) >= self.min_requests
+            and endpoint.error_rate >= self.failure_threshold
+        ):
+            logger.warning("Endpoint {endpoint} ejected", endpoint=endpoint)
+            endpoint.state = "open"
+            endpoint.opened_at = time.monotonic()
+            endpoint.stats.ejections += 1
+
+    async def request(self, call: Callable[[openai.AsyncOpenAI], Awaitable[T]]) -> T:
+        """Send a request to the pool, retrying endpoint failures elsewhere."""
+        tried: list[Endpoint] = []
+        while (endpoint := self.select(tried)) is not None:
+            tried.append(endpoint)
+            endpoint.outstanding += 1
+            endpoint.stats.requests += 1
+            start = time.perf_counter()
+            try:
+                result = await call(endpoint.client)
+            except Exception as e:
+                if not is_endpoint_failure(e):
+                    raise
+                self._record(endpoint, False, time.perf_counter() - start)
+                if len(tried) >= len(self.endpoints):
+                    raise
+                logger.warning(
+                    "Endpoint {endpoint} failed, trying another one: {exc}",
+                    endpoint=endpoint,
+                    exc=e,
+                )
+            else:
+                self._record(endpoint, True, time.perf_counter() - start)
+                return result
+            finally:
+                endpoint.outstanding -= 1
+
+        # This should never happen
+        raise RuntimeError("No endpoint available.")
+
+
+_endpoint_pools: dict[str, EndpointPool] = {}
+
+
+def get_endpoint_pool(
+    endpoints: Sequence[OpenaiEndpointConfig],
+    config: OpenaiEndpointPoolConfig,
+    *,
+    api_key: str | None = None,
+    base_url: str | None = None,
+    max_retries: int = 2,
+) -> EndpointPool:
+    """Get the pool shared by all backends with the same endpoints.
+
+    Sharing the pool makes the load and health tracking cover all requests
+    sent to the endpoints in the process.
+    """
+    key = canonical_hash(
+        {
+            "endpoints": endpoints,
+            "config": config,
+            "api_key": api_key,
+            "base_url": base_url,
+            "max_retries": max_retries,
+        }
+    )
+    if (pool := _endpoint_pools.get(key)) is None:
+        pool = _endpoint_pools[key] = EndpointPool.from_config(
+            endpoints,
+            config,
+            api_key=api_key,
+            base_url=base_url,
+            max_retries=max_retries,
+        )
+    return pool
@@ -0,0 +1,255 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+import hashlib
+import json
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Any, Generic, TypeVar, overload
+
+from pydantic_core import to_jsonable_python
+
+T = TypeVar("T")
+D = TypeVar("D")
+
+SECRET_KEYS = frozenset({"api_key"})
+"""The config keys holding secrets."""
+
+REINDEX_WRITES = 64
+"""The number of writes after which a size limited disk cache re-indexes its
+directory."""
+
+
+@dataclass(kw_only=True)
+class CacheStats:
+    """Hit and miss counters of a cache."""
+
+    hits: int = 0
+    """The number of lookups served from the cache."""
+    misses: int = 0
+    """The number of lookups not found in the cache."""
+
+    @property
+    def requests(self) -> int:
+        """The total number of lookups."""
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        """The ratio of lookups served from the cache."""
+        return self.hits / self.requests if self.requests else 0.0
+
+
+def canonical_json(value: Any) -> str:
+    """Dump a value to json with sorted keys and no insignificant whitespace."""
+    return json.dumps(
+        to_jsonable_python(value, fallback=str),
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+
+
+def canonical_hash(value: Any) -> str:
+    """Hash a value by its canonical json representation."""
+    return hashlib.sha256(canonical_json(value).encode("utf-8")).hexdigest()
+
+
+def without_secrets(value: Any) -> Any:
+    """Remove the secrets, e.g. api keys, from dumped config data."""
+    if isinstance(value, dict):
+        return {k: without_secrets(v) for k, v in value.items() if k not in SECRET_KEYS}
+    elif isinstance(value, list):
+        return [without_secrets(v) for v in value]
+    return value
+
+
+class MemoryCache(Generic[T]):
+    """In-memory LRU cache with optional time-to-live."""
+
+    def __init__(
+        self, max_entries: int | None = None, ttl: float | None = None
+    ) -> None:
+        self.max_entries: int | None = max_entries
+        """The maximum number of entries kept, least recently used evicted first."""
+        self.ttl: float | None = ttl
+        """The time-to-live of entries in seconds."""
+
+        self.stats = CacheStats()
+        """The hit and miss counters of the cache."""
+
+        self._data: OrderedDict[str, tuple[float | None, T]] = OrderedDict()
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}("
+            f"max_entries={self.max_entries}, ttl={self.ttl}, size={len(self)}"
+            ")"
+        )
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @overload
+    def get(self, key: str) -> T | None: ...
+
+    @overload
+    def get(self, key: str, default: D) -> T | D: ...
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a cached value, or default if missing or expired."""
+        entry = self._data.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at is None or expires_at > time.monotonic():
+                self._data.move_to_end(key)
+                self.stats.hits += 1
+                return value
+            del self._data[key]
+        self.stats.misses += 1
+        return default
+
+    def set(self, key: str, value: T) -> None:
+        """Cache a value, evicting the least recently used entries if full."""
+        expires_at = None if self.ttl is None else time.monotonic() + self.ttl
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        if self.max_entries is not None:
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all cached values."""
+        self._data.clear()
+
+
+class DiskCache:
+    """Json file store with optional time-to-live and size based eviction.
+
+    Values must be json serializable. Each entry is stored in its own file
+    so that entries can be shared between processes. The methods do blocking
+    file I/O, run them in a thread from async code.
+    """
+
+    def __init__(
+        self, path: Path, *, ttl: float | None = None, max_size: int | None = None
+    ) -> None:
+        self.path: Path = path
+        """The directory to store cache files in."""
+        self.ttl: float | None = ttl
+        """The time-to-live of entries in seconds."""
+        self.max_size: int | None = max_size
+        """The maximum total size of cache files in bytes."""
+
+        self.stats = CacheStats()
+        """The hit and miss counters of the cache."""
+
+        # entry sizes ordered from least to most recently used
+        self._sizes: OrderedDict[str, int] = OrderedDict()
+        self._total_size: int = 0
+        # writes since the directory was last indexed
+        self._writes: int = 0
+        # the methods run in threads of the event loop
+        self._lock = threading.Lock()
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._load_index()
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}("
+            f"path={str(self.path)!r}, ttl={self.ttl}, max_size={self.max_size}, "
+            f"size={self._total_size}"
+            ")"
+        )
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    def _load_index(self) -> None:
+        """Index the files in the directory, including those of other processes."""
+        self._sizes.clear()
+        self._total_size = 0
+        self._writes = 0
+        entries: list[tuple[float, str, int]] = []
+        for file in self.path.glob("*/*.json"):
+            try:
+                stat = file.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, file.stem, stat.st_size))
+        for _, key, size in sorted(entries):
+            self._sizes[key] = size
+            self._total_size += size
+
+    def _file(self, key: str) -> Path:
+        return self.path / key[:2] / f"{key}.json"
+
+    def _forget(self, key: str) -> None:
+        self._total_size -= self._sizes.pop(key, 0)
+        self._file(key).unlink(missing_ok=True)
+
+    @overload
+    def get(self, key: str) -> Any | None: ...
+
+    @overload
+    def get(self, key: str, default: D) -> Any | D: ...
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a cached value, or default if missing or expired."""
+        with self._lock:
+            file = self._file(key)
+            try:
+                entry = json.loads(file.read_bytes())
+            except (FileNotFoundError, ValueError):
+                self.stats.misses += 1
+                return default
+
+            expires_at: float | None = entry.get("expires_at")
+            if expires_at is not None and expires_at <= time.time():
+                self._forget(key)
+                self.stats.misses += 1
+                return default
+
+            # mark as recently used, also for other processes sharing the store
+            if key in self._sizes:
+                self._sizes.move_to_end(key)
+            try:
+                os.utime(file)
+            except FileNotFoundError:
+                # evicted by another process after reading
+                self._total_size -= self._sizes.pop(key, 0)
+            self.stats.hits += 1
+            return entry["value"]
+
+    def set(self, key: str, value: Any) -> None:
+        """Cache a value, evicting the least recently used files if too large."""
+        with self._lock:
+            expires_at = None if self.ttl is None else time.time() + self.ttl
+            data = json.dumps(
+                {"expires_at": expires_at, "value": value}, ensure_ascii=False
+            ).encode("utf-8")
+
+            file = self._file(key)
+            file.parent.mkdir(exist_ok=True)
+            # write atomically so that concurrent readers never see partial files
+            tmp_file = file.with_suffix(f".{os.getpid()}.tmp")
+            tmp_file.write_bytes(data)
+            tmp_file.replace(file)
+
+            self._total_size += len(data) - self._sizes.pop(key, 0)
+            self._sizes[key] = len(data)
+            self._writes += 1
+            if self.max_size is not None:
+                # other processes sharing the store write files this index misses
+                if self._total_size > self.max_size or self._writes >= REINDEX_WRITES:
+                    self._load_index()
+                while self._total_size > self.max_size and len(self._sizes) > 1:
+                    self._forget(next(iter(self._sizes)))
+
+    def clear(self) -> None:
+        """Remove all cached files."""
+        with self._lock:
+            for key in list(self._sizes):
+                self._forget(key)
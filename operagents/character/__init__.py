@@ -1,4 +1,4 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 from typing_extensions import Self
 
 from operagents import prop
@@ -27,6 +27,14 @@ class Character:
         """The name of the agent that acts as the character."""
         self.props: list["Prop"] = props or []
         """The props the character has."""
+        self.props_by_name: dict[str, "Prop"] = {prop.name: prop for prop in self.props}
+        """The props the character has, indexed by name."""
+        # compile the tools at load time instead of on every act
+        self.tools: list[dict[str, Any]] = [
+            {"type": "function", "function": prop.tool_definition}
+            for prop in self.props
+        ]
+        """The tool calling definitions of the props the character has."""
 
     def __repr__(self) -> str:
         return (
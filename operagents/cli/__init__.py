@@ -2,14 +2,24 @@ import argparse
 import asyncio
 from pathlib import Path
 import sys
-from typing import Literal
+from typing import Any, Literal, get_args
 
-from pydantic import ValidationError
+from pydantic import BaseModel, ValidationError
 import yaml
 
-from operagents.config import OperagentsConfig
+from operagents.backend.cassette import close_cassettes
+from operagents.backend.mock import MockResponder
+from operagents.backend.mock_server import MockServer
+from operagents.config import (
+    BackendConfig,
+    CassetteBackendConfig,
+    MockConfig,
+    OperagentsConfig,
+    TracingConfig,
+)
 from operagents.log import logger, setup_logging
 from operagents.opera import Opera
+from operagents.prop.executor import shutdown_executors
 from operagents.utils import save_opera_state
 from operagents.version import VERSION
 
@@ -19,14 +29,49 @@ parser.add_argument("--version", "-V", action="version", version=VERSION)
 subcommands = parser.add_subparsers(title="Commands")
 
 
-async def handle_run(
+_backend_config_types = get_args(get_args(BackendConfig)[0])
+
+
+def _wrap_backends(
+    value: Any, mode: Literal["record", "replay"], cassette: str, on_mismatch: str
+) -> Any:
+    """Wrap all top level backends in the config with the cassette backend."""
+    if isinstance(value, _backend_config_types):
+        return CassetteBackendConfig.model_validate(
+            {
+                "type": "cassette",
+                "backend": value,
+                "path": cassette,
+                "mode": mode,
+                "on_mismatch": on_mismatch,
+            }
+        )
+    elif isinstance(value, BaseModel):
+        return value.model_copy(
+            update={
+                name: _wrap_backends(getattr(value, name), mode, cassette, on_mismatch)
+                for name in type(value).model_fields
+            }
+        )
+    elif isinstance(value, list):
+        return [_wrap_backends(v, mode, cassette, on_mismatch) for v in value]
+    elif isinstance(value, dict):
+        return {
+            k: _wrap_backends(v, mode, cassette, on_mismatch) for k, v in value.items()
+        }
+    return value
+
+
+async def _run_opera(
     config: str,
     path: bool = True,
-    log_level: Literal["DEBUG", "INFO"] = "INFO",
     export: str | None = None,
+    cassette: str | None = None,
+    mode: Literal["record", "replay"] = "record",
+    on_mismatch: str = "error",
+    trace: str | None = None,
+    trace_format: Literal["chrome", "otlp"] = "chrome",
 ):
-    setup_logging(log_level)
-
     if path:
         sys_path = str(Path.cwd().resolve())
         if sys_path not in sys.path:
@@ -34,21 +79,49 @@ async def handle_run(
 
     logger.info("Loading opera config...", path=config)
     try:
-        opera = Opera.from_config(
-            OperagentsConfig.model_validate(
-                yaml.safe_load(Path(config).read_text(encoding="utf-8"))
-            )
+        opera_config = OperagentsConfig.model_validate(
+            yaml.safe_load(Path(config).read_text(encoding="utf-8"))
         )
+        if cassette is not None:
+            opera_config = _wrap_backends(opera_config, mode, cassette, on_mismatch)
+        if trace is not None:
+            opera_config.tracing = TracingConfig(path=trace, format=trace_format)
+        opera = Opera.from_config(opera_config)
     except Exception:
         logger.exception("Failed to load opera config.", path=config)
         return
 
-    result = await opera.run()
+    try:
+        result = await opera.run()
+    finally:
+        close_cassettes()
+        await asyncio.to_thread(shutdown_executors)
 
     if export is not None:
         save_opera_state(result, Path(export))
 
 
+async def handle_run(
+    config: str,
+    path: bool = True,
+    log_level: Literal["DEBUG", "INFO"] = "INFO",
+    export: str | None = None,
+    record: str | None = None,
+    trace: str | None = None,
+    trace_format: Literal["chrome", "otlp"] = "chrome",
+):
+    setup_logging(log_level)
+
+    await _run_opera(
+        config,
+        path=path,
+        export=export,
+        cassette=record,
+        trace=trace,
+        trace_format=trace_format,
+    )
+
+
 run = subcommands.add_parser(
     "run", help="Run the opera.", formatter_class=argparse.ArgumentDefaultsHelpFormatter
 )
@@ -64,10 +137,70 @@ run.add_argument(
 run.add_argument(
     "--export", default=None, help="Export the opera run result to a JSON file."
 )
+run.add_argument(
+    "--record", default=None, help="Record the backend interactions to a cassette."
+)
+run.add_argument(
+    "--trace", default=None, help="Export the latency trace of the run to a file."
+)
+run.add_argument(
+    "--trace-format",
+    default="chrome",
+    choices=["chrome", "otlp"],
+    help="The format of the trace file.",
+)
 run.add_argument("config", help="The path to the operagents configuration file.")
 run.set_defaults(handler=handle_run)
 
 
+async def handle_replay(
+    cassette: str,
+    config: str,
+    path: bool = True,
+    log_level: Literal["DEBUG", "INFO"] = "INFO",
+    export: str | None = None,
+    on_mismatch: Literal["error", "passthrough"] = "error",
+):
+    setup_logging(log_level)
+
+    await _run_opera(
+        config,
+        path=path,
+        export=export,
+        cassette=cassette,
+        mode="replay",
+        on_mismatch=on_mismatch,
+    )
+
+
+replay = subcommands.add_parser(
+    "replay",
+    help="Run the opera with the backend interactions replayed from a cassette.",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+)
+replay.add_argument(
+    "--path",
+    default=True,
+    action=argparse.BooleanOptionalAction,
+    help="Add current path to sys.path.",
+)
+replay.add_argument(
+    "--log-level", default="INFO", choices=["DEBUG", "INFO"], help="The log level."
+)
+replay.add_argument(
+    "--export", default=None, help="Export the opera run result to a JSON file."
+)
+replay.add_argument(
+    "--on-mismatch",
+    default="error",
+    choices=["error", "passthrough"],
+    help="Whether to fail or call the real backend on unrecorded requests.",
+)
+replay.add_argument("cassette", help="The path to the recorded cassette file.")
+replay.add_argument("config", help="The path to the operagents configuration file.")
+replay.set_defaults(handler=handle_replay)
+
+
 async def handle_validate(
     config: str, path: bool = True, log_level: Literal["DEBUG", "INFO"] = "INFO"
 ):
@@ -116,6 +249,49 @@ validate.add_argument("config", help="The path to the operagents configuration f
 validate.set_defaults(handler=handle_validate)
 
 
+async def handle_mock_server(
+    config: str | None = None,
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    log_level: Literal["DEBUG", "INFO"] = "INFO",
+):
+    setup_logging(log_level)
+
+    try:
+        mock_config = MockConfig.model_validate(
+            yaml.safe_load(
+                await asyncio.to_thread(Path(config).read_text, encoding="utf-8")
+            )
+            or {}
+            if config is not None
+            else {}
+        )
+    except ValidationError as e:
+        logger.error(f"Mock config file is invalid.\n{e}")
+        exit(1)
+
+    server = MockServer(MockResponder(mock_config), host=host, port=port)
+    await server.serve_forever()
+
+
+mock_server = subcommands.add_parser(
+    "mock-server",
+    help="Serve an OpenAI compatible mock chat completions API.",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+)
+mock_server.add_argument("--host", default="127.0.0.1", help="The host to listen on.")
+mock_server.add_argument(
+    "--port", default=8000, type=int, help="The port to listen on."
+)
+mock_server.add_argument(
+    "--log-level", default="INFO", choices=["DEBUG", "INFO"], help="The log level."
+)
+mock_server.add_argument(
+    "config", nargs="?", default=None, help="The path to the mock configuration file."
+)
+mock_server.set_defaults(handler=handle_mock_server)
+
+
 def main():
     args = parser.parse_args()
     args = vars(args)
@@ -1,4 +1,4 @@
-from typing import Annotated, Literal, TypeAlias
+from typing import Annotated, Any, Literal, TypeAlias
 from typing_extensions import Self
 
 from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
@@ -7,7 +7,12 @@ from .const import (
     AGENT_SESSION_SUMMARY_SYSTEM_TEMPLATE,
     AGENT_SESSION_SUMMARY_USER_TEMPLATE,
     FUNCTION_PROP_EXCEPTION_TEMPLATE,
+    JOINT_DIRECTOR_SYSTEM_TEMPLATE,
+    JOINT_DIRECTOR_USER_TEMPLATE,
+    MOCK_BACKEND_REPLY_TEMPLATE,
+    OPENAI_BACKEND_PROP_TIMEOUT_TEMPLATE,
     OPENAI_BACKEND_PROP_VALIDATION_ERROR_TEMPLATE,
+    PROP_RESULT_TRUNCATED_TEMPLATE,
 )
 
 
@@ -38,6 +43,36 @@ OpenaiBackendToolChoiceConfig: TypeAlias = Annotated[
 ]
 
 
+class ResponseCacheConfig(BaseModel):
+    path: str | None = ".operagents/cache"
+    max_entries: int = 1024
+    ttl: float | None = None
+    max_size: int | None = None
+
+
+class OpenaiEndpointConfig(BaseModel):
+    base_url: str | None = None
+    api_key: str | None = None
+    weight: float = 1.0
+
+
+class OpenaiEndpointPoolConfig(BaseModel):
+    strategy: Literal["least_outstanding", "latency_weighted"] = "least_outstanding"
+    window: int = 20
+    min_requests: int = 5
+    failure_threshold: float = 0.5
+    cooldown: float = 30.0
+    latency_decay: float = 0.2
+
+
+class OpenaiHedgeConfig(BaseModel):
+    percentile: float = 0.95
+    initial_delay: float | None = None
+    min_samples: int = 20
+    window: int = 1000
+    budget: float = 0.1
+
+
 class OpenaiBackendConfig(BaseModel):
     model_config = ConfigDict(populate_by_name=True)
 
@@ -54,6 +89,14 @@ class OpenaiBackendConfig(BaseModel):
     prop_validation_error_template: TemplateConfig = (
         OPENAI_BACKEND_PROP_VALIDATION_ERROR_TEMPLATE
     )
+    prop_timeout: float | None = None
+    prop_timeout_template: TemplateConfig = OPENAI_BACKEND_PROP_TIMEOUT_TEMPLATE
+    max_concurrent_props: int | None = None
+    max_prop_rounds: int | None = None
+    cache: ResponseCacheConfig | None = None
+    endpoints: list[OpenaiEndpointConfig] = Field(default_factory=list)
+    pool: OpenaiEndpointPoolConfig = OpenaiEndpointPoolConfig()
+    hedge: OpenaiHedgeConfig | None = None
 
 
 class UserBackendConfig(BaseModel):
@@ -62,6 +105,36 @@ class UserBackendConfig(BaseModel):
     type_: Literal["user"] = Field(alias="type")
 
 
+class MockLatencyConfig(BaseModel):
+    distribution: Literal["constant", "uniform", "normal", "lognormal"] = "constant"
+    mean: float = 0
+    std: float = 0
+    min: float = 0
+    max: float | None = None
+
+
+class MockToolCallConfig(BaseModel):
+    prop: str
+    arguments: dict[str, Any] | str = Field(default_factory=dict)
+
+
+class MockConfig(BaseModel):
+    replies: list[str] = Field(default_factory=list)
+    reply_template: TemplateConfig = MOCK_BACKEND_REPLY_TEMPLATE
+    tool_call_rounds: list[list[MockToolCallConfig]] = Field(default_factory=list)
+    latency: MockLatencyConfig = MockLatencyConfig()
+    tokens_per_second: float | None = None
+    error_rate: float = 0
+    rate_limit_rate: float = 0
+    seed: int | None = None
+
+
+class MockBackendConfig(MockConfig):
+    model_config = ConfigDict(populate_by_name=True)
+
+    type_: Literal["mock"] = Field(alias="type")
+
+
 class CustomBackendConfig(BaseModel):
     model_config = ConfigDict(extra="allow", populate_by_name=True)
 
@@ -69,11 +142,75 @@ class CustomBackendConfig(BaseModel):
     path: str
 
 
+class CacheBackendConfig(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    type_: Literal["cache"] = Field(alias="type")
+    backend: "BackendConfig"
+    cache: ResponseCacheConfig = ResponseCacheConfig()
+
+
+class CoalesceBackendConfig(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    type_: Literal["coalesce"] = Field(alias="type")
+    backend: "BackendConfig"
+    deterministic_only: bool = True
+
+
+class CassetteBackendConfig(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    type_: Literal["cassette"] = Field(alias="type")
+    backend: "BackendConfig | None" = None
+    path: str
+    mode: Literal["record", "replay"] = "replay"
+    on_mismatch: Literal["error", "passthrough"] = "error"
+
+    @model_validator(mode="after")
+    def check_backend(self) -> Self:
+        if self.backend is None and (
+            self.mode == "record" or self.on_mismatch == "passthrough"
+        ):
+            raise ValueError(
+                "Cassette backend requires backend to record or pass through"
+            )
+        return self
+
+
+class CascadeBackendConfig(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    type_: Literal["cascade"] = Field(alias="type")
+    backends: list["BackendConfig"]
+    require_json: bool = False
+    pattern: str | None = None
+
+    @field_validator("backends")
+    @classmethod
+    def check_backends(cls, backends: list[Any]) -> list[Any]:
+        if not backends:
+            raise ValueError("Cascade backend requires at least one backend")
+        return backends
+
+
 BackendConfig: TypeAlias = Annotated[
-    OpenaiBackendConfig | UserBackendConfig | CustomBackendConfig,
+    OpenaiBackendConfig
+    | UserBackendConfig
+    | MockBackendConfig
+    | CacheBackendConfig
+    | CoalesceBackendConfig
+    | CassetteBackendConfig
+    | CascadeBackendConfig
+    | CustomBackendConfig,
     Field(discriminator="type_"),
 ]
 
+CacheBackendConfig.model_rebuild()
+CoalesceBackendConfig.model_rebuild()
+CassetteBackendConfig.model_rebuild()
+CascadeBackendConfig.model_rebuild()
+
 
 class AgentConfig(BaseModel):
     backend: BackendConfig
@@ -113,12 +250,42 @@ ScenePrepareConfig = Annotated[
 ]
 
 
+class PropCacheConfig(BaseModel):
+    max_entries: int | None = 128
+    ttl: float | None = None
+    shared: bool = False
+
+
+class PropResultLimitConfig(BaseModel):
+    max_chars: int | None = None
+    max_tokens: int | None = None
+    chars_per_token: float = 4
+    strategy: Literal["truncate", "head_tail", "function"] = "truncate"
+    function: str | None = None
+    spill_path: str | None = None
+    truncated_template: TemplateConfig = PROP_RESULT_TRUNCATED_TEMPLATE
+
+    @model_validator(mode="after")
+    def check_limit(self) -> Self:
+        if self.max_chars is None and self.max_tokens is None:
+            raise ValueError("Prop result limit requires max_chars or max_tokens")
+        if self.strategy == "function" and self.function is None:
+            raise ValueError("Prop result limit function strategy requires function")
+        return self
+
+
 class FunctionPropConfig(BaseModel):
     model_config = ConfigDict(populate_by_name=True)
 
     type_: Literal["function"] = Field(alias="type")
     function: str
     exception_template: TemplateConfig = FUNCTION_PROP_EXCEPTION_TEMPLATE
+    timeout: float | None = None
+    max_concurrency: int | None = None
+    execution: Literal["loop", "thread", "process"] = "loop"
+    max_workers: int | None = None
+    cache: PropCacheConfig | None = None
+    result_limit: PropResultLimitConfig | None = None
 
 
 class CustomPropConfig(BaseModel):
@@ -139,11 +306,25 @@ class CharacterConfig(BaseModel):
     props: list[PropConfig] = Field(default_factory=list)
 
 
+class OrderFlowSlotConfig(BaseModel):
+    character: str
+    weight: int = 1
+    every: int = 1
+
+    @field_validator("weight", "every")
+    @classmethod
+    def check_positive(cls, value: int) -> int:
+        if value < 1:
+            raise ValueError("Order flow slot weight and every must be positive")
+        return value
+
+
 class OrderFlowConfig(BaseModel):
     model_config = ConfigDict(populate_by_name=True)
 
     type_: Literal["order"] = Field(alias="type")
-    order: list[str] | None = None
+    order: list[str | OrderFlowSlotConfig] | None = None
+    skip: str | None = None
 
 
 class ModelFlowConfig(BaseModel):
@@ -158,6 +339,35 @@ class ModelFlowConfig(BaseModel):
     fallback_character: str | None = None
 
 
+class EmbeddingFlowConfig(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    type_: Literal["embedding"] = Field(alias="type")
+    embedder: str | None = None
+    dimensions: int = 512
+    window: int = 3
+    allowed_characters: list[str] | None = None
+    begin_character: str | None = None
+    repeat_penalty: float = 1.0
+    mention_bonus: float = 0.5
+    tie_margin: float = 0.0
+    fallback: ModelFlowConfig | None = None
+
+
+class ParallelFlowConfig(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    type_: Literal["parallel"] = Field(alias="type")
+    groups: list[list[str]] | None = None
+
+    @field_validator("groups")
+    @classmethod
+    def check_groups(cls, groups: list[list[str]] | None) -> list[list[str]] | None:
+        if groups is not None and (not groups or not all(groups)):
+            raise ValueError("Parallel flow requires non-empty groups")
+        return groups
+
+
 class UserFlowConfig(BaseModel):
     model_config = ConfigDict(populate_by_name=True)
 
@@ -172,7 +382,12 @@ class CustomFlowConfig(BaseModel):
 
 
 FlowConfig: TypeAlias = Annotated[
-    OrderFlowConfig | ModelFlowConfig | UserFlowConfig | CustomFlowConfig,
+    OrderFlowConfig
+    | ModelFlowConfig
+    | EmbeddingFlowConfig
+    | ParallelFlowConfig
+    | UserFlowConfig
+    | CustomFlowConfig,
     Field(discriminator="type_"),
 ]
 
@@ -186,6 +401,21 @@ class ModelDirectorConfig(BaseModel):
     user_template: TemplateConfig
     allowed_scenes: list[str] | None = None
     finish_flag: str | None = None
+    min_acts: int | None = None
+    every_n_acts: int | None = None
+    after_characters: list[str] | None = None
+    predicate: str | None = None
+
+
+class JointDirectorConfig(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    type_: Literal["joint"] = Field(alias="type")
+    backend: BackendConfig
+    system_template: TemplateConfig = JOINT_DIRECTOR_SYSTEM_TEMPLATE
+    user_template: TemplateConfig = JOINT_DIRECTOR_USER_TEMPLATE
+    allowed_scenes: list[str] | None = None
+    allowed_characters: list[str] | None = None
 
 
 class UserDirectorConfig(BaseModel):
@@ -201,6 +431,32 @@ class NeverDirectorConfig(BaseModel):
     max_act_num: int | None = None
 
 
+class DirectorRuleConfig(BaseModel):
+    scene: str | None = None
+    finish: bool = False
+    min_acts: int | None = None
+    characters: list[str] | None = None
+    keywords: list[str] = Field(default_factory=list)
+    ignore_case: bool = False
+    pattern: str | None = None
+    props: list[str] = Field(default_factory=list)
+    window: int = 1
+    predicate: str | None = None
+
+    @model_validator(mode="after")
+    def check_target(self) -> Self:
+        if (self.scene is not None) == self.finish:
+            raise ValueError("Director rule must have either a scene or finish")
+        return self
+
+
+class RuleDirectorConfig(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    type_: Literal["rule"] = Field(alias="type")
+    rules: list[DirectorRuleConfig]
+
+
 class CustomDirectorConfig(BaseModel):
     model_config = ConfigDict(extra="allow", populate_by_name=True)
 
@@ -210,8 +466,10 @@ class CustomDirectorConfig(BaseModel):
 
 DirectorConfig: TypeAlias = Annotated[
     ModelDirectorConfig
+    | JointDirectorConfig
     | UserDirectorConfig
     | NeverDirectorConfig
+    | RuleDirectorConfig
     | CustomDirectorConfig,
     Field(discriminator="type_"),
 ]
@@ -238,7 +496,10 @@ class SceneConfig(BaseModel):
     @model_validator(mode="after")
     def check_order_flow(self) -> Self:
         if isinstance(self.flow, OrderFlowConfig) and self.flow.order is not None:
-            if set(self.flow.order) - set(self.characters):
+            if {
+                slot if isinstance(slot, str) else slot.character
+                for slot in self.flow.order
+            } - set(self.characters):
                 raise ValueError("Order flow order must be subset of scene characters")
         return self
 
@@ -267,12 +528,98 @@ class SceneConfig(BaseModel):
                 )
         return self
 
+    @model_validator(mode="after")
+    def check_embedding_flow(self) -> Self:
+        if isinstance(self.flow, EmbeddingFlowConfig):
+            if self.flow.allowed_characters is not None and (
+                set(self.flow.allowed_characters) - set(self.characters)
+            ):
+                raise ValueError(
+                    "Embedding flow allowed characters must be subset of "
+                    "scene characters"
+                )
+            if (
+                self.flow.begin_character is not None
+                and self.flow.begin_character not in self.characters
+            ):
+                raise ValueError(
+                    "Embedding flow begin character must be in scene characters"
+                )
+        return self
+
+    @model_validator(mode="after")
+    def check_parallel_flow(self) -> Self:
+        if isinstance(self.flow, ParallelFlowConfig) and self.flow.groups is not None:
+            if not self.flow.groups or not all(self.flow.groups):
+                raise ValueError("Parallel flow groups must not be empty")
+            if {c for group in self.flow.groups for c in group} - set(self.characters):
+                raise ValueError(
+                    "Parallel flow groups must be subset of scene characters"
+                )
+        return self
+
+    @model_validator(mode="after")
+    def check_model_director(self) -> Self:
+        if (
+            isinstance(self.director, ModelDirectorConfig)
+            and self.director.after_characters is not None
+            and set(self.director.after_characters) - set(self.characters)
+        ):
+            raise ValueError(
+                "Model director after characters must be subset of scene characters"
+            )
+        return self
+
+    @model_validator(mode="after")
+    def check_joint_director(self) -> Self:
+        if (
+            isinstance(self.director, JointDirectorConfig)
+            and self.director.allowed_characters is not None
+            and set(self.director.allowed_characters) - set(self.characters)
+        ):
+            raise ValueError(
+                "Joint director allowed characters must be subset of scene characters"
+            )
+        return self
+
+    @model_validator(mode="after")
+    def check_rule_director(self) -> Self:
+        if isinstance(self.director, RuleDirectorConfig):
+            for rule in self.director.rules:
+                if rule.characters is not None and (
+                    set(rule.characters) - set(self.characters)
+                ):
+                    raise ValueError(
+                        "Rule director characters must be subset of scene characters"
+                    )
+        return self
+
 
 class SummaryHookConfig(BaseModel):
     model_config = ConfigDict(populate_by_name=True)
 
     type_: Literal["summary"] = Field(alias="type")
     agent_names: list[str] | None = None
+    share: bool = False
+    lazy: bool = False
+    prefetch: bool = False
+
+
+class MetricsHookConfig(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    type_: Literal["metrics"] = Field(alias="type")
+    host: str = "127.0.0.1"
+    port: int | None = None
+    path: str | None = None
+    interval: float = 10.0
+    buckets: list[float] | None = None
+
+    @model_validator(mode="after")
+    def check_exposition(self) -> Self:
+        if self.port is None and self.path is None:
+            raise ValueError("Metrics hook requires a port or a path")
+        return self
 
 
 class CustomHookConfig(BaseModel):
@@ -283,10 +630,35 @@ class CustomHookConfig(BaseModel):
 
 
 HookConfig: TypeAlias = Annotated[
-    SummaryHookConfig | CustomHookConfig, Field(discriminator="type_")
+    SummaryHookConfig | MetricsHookConfig | CustomHookConfig,
+    Field(discriminator="type_"),
 ]
 
 
+class UsagePriceConfig(BaseModel):
+    prompt: float = 0.0
+    completion: float = 0.0
+    cached: float | None = None
+
+
+class UsageBudgetConfig(BaseModel):
+    max_requests: int | None = None
+    max_prompt_tokens: int | None = None
+    max_completion_tokens: int | None = None
+    max_total_tokens: int | None = None
+    max_cost: float | None = None
+
+
+class UsageConfig(BaseModel):
+    prices: dict[str, UsagePriceConfig] = Field(default_factory=dict)
+    budget: UsageBudgetConfig | None = None
+
+
+class TracingConfig(BaseModel):
+    path: str = ".operagents/trace.json"
+    format: Literal["chrome", "otlp"] = "chrome"
+
+
 class OperagentsConfig(BaseModel):
     agents: dict[str, AgentConfig]
     scenes: dict[str, SceneConfig]
@@ -294,6 +666,8 @@ class OperagentsConfig(BaseModel):
     hooks: list[HookConfig] = Field(
         default_factory=lambda: [SummaryHookConfig(type="summary")]
     )
+    usage: UsageConfig = UsageConfig()
+    tracing: TracingConfig | None = None
 
     @field_validator("agents")
     @classmethod
@@ -313,7 +687,7 @@ class OperagentsConfig(BaseModel):
     def check_scene_directors(self) -> Self:
         for scene_name, scene in self.scenes.items():
             if (
-                isinstance(scene.director, ModelDirectorConfig)
+                isinstance(scene.director, ModelDirectorConfig | JointDirectorConfig)
                 and scene.director.allowed_scenes is not None
             ):
                 if set(scene.director.allowed_scenes) - set(self.scenes):
@@ -321,6 +695,13 @@ class OperagentsConfig(BaseModel):
                         f"Scene {scene_name} director allowed scenes "
                         "must be subset of scenes"
                     )
+            if isinstance(scene.director, RuleDirectorConfig):
+                for rule in scene.director.rules:
+                    if rule.scene is not None and rule.scene not in self.scenes:
+                        raise ValueError(
+                            f"Scene {scene_name} director rule scene "
+                            f"{rule.scene} not found in scenes"
+                        )
         return self
 
     @model_validator(mode="after")
@@ -10,6 +10,13 @@ Error message: {{ err["msg"] }}
 {%- endfor %}
 Recall the function correctly, fix the errors.
 """.strip()
+OPENAI_BACKEND_PROP_TIMEOUT_TEMPLATE = """
+Function call timed out after {{ timeout }} seconds.
+""".strip()
+
+MOCK_BACKEND_REPLY_TEMPLATE = """
+Mock response {{ index }}.
+""".strip()
 
 # agent config
 
@@ -32,9 +39,40 @@ AGENT_SESSION_SUMMARY_USER_TEMPLATE = """
 {%- endfor %}
 """.strip()
 
+AGENT_SHARED_SESSION_SUMMARY_SYSTEM_TEMPLATE = """
+Your task is to summarize the historical dialogue records according to the current scene, and summarize the most important information.
+""".strip()
+AGENT_SHARED_SESSION_SUMMARY_USER_TEMPLATE = """
+{% for event in timeline.session_acts(session_id) -%}
+{{ event.character.agent_name }}({{ event.character.name }}): {{ event.content }}
+{% endfor %}
+""".strip()
+
+# director config
+
+JOINT_DIRECTOR_SYSTEM_TEMPLATE = """
+You are the director of an opera. The current scene is {{ timeline.current_scene.name }}.
+{% if timeline.current_scene.description -%}
+{{ timeline.current_scene.description }}
+{% endif -%}
+After each line of the dialogue, decide whether to finish the opera, whether to switch to another scene, and which character speaks next in the current scene.
+Scenes to switch to: {{ scenes | join(", ") }}.
+Characters to speak next: {{ characters | join(", ") }}.
+Answer with a JSON object like {"finish": false, "scene": null, "character": "{{ characters | first }}"}. Set "scene" to a scene name to switch scene, or "finish" to true to end the opera.
+""".strip()
+JOINT_DIRECTOR_USER_TEMPLATE = """
+{% for event in timeline.current_acts -%}
+{{ event.character.name }}: {{ event.content }}
+{% endfor %}
+""".strip()
+
 # prop config
 
 FUNCTION_PROP_EXCEPTION_TEMPLATE = """
 Function returned an error:
 {{ exc.__class__.__name__ }}: {{ exc }}
 """.strip()
+PROP_RESULT_TRUNCATED_TEMPLATE = """
+{{ result }}
+[Result shortened from {% if not complete %}more than {% endif %}{{ length }} characters.{% if result_id %} Full result id: {{ result_id }}.{% endif %}]
+""".strip()
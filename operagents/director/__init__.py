@@ -1,9 +1,13 @@
 from operagents.config import DirectorConfig
 from operagents.utils import get_all_subclasses, resolve_dot_notation
 
+from ._base import Decision as Decision
 from ._base import Director as Director
+from .joint import JointDirector as JointDirector
 from .model import ModelDirector as ModelDirector
 from .never import NeverDirector as NeverDirector
+from .rule import DirectorRule as DirectorRule
+from .rule import RuleDirector as RuleDirector
 from .user import UserDirector as UserDirector
 
 all_director_types: dict[str, type[Director]] = {
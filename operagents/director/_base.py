@@ -1,14 +1,26 @@
 import abc
+from dataclasses import dataclass
 from typing import TYPE_CHECKING, ClassVar
 from typing_extensions import Self
 
 from operagents.config import DirectorConfig
 
 if TYPE_CHECKING:
+    from operagents.character import Character
     from operagents.scene import Scene
     from operagents.timeline import Timeline
 
 
+@dataclass(eq=False, kw_only=True)
+class Decision:
+    """The decision made after an act."""
+
+    scene: "Scene | None" = None
+    """The next scene, or None to continue the current scene."""
+    character: "Character | None" = None
+    """The next character in the current scene, or None to ask the flow."""
+
+
 class Director(abc.ABC):
     """A director for controlling the scene."""
 
@@ -25,3 +37,11 @@ class Director(abc.ABC):
     async def next_scene(self, timeline: "Timeline") -> "Scene | None":
         """Get the next scene."""
         raise NotImplementedError
+
+    async def decide(self, timeline: "Timeline") -> Decision:
+        """Decide the next scene and optionally the next character.
+
+        Directors able to choose the next character in the same step
+        can override this to save the flow decision.
+        """
+        return Decision(scene=await self.next_scene(timeline))
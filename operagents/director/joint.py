@@ -0,0 +1,150 @@
+import json
+from typing import TYPE_CHECKING, Any
+from typing_extensions import Self, override
+
+from operagents import backend
+from operagents.backend.cascade import is_json_object, response_validator
+from operagents.config import JointDirectorConfig, TemplateConfig
+from operagents.exception import OperaFinished
+from operagents.log import logger
+from operagents.tracing import span
+from operagents.utils import get_template_renderer
+
+from ._base import Decision, Director
+
+if TYPE_CHECKING:
+    from operagents.backend import Backend, Message
+    from operagents.scene import Scene
+    from operagents.timeline import Timeline
+
+
+class JointDirector(Director):
+    """A director choosing the next scene and the next character in one call.
+
+    The model answers a JSON object with `finish`, `scene` and `character`.
+    The flow of the scene is only asked when no valid character is answered.
+    """
+
+    type_ = "joint"
+
+    def __init__(
+        self,
+        backend: "Backend",
+        *,
+        system_template: TemplateConfig,
+        user_template: TemplateConfig,
+        allowed_scenes: list[str] | None = None,
+        allowed_characters: list[str] | None = None,
+    ):
+        self.backend: "Backend" = backend
+
+        self.system_template = system_template
+        self.user_template = user_template
+
+        self.allowed_scenes: list[str] | None = allowed_scenes
+        self.allowed_characters: list[str] | None = allowed_characters
+
+        self.system_renderer = get_template_renderer(self.system_template)
+        self.user_renderer = get_template_renderer(self.user_template)
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}("
+            f"backend={self.backend}, allowed_scenes={self.allowed_scenes!r}, "
+            f"allowed_characters={self.allowed_characters!r}"
+            ")"
+        )
+
+    @classmethod
+    @override
+    def from_config(  # pyright: ignore[reportIncompatibleMethodOverride]
+        cls, config: JointDirectorConfig
+    ) -> Self:
+        return cls(
+            backend=backend.from_config(config.backend),
+            system_template=config.system_template,
+            user_template=config.user_template,
+            allowed_scenes=config.allowed_scenes,
+            allowed_characters=config.allowed_characters,
+        )
+
+    def _parse(self, timeline: "Timeline", content: str) -> Decision:
+        try:
+            answer: Any = json.loads(content)
+        except ValueError:
+            answer = None
+        if not isinstance(answer, dict):
+            logger.warning(
+                "Joint director answered invalid JSON, continuing: {content}",
+                content=content,
+            )
+            return Decision()
+
+        if answer.get("finish") is True:
+            raise OperaFinished()
+
+        scene = answer.get("scene")
+        if (
+            isinstance(scene, str)
+            and scene != timeline.current_scene.name
+            and scene in self._scenes(timeline)
+        ):
+            return Decision(scene=timeline.opera.scenes[scene])
+
+        character = answer.get("character")
+        if isinstance(character, str) and character in self._characters(timeline):
+            return Decision(character=timeline.current_scene.characters[character])
+        return Decision()
+
+    def _scenes(self, timeline: "Timeline") -> list[str]:
+        return (
+            list(timeline.opera.scenes)
+            if self.allowed_scenes is None
+            else self.allowed_scenes
+        )
+
+    def _characters(self, timeline: "Timeline") -> list[str]:
+        return (
+            list(timeline.current_scene.characters)
+            if self.allowed_characters is None
+            else self.allowed_characters
+        )
+
+    @override
+    async def decide(self, timeline: "Timeline") -> Decision:
+        with span("director.render", "director"):
+            context = {
+                "agent": self,
+                "timeline": timeline,
+                "scenes": self._scenes(timeline),
+                "characters": self._characters(timeline),
+            }
+            system_message = (
+                await self.system_renderer.render_async(**context)
+            ).strip()
+            new_message = (await self.user_renderer.render_async(**context)).strip()
+        messages: list["Message"] = [
+            {
+                "role": "system",
+                "content": system_message,
+            },
+            {
+                "role": "user",
+                "content": new_message,
+            },
+        ]
+        logger.debug("Deciding next turn with messages: {messages}", messages=messages)
+        with (
+            span("backend.generate", "backend", component="director"),
+            response_validator(is_json_object),
+        ):
+            async for response in self.backend.generate(timeline, messages):
+                logger.debug("Director response: {response}", response=response.content)
+                return self._parse(timeline, response.content)
+
+        # This should never happen
+        raise RuntimeError("The backend did not return a response.")
+
+    @override
+    async def next_scene(self, timeline: "Timeline") -> "Scene | None":
+        return (await self.decide(timeline)).scene
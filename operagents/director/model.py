@@ -1,11 +1,14 @@
-from typing import TYPE_CHECKING
+from collections.abc import Callable
+import inspect
+from typing import TYPE_CHECKING, Any
 from typing_extensions import Self, override
 
 from operagents import backend
 from operagents.config import ModelDirectorConfig, TemplateConfig
 from operagents.exception import OperaFinished
 from operagents.log import logger
-from operagents.utils import get_template_renderer
+from operagents.tracing import span
+from operagents.utils import get_template_renderer, resolve_dot_notation
 
 from ._base import Director
 
@@ -26,6 +29,10 @@ class ModelDirector(Director):
         user_template: TemplateConfig,
         allowed_scenes: list[str] | None = None,
         finish_flag: str | None = None,
+        min_acts: int | None = None,
+        every_n_acts: int | None = None,
+        after_characters: list[str] | None = None,
+        predicate: "Callable[[Timeline], Any] | None" = None,
     ):
         self.backend: "Backend" = backend
 
@@ -35,6 +42,17 @@ class ModelDirector(Director):
         self.allowed_scenes: list[str] | None = allowed_scenes
         self.finish_flag: str | None = finish_flag
 
+        self.min_acts: int | None = min_acts
+        """The number of acts in the session before the first evaluation."""
+        self.every_n_acts: int | None = every_n_acts
+        """Evaluate every n acts since `min_acts`."""
+        self.after_characters: set[str] | None = (
+            set(after_characters) if after_characters is not None else None
+        )
+        """Evaluate only after one of the characters acted."""
+        self.predicate: "Callable[[Timeline], Any] | None" = predicate
+        """Evaluate only when the predicate returns true, may be sync or async."""
+
         self.system_renderer = get_template_renderer(self.system_template)
         self.user_renderer = get_template_renderer(self.user_template)
 
@@ -42,7 +60,9 @@ class ModelDirector(Director):
         return (
             f"{self.__class__.__name__}("
             f"backend={self.backend}, allowed_scenes={self.allowed_scenes!r}, "
-            f"finish_flag={self.finish_flag!r}"
+            f"finish_flag={self.finish_flag!r}, min_acts={self.min_acts!r}, "
+            f"every_n_acts={self.every_n_acts!r}, "
+            f"after_characters={self.after_characters!r}"
             ")"
         )
 
@@ -57,17 +77,50 @@ class ModelDirector(Director):
             user_template=config.user_template,
             allowed_scenes=config.allowed_scenes,
             finish_flag=config.finish_flag,
+            min_acts=config.min_acts,
+            every_n_acts=config.every_n_acts,
+            after_characters=config.after_characters,
+            predicate=(
+                resolve_dot_notation(config.predicate)
+                if config.predicate is not None
+                else None
+            ),
         )
 
+    async def should_evaluate(self, timeline: "Timeline") -> bool:
+        """Check the evaluation policy before calling the backend."""
+        if self.min_acts is not None or self.every_n_acts is not None:
+            act_num = timeline.current_act_num
+            since = act_num - (self.min_acts or 0)
+            if since < 0:
+                return False
+            if self.every_n_acts is not None and since % self.every_n_acts:
+                return False
+        if (
+            self.after_characters is not None
+            and timeline.current_character.name not in self.after_characters
+        ):
+            return False
+        if self.predicate is not None:
+            result = self.predicate(timeline)
+            if inspect.isawaitable(result):
+                result = await result
+            return bool(result)
+        return True
+
     @override
     async def next_scene(self, timeline: "Timeline") -> "Scene | None":
         """Return the next scene to be executed."""
-        system_message = (
-            await self.system_renderer.render_async(agent=self, timeline=timeline)
-        ).strip()
-        new_message = (
-            await self.user_renderer.render_async(agent=self, timeline=timeline)
-        ).strip()
+        if not await self.should_evaluate(timeline):
+            return None
+
+        with span("director.render", "director"):
+            system_message = (
+                await self.system_renderer.render_async(agent=self, timeline=timeline)
+            ).strip()
+            new_message = (
+                await self.user_renderer.render_async(agent=self, timeline=timeline)
+            ).strip()
         messages: list["Message"] = [
             {
                 "role": "system",
@@ -79,21 +132,25 @@ class ModelDirector(Director):
             },
         ]
         logger.debug("Choosing next scene with messages: {messages}", messages=messages)
-        async for response in self.backend.generate(timeline, messages):
-            logger.debug("Director response: {response}", response=response.content)
-
-            if self.finish_flag is not None and self.finish_flag in response.content:
-                raise OperaFinished()
-
-            allowed_scenes = (
-                timeline.opera.scenes
-                if self.allowed_scenes is None
-                else self.allowed_scenes
-            )
-            for scene in allowed_scenes:
-                if scene in response.content:
-                    return timeline.opera.scenes[scene]
-            return None
+        with span("backend.generate", "backend", component="director"):
+            async for response in self.backend.generate(timeline, messages):
+                logger.debug("Director response: {response}", response=response.content)
+
+                if (
+                    self.finish_flag is not None
+                    and self.finish_flag in response.content
+                ):
+                    raise OperaFinished()
+
+                allowed_scenes = (
+                    timeline.opera.scenes
+                    if self.allowed_scenes is None
+                    else self.allowed_scenes
+                )
+                for scene in allowed_scenes:
+                    if scene in response.content:
+                        return timeline.opera.scenes[scene]
+                return None
 
         # This should never happen
         raise RuntimeError("The backend did not return a response.")
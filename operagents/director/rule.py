@@ -0,0 +1,171 @@
+from collections.abc import Callable
+import inspect
+import re
+from typing import TYPE_CHECKING, Any
+from typing_extensions import Self, override
+
+from operagents.config import DirectorRuleConfig, RuleDirectorConfig
+from operagents.exception import OperaFinished
+from operagents.log import logger
+from operagents.utils import resolve_dot_notation
+
+from ._base import Director
+
+if TYPE_CHECKING:
+    from operagents.scene import Scene
+    from operagents.timeline import Timeline
+
+
+class DirectorRule:
+    """A scene transition taken when all of its conditions match.
+
+    Conditions not set are ignored. Text conditions match the content of the
+    last `window` acts in the current scene session.
+    """
+
+    def __init__(
+        self,
+        *,
+        scene: str | None = None,
+        finish: bool = False,
+        min_acts: int | None = None,
+        characters: list[str] | None = None,
+        keywords: list[str] | None = None,
+        ignore_case: bool = False,
+        pattern: str | None = None,
+        props: list[str] | None = None,
+        window: int = 1,
+        predicate: "Callable[[Timeline], Any] | None" = None,
+    ) -> None:
+        self.scene: str | None = scene
+        """The scene to switch to."""
+        self.finish: bool = finish
+        """Whether to finish the opera."""
+        self.min_acts: int | None = min_acts
+        """The minimum number of acts in the session."""
+        self.characters: set[str] | None = (
+            set(characters) if characters is not None else None
+        )
+        """The characters one of which must have acted last."""
+        self.ignore_case: bool = ignore_case
+        """Whether keywords and pattern are case insensitive."""
+        self.keywords: list[str] = [
+            keyword.casefold() if ignore_case else keyword for keyword in keywords or []
+        ]
+        """The keywords one of which must appear in the recent acts."""
+        self.pattern: re.Pattern[str] | None = (
+            re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+            if pattern is not None
+            else None
+        )
+        """The regular expression to search in the recent acts."""
+        self.props: set[str] = set(props or ())
+        """The props one of which must have been used in the recent acts."""
+        self.window: int = window
+        """The number of recent acts to match."""
+        self.predicate: "Callable[[Timeline], Any] | None" = predicate
+        """The custom condition, may be sync or async."""
+
+    def __repr__(self) -> str:
+        target = "finish" if self.finish else repr(self.scene)
+        return f"{self.__class__.__name__}(target={target}, window={self.window})"
+
+    @classmethod
+    def from_config(cls, config: DirectorRuleConfig) -> Self:
+        return cls(
+            scene=config.scene,
+            finish=config.finish,
+            min_acts=config.min_acts,
+            characters=config.characters,
+            keywords=config.keywords,
+            ignore_case=config.ignore_case,
+            pattern=config.pattern,
+            props=config.props,
+            window=config.window,
+            predicate=(
+                resolve_dot_notation(config.predicate)
+                if config.predicate is not None
+                else None
+            ),
+        )
+
+    async def match(self, timeline: "Timeline") -> bool:
+        """Check whether the rule matches the current scene session."""
+        session_id = timeline.current_session_id
+        if (
+            self.min_acts is not None
+            and timeline.session_act_num(session_id) < self.min_acts
+        ):
+            return False
+
+        if self.characters is not None or self.keywords or self.pattern or self.props:
+            acts = timeline.session_acts(session_id)[-self.window :]
+            if not acts:
+                return False
+            if (
+                self.characters is not None
+                and acts[-1].character.name not in self.characters
+            ):
+                return False
+            if self.keywords or self.pattern is not None:
+                contents = [act.content for act in acts]
+                if self.keywords:
+                    texts = (
+                        [content.casefold() for content in contents]
+                        if self.ignore_case
+                        else contents
+                    )
+                    if not any(
+                        keyword in text for text in texts for keyword in self.keywords
+                    ):
+                        return False
+                if self.pattern is not None and not any(
+                    self.pattern.search(content) for content in contents
+                ):
+                    return False
+            if self.props and not any(
+                prop in self.props for act in acts for prop in act.props
+            ):
+                return False
+
+        if self.predicate is not None:
+            result = self.predicate(timeline)
+            if inspect.isawaitable(result):
+                result = await result
+            if not result:
+                return False
+        return True
+
+
+class RuleDirector(Director):
+    """A director switching scenes by declarative rules without backend calls.
+
+    Rules are evaluated in order and the first matching one is taken.
+    The current scene continues if no rule matches.
+    """
+
+    type_ = "rule"
+
+    def __init__(self, rules: list[DirectorRule]) -> None:
+        self.rules: list[DirectorRule] = rules
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(rules={self.rules!r})"
+
+    @classmethod
+    @override
+    def from_config(  # pyright: ignore[reportIncompatibleMethodOverride]
+        cls, config: RuleDirectorConfig
+    ) -> Self:
+        return cls(rules=[DirectorRule.from_config(rule) for rule in config.rules])
+
+    @override
+    async def next_scene(self, timeline: "Timeline") -> "Scene | None":
+        for rule in self.rules:
+            if await rule.match(timeline):
+                logger.debug("Director rule matched: {rule}", rule=rule)
+                if rule.finish:
+                    raise OperaFinished()
+                assert rule.scene is not None
+                return timeline.opera.scenes[rule.scene]
+        return None
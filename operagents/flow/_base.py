@@ -29,3 +29,12 @@ class Flow(abc.ABC):
     async def next(self, timeline: "Timeline") -> "Character":
         """Get the next character to act in the scene."""
         raise NotImplementedError
+
+    async def group(
+        self, timeline: "Timeline", character: "Character"
+    ) -> list["Character"]:
+        """Get the characters acting concurrently with the chosen character.
+
+        The acts are committed to the timeline in the group order.
+        """
+        return [character]
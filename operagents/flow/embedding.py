@@ -0,0 +1,207 @@
+from collections.abc import Awaitable, Callable, Sequence
+import inspect
+import math
+import re
+from typing import TYPE_CHECKING, TypeAlias
+from typing_extensions import Self, override
+import zlib
+
+from operagents.config import EmbeddingFlowConfig
+from operagents.log import logger
+from operagents.utils import resolve_dot_notation
+
+from ._base import Flow
+from .model import ModelFlow
+
+if TYPE_CHECKING:
+    from operagents.character import Character
+    from operagents.timeline import Timeline
+
+Vector: TypeAlias = Sequence[float]
+Embedder: TypeAlias = Callable[
+    [list[str]], Sequence[Vector] | Awaitable[Sequence[Vector]]
+]
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+class HashingEmbedder:
+    """Embed texts as normalized bags of hashed words.
+
+    A dependency free embedder good enough to match transcripts against
+    character descriptions sharing vocabulary.
+    """
+
+    def __init__(self, dimensions: int = 512) -> None:
+        self.dimensions: int = dimensions
+        """The size of the vectors."""
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(dimensions={self.dimensions})"
+
+    def embed(self, text: str) -> list[float]:
+        vector = [0.0] * self.dimensions
+        for word in _WORD_PATTERN.findall(text.casefold()):
+            vector[zlib.crc32(word.encode()) % self.dimensions] += 1.0
+        if norm := math.sqrt(sum(value * value for value in vector)):
+            vector = [value / norm for value in vector]
+        return vector
+
+    def __call__(self, texts: list[str]) -> list[list[float]]:
+        return [self.embed(text) for text in texts]
+
+
+def cosine_similarity(a: Vector, b: Vector) -> float:
+    """The cosine similarity of two vectors, 0 if either is zero."""
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class EmbeddingFlow(Flow):
+    """A flow choosing the next character by local similarity scoring.
+
+    The recent acts are compared with the character descriptions, adjusted by
+    rule priors. The fallback flow is only asked when the best scores tie.
+    """
+
+    type_ = "embedding"
+
+    def __init__(
+        self,
+        *,
+        embedder: Embedder | None = None,
+        window: int = 3,
+        allowed_characters: list[str] | None = None,
+        begin_character: str | None = None,
+        repeat_penalty: float = 1.0,
+        mention_bonus: float = 0.5,
+        tie_margin: float = 0.0,
+        fallback: Flow | None = None,
+    ) -> None:
+        self.embedder: Embedder = embedder or HashingEmbedder()
+        """The embedder of transcripts and character descriptions."""
+        self.window: int = window
+        """The number of recent acts to compare."""
+        self.allowed_characters: list[str] | None = allowed_characters
+        """The characters allowed to act."""
+        self.begin_character: str | None = begin_character
+        """The first character to act."""
+        self.repeat_penalty: float = repeat_penalty
+        """The score subtracted from the last character acted."""
+        self.mention_bonus: float = mention_bonus
+        """The score added to the characters named in the last act."""
+        self.tie_margin: float = tie_margin
+        """The score difference of the best characters considered a tie."""
+        self.fallback: Flow | None = fallback
+        """The flow to ask on ties."""
+
+        self._profiles: dict[str, Vector] = {}
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}("
+            f"embedder={self.embedder!r}, "
+            f"allowed_characters={self.allowed_characters}, "
+            f"begin_character={self.begin_character!r}, fallback={self.fallback!r}"
+            ")"
+        )
+
+    @classmethod
+    @override
+    def from_config(  # pyright: ignore[reportIncompatibleMethodOverride]
+        cls, config: EmbeddingFlowConfig
+    ) -> Self:
+        return cls(
+            embedder=(
+                resolve_dot_notation(config.embedder)
+                if config.embedder is not None
+                else HashingEmbedder(config.dimensions)
+            ),
+            window=config.window,
+            allowed_characters=config.allowed_characters,
+            begin_character=config.begin_character,
+            repeat_penalty=config.repeat_penalty,
+            mention_bonus=config.mention_bonus,
+            tie_margin=config.tie_margin,
+            fallback=(
+                ModelFlow.from_config(config.fallback)
+                if config.fallback is not None
+                else None
+            ),
+        )
+
+    async def _embed(self, texts: list[str]) -> Sequence[Vector]:
+        vectors = self.embedder(texts)
+        if inspect.isawaitable(vectors):
+            vectors = await vectors
+        return vectors
+
+    async def _ensure_profiles(self, characters: list["Character"]) -> None:
+        if missing := [c for c in characters if c.name not in self._profiles]:
+            vectors = await self._embed(
+                [
+                    f"{c.name}\n{c.description}" if c.description else c.name
+                    for c in missing
+                ]
+            )
+            self._profiles.update(zip((c.name for c in missing), vectors))
+
+    async def score(self, timeline: "Timeline") -> dict[str, float]:
+        """Score the allowed characters to act next."""
+        scene_characters = timeline.current_scene.characters
+        characters = [
+            scene_characters[name]
+            for name in (
+                scene_characters
+                if self.allowed_characters is None
+                else self.allowed_characters
+            )
+        ]
+        await self._ensure_profiles(characters)
+
+        acts = timeline.current_acts[-self.window :] if self.window > 0 else []
+        if transcript := "\n".join(act.content for act in acts):
+            (transcript_vector,) = await self._embed([transcript])
+        else:
+            transcript_vector = None
+        last_act = acts[-1] if acts else None
+        last_content = last_act.content.casefold() if last_act else ""
+
+        scores: dict[str, float] = {}
+        for character in characters:
+            score = (
+                cosine_similarity(transcript_vector, self._profiles[character.name])
+                if transcript_vector is not None
+                else 0.0
+            )
+            if last_act is not None:
+                if last_act.character.name == character.name:
+                    score -= self.repeat_penalty
+                elif character.name.casefold() in last_content:
+                    score += self.mention_bonus
+            scores[character.name] = score
+        return scores
+
+    async def _choose_character(self, timeline: "Timeline") -> "Character":
+        scores = await self.score(timeline)
+        ranked = sorted(scores, key=scores.__getitem__, reverse=True)
+        logger.debug("Embedding flow scores: {scores}", scores=scores)
+        if (
+            self.fallback is not None
+            and len(ranked) > 1
+            and scores[ranked[0]] - scores[ranked[1]] <= self.tie_margin
+        ):
+            logger.debug("Embedding flow tie, asking fallback flow")
+            return await self.fallback.next(timeline)
+        return timeline.current_scene.characters[ranked[0]]
+
+    @override
+    async def begin(self, timeline: "Timeline") -> "Character":
+        if self.begin_character is not None:
+            return timeline.current_scene.characters[self.begin_character]
+        return await self._choose_character(timeline)
+
+    @override
+    async def next(self, timeline: "Timeline") -> "Character":
+        return await self._choose_character(timeline)
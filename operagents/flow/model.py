@@ -2,9 +2,11 @@ from typing import TYPE_CHECKING
 from typing_extensions import Self, override
 
 from operagents import backend
+from operagents.backend import response_validator
 from operagents.config import ModelFlowConfig, TemplateConfig
 from operagents.exception import FlowError
 from operagents.log import logger
+from operagents.tracing import span
 from operagents.utils import get_template_renderer
 
 from ._base import Flow
@@ -60,15 +62,17 @@ class ModelFlow(Flow):
             user_template=config.user_template,
             allowed_characters=config.allowed_characters,
             begin_character=config.begin_character,
+            fallback_character=config.fallback_character,
         )
 
     async def _choose_character(self, timeline: "Timeline") -> "Character":
-        system_message = (
-            await self.system_renderer.render_async(agent=self, timeline=timeline)
-        ).strip()
-        new_message = (
-            await self.user_renderer.render_async(agent=self, timeline=timeline)
-        ).strip()
+        with span("flow.render", "flow"):
+            system_message = (
+                await self.system_renderer.render_async(agent=self, timeline=timeline)
+            ).strip()
+            new_message = (
+                await self.user_renderer.render_async(agent=self, timeline=timeline)
+            ).strip()
         messages: list["Message"] = [
             {
                 "role": "system",
@@ -82,23 +86,29 @@ class ModelFlow(Flow):
         logger.debug(
             "Choosing next character with messages: {messages}", messages=messages
         )
-        async for response in self.backend.generate(timeline, messages):
-            logger.debug("Flow response: {response}", response=response)
-
-            allowed_characters = (
-                list(timeline.current_scene.characters)
-                if self.allowed_characters is None
-                else self.allowed_characters
-            )
-            for character in allowed_characters:
-                if character in response:
-                    return timeline.current_scene.characters[character]
-            if self.fallback_character is not None:
-                return timeline.current_scene.characters[self.fallback_character]
-            raise FlowError(
-                "The model flow failed to choose the next character. "
-                "No fallback character was provided."
-            )
+        allowed_characters = (
+            list(timeline.current_scene.characters)
+            if self.allowed_characters is None
+            else self.allowed_characters
+        )
+        with (
+            span("backend.generate", "backend", component="flow"),
+            response_validator(
+                lambda content: any(c in content for c in allowed_characters)
+            ),
+        ):
+            async for response in self.backend.generate(timeline, messages):
+                logger.debug("Flow response: {response}", response=response)
+
+                for character in allowed_characters:
+                    if character in response.content:
+                        return timeline.current_scene.characters[character]
+                if self.fallback_character is not None:
+                    return timeline.current_scene.characters[self.fallback_character]
+                raise FlowError(
+                    "The model flow failed to choose the next character. "
+                    "No fallback character was provided."
+                )
 
         # This should never happen
         raise RuntimeError("The backend did not return a response.")
@@ -1,7 +1,12 @@
-from typing import TYPE_CHECKING
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
 from typing_extensions import Self, override
+from uuid import UUID
 
-from operagents.config import OrderFlowConfig
+from operagents.config import OrderFlowConfig, OrderFlowSlotConfig
+from operagents.exception import FlowError
+from operagents.utils import resolve_dot_notation
 
 from ._base import Flow
 
@@ -10,11 +15,46 @@ if TYPE_CHECKING:
     from operagents.timeline import Timeline
 
 
+@dataclass(frozen=True, kw_only=True)
+class OrderSlot:
+    """A position in the rotation."""
+
+    character: str
+    """The name of the character acting in the slot."""
+    every: int = 1
+    """Take the slot only every n rounds of the rotation."""
+
+
+@dataclass(kw_only=True)
+class _Cursor:
+    position: int = 0
+    round: int = 0
+
+
 class OrderFlow(Flow):
+    """A flow rotating the characters in a fixed order.
+
+    The order is compiled into slots, a character repeated in the order or
+    weighted acts in several slots. The position in the rotation is kept per
+    session, so choosing the next character does not search the order.
+    """
+
     type_ = "order"
 
-    def __init__(self, order: list[str] | None = None):
-        self.order: list[str] | None = order
+    def __init__(
+        self,
+        order: list[str | OrderFlowSlotConfig] | None = None,
+        skip: "Callable[[Timeline, Character], Any] | None" = None,
+    ):
+        self.order: list[str | OrderFlowSlotConfig] | None = order
+        self.skip: "Callable[[Timeline, Character], Any] | None" = skip
+        """Skip a slot when the predicate returns true."""
+
+        self.slots: list[OrderSlot] | None = (
+            self.compile(order) if order is not None else None
+        )
+        """The compiled rotation, the scene characters if no order given."""
+        self._cursors: dict[UUID, _Cursor] = {}
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}(order={self.order})"
@@ -24,25 +64,103 @@ class OrderFlow(Flow):
     def from_config(  # pyright: ignore[reportIncompatibleMethodOverride]
         cls, config: OrderFlowConfig
     ) -> Self:
-        return cls(order=config.order)
+        return cls(
+            order=config.order,
+            skip=(
+                resolve_dot_notation(config.skip) if config.skip is not None else None
+            ),
+        )
+
+    @staticmethod
+    def compile(order: list[str | OrderFlowSlotConfig]) -> list[OrderSlot]:
+        """Expand the order into slots, weighted entries take consecutive slots."""
+        slots: list[OrderSlot] = []
+        for entry in order:
+            if isinstance(entry, str):
+                slots.append(OrderSlot(character=entry))
+            else:
+                slots.extend(
+                    OrderSlot(character=entry.character, every=entry.every)
+                    for _ in range(entry.weight)
+                )
+        if not slots:
+            raise FlowError("The order flow has no slots.")
+        return slots
+
+    def _get_slots(self, timeline: "Timeline") -> list[OrderSlot]:
+        if self.slots is None:
+            self.slots = [
+                OrderSlot(character=name) for name in timeline.current_scene.characters
+            ]
+        return self.slots
+
+    def _is_skipped(
+        self, timeline: "Timeline", slot: OrderSlot, cursor: _Cursor
+    ) -> bool:
+        if cursor.round % slot.every:
+            return True
+        if self.skip is None:
+            return False
+        character = timeline.current_scene.characters[slot.character]
+        return bool(self.skip(timeline, character))
+
+    def _seek(
+        self, timeline: "Timeline", slots: list[OrderSlot], cursor: _Cursor
+    ) -> "Character":
+        """Move the cursor forward to the first slot not skipped."""
+        slot = slots[cursor.position]
+        if not self._is_skipped(timeline, slot, cursor):
+            return timeline.current_scene.characters[slot.character]
+        # a full rotation of every round pattern visits all possible slots
+        for _ in range(len(slots) * max(slot.every for slot in slots)):
+            self._advance(slots, cursor)
+            slot = slots[cursor.position]
+            if not self._is_skipped(timeline, slot, cursor):
+                return timeline.current_scene.characters[slot.character]
+        raise FlowError("All slots of the order flow are skipped.")
+
+    def _advance(self, slots: list[OrderSlot], cursor: _Cursor) -> None:
+        cursor.position += 1
+        if cursor.position == len(slots):
+            cursor.position = 0
+            cursor.round += 1
 
     @override
     async def begin(self, timeline: "Timeline") -> "Character":
-        characters = timeline.current_scene.characters
-        if self.order is not None:
-            return characters[self.order[0]]
-        return next(iter(characters.values()))
+        slots = self._get_slots(timeline)
+        # only the cursor of the current session is needed
+        cursor = _Cursor()
+        self._cursors = {timeline.current_session_id: cursor}
+        return self._seek(timeline, slots, cursor)
+
+    def _sync(self, slots: list[OrderSlot], cursor: _Cursor, name: str) -> bool:
+        """Move the cursor forward to the next slot of the character.
+
+        Return false if the character has no slot.
+        """
+        for offset in range(len(slots)):
+            if slots[(cursor.position + offset) % len(slots)].character == name:
+                break
+        else:
+            return False
+        for _ in range(offset):
+            self._advance(slots, cursor)
+        return True
 
     @override
     async def next(self, timeline: "Timeline") -> "Character":
-        if self.order is None:
-            character_names = list(timeline.current_scene.characters.keys())
-        else:
-            character_names = self.order
-
-        # FIXME: character names may not be unique, check sequence instead
-        next_character_name = character_names[
-            (character_names.index(timeline.current_character.name) + 1)
-            % len(character_names)
-        ]
-        return timeline.current_scene.characters[next_character_name]
+        slots = self._get_slots(timeline)
+        name = timeline.current_character.name
+        if (cursor := self._cursors.get(timeline.current_session_id)) is None:
+            # the session did not begin with this flow, resume after the
+            # first slot of the current character
+            cursor = _Cursor()
+            self._cursors = {timeline.current_session_id: cursor}
+            if not self._sync(slots, cursor, name):
+                return self._seek(timeline, slots, cursor)
+        elif slots[cursor.position].character != name:
+            # the character was chosen by someone else, e.g. the director,
+            # resume after its next slot, characters without one keep the cursor
+            self._sync(slots, cursor, name)
+        self._advance(slots, cursor)
+        return self._seek(timeline, slots, cursor)
@@ -0,0 +1,77 @@
+from typing import TYPE_CHECKING
+from typing_extensions import Self, override
+from uuid import UUID
+
+from operagents.config import ParallelFlowConfig
+from operagents.exception import FlowError
+
+from ._base import Flow
+
+if TYPE_CHECKING:
+    from operagents.character import Character
+    from operagents.timeline import Timeline
+
+
+class ParallelFlow(Flow):
+    """A flow making groups of characters act concurrently.
+
+    The characters of a group respond to the same snapshot of the timeline,
+    their acts are committed in the group order. The groups rotate in order.
+    """
+
+    type_ = "parallel"
+
+    def __init__(self, groups: list[list[str]] | None = None) -> None:
+        if groups is not None and (not groups or not all(groups)):
+            raise FlowError("The parallel flow requires non-empty groups.")
+        self.groups: list[list[str]] | None = groups
+        """The groups of characters, all scene characters if not given."""
+
+        self._positions: dict[UUID, int] = {}
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(groups={self.groups!r})"
+
+    @classmethod
+    @override
+    def from_config(  # pyright: ignore[reportIncompatibleMethodOverride]
+        cls, config: ParallelFlowConfig
+    ) -> Self:
+        return cls(groups=config.groups)
+
+    def _get_groups(self, timeline: "Timeline") -> list[list[str]]:
+        if self.groups is None:
+            return [list(timeline.current_scene.characters)]
+        return self.groups
+
+    def _leader(self, timeline: "Timeline", position: int) -> "Character":
+        self._positions = {timeline.current_session_id: position}
+        group = self._get_groups(timeline)[position]
+        return timeline.current_scene.characters[group[0]]
+
+    @override
+    async def begin(self, timeline: "Timeline") -> "Character":
+        return self._leader(timeline, 0)
+
+    @override
+    async def next(self, timeline: "Timeline") -> "Character":
+        position = self._positions.get(timeline.current_session_id, -1)
+        return self._leader(timeline, (position + 1) % len(self._get_groups(timeline)))
+
+    @override
+    async def group(
+        self, timeline: "Timeline", character: "Character"
+    ) -> list["Character"]:
+        groups = self._get_groups(timeline)
+        position = self._positions.get(timeline.current_session_id)
+        if position is None or character.name not in groups[position]:
+            # the character was not chosen by the flow, e.g. by a director,
+            # continue the rotation from its group
+            position = next(
+                (i for i, group in enumerate(groups) if character.name in group), None
+            )
+            if position is None:
+                return [character]
+            self._positions = {timeline.current_session_id: position}
+        characters = timeline.current_scene.characters
+        return [characters[name] for name in groups[position]]
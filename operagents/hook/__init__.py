@@ -2,6 +2,9 @@ from operagents.config import HookConfig
 from operagents.utils import get_all_subclasses, resolve_dot_notation
 
 from ._base import Hook as Hook
+from ._base import HookDispatchTable as HookDispatchTable
+from ._base import HookHandler as HookHandler
+from .metrics import MetricsHook as MetricsHook
 from .summary import SummaryHook as SummaryHook
 
 all_hook_types: dict[str, type[Hook]] = {f.type_: f for f in get_all_subclasses(Hook)}
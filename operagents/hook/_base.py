@@ -1,9 +1,11 @@
 import abc
-from typing import TYPE_CHECKING, ClassVar
+from collections.abc import Awaitable, Callable
+from typing import TYPE_CHECKING, Any, ClassVar, TypeAlias
 from typing_extensions import Self
 
 from operagents.config import HookConfig
 from operagents.log import logger
+from operagents.tracing import span
 
 if TYPE_CHECKING:
     from operagents.timeline import Timeline
@@ -16,6 +18,10 @@ if TYPE_CHECKING:
         TimelineEventStart,
     )
 
+HANDLER_PREFIX = "on_timeline_"
+
+HookHandler: TypeAlias = Callable[["Timeline", Any], Awaitable[Any]]
+
 
 class Hook(abc.ABC):
     type_: ClassVar[str]
@@ -27,19 +33,46 @@ class Hook(abc.ABC):
         """Create a hook from a configuration."""
         raise NotImplementedError
 
-    async def invoke(self, timeline: "Timeline", event: "TimelineEvent") -> None:
-        event_type = event.type_
-        if handler := getattr(self, f"on_timeline_{event_type}", None):
-            logger.debug(
-                f"Invoking timeline hook {self.__class__.__name__}.{handler.__name__}"
-            )
-            try:
+    def handler(self, event_type: str) -> HookHandler | None:
+        """Get the handler of the hook for the event type.
+
+        Hooks overriding `invoke` handle every event through it.
+        """
+        if type(self).invoke is not Hook.invoke:
+            return self.invoke
+        return getattr(self, f"{HANDLER_PREFIX}{event_type}", None)
+
+    async def run(
+        self, handler: HookHandler, timeline: "Timeline", event: "TimelineEvent"
+    ) -> bool:
+        """Run an event handler of the hook, logging the failure.
+
+        Return whether the handler succeeded.
+        """
+        logger.debug(
+            "Invoking timeline hook {hook}.{handler}",
+            hook=self.__class__.__name__,
+            handler=handler.__name__,
+        )
+        try:
+            with span(
+                f"hook.{event.type_}",
+                "hook",
+                hook=self.__class__.__name__,
+                event=event.type_,
+            ):
                 await handler(timeline, event)
-            except Exception:
-                logger.opt(exception=True).warning(
-                    "Running timeline hook "
-                    f"{self.__class__.__name__}.{handler.__name__} failed."
-                )
+        except Exception:
+            logger.opt(exception=True).warning(
+                "Running timeline hook "
+                f"{self.__class__.__name__}.{handler.__name__} failed."
+            )
+            return False
+        return True
+
+    async def invoke(self, timeline: "Timeline", event: "TimelineEvent") -> None:
+        if handler := getattr(self, f"{HANDLER_PREFIX}{event.type_}", None):
+            await self.run(handler, timeline, event)
 
     if TYPE_CHECKING:
 
@@ -72,3 +105,34 @@ class Hook(abc.ABC):
         ):
             """Called when a character acts in a session."""
             pass
+
+
+class HookDispatchTable:
+    """The handlers of the hooks by event type, in the order of the hooks.
+
+    The handlers of an event type are resolved on its first event. The table
+    follows the list of hooks, it is cleared when the hooks change.
+    """
+
+    def __init__(self, hooks: list[Hook]) -> None:
+        self.hooks: list[Hook] = hooks
+        """The hooks to dispatch events to."""
+
+        self._resolved: tuple[Hook, ...] = ()
+        self._handlers: dict[str, list[tuple[Hook, HookHandler]]] = {}
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(hooks={self.hooks})"
+
+    def get(self, event_type: str) -> list[tuple[Hook, HookHandler]]:
+        """Get the hooks and their handlers for the event type."""
+        if (hooks := tuple(self.hooks)) != self._resolved:
+            self._resolved = hooks
+            self._handlers = {}
+        if (handlers := self._handlers.get(event_type)) is None:
+            handlers = self._handlers[event_type] = [
+                (hook, handler)
+                for hook in hooks
+                if (handler := hook.handler(event_type)) is not None
+            ]
+        return handlers
@@ -0,0 +1,285 @@
+import asyncio
+import contextlib
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING
+from typing_extensions import Self
+
+from operagents.config import MetricsHookConfig
+from operagents.exception import TimelineNotStarted
+from operagents.log import logger
+from operagents.metrics import (
+    DEFAULT_BUCKETS,
+    Counter,
+    Gauge,
+    Histogram,
+    Labels,
+    Metric,
+    render_metrics,
+)
+
+from ._base import Hook
+
+if TYPE_CHECKING:
+    from operagents.timeline import Timeline
+    from operagents.timeline.event import (
+        TimelineEventEnd,
+        TimelineEventSessionAct,
+        TimelineEventSessionStart,
+        TimelineEventStart,
+    )
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsHook(Hook):
+    """Maintain metrics of the run in Prometheus format.
+
+    The metrics are served over http at `/metrics` and/or dumped to a file
+    periodically while the timeline runs.
+    """
+
+    type_ = "metrics"
+
+    def __init__(
+        self,
+        *,
+        host: str = "127.0.0.1",
+        port: int | None = None,
+        path: Path | None = None,
+        interval: float = 10.0,
+        buckets: list[float] | None = None,
+    ) -> None:
+        self.host: str = host
+        """The host to serve the metrics on."""
+        self.port: int | None = port
+        """The port to serve the metrics on, 0 for a random free port."""
+        self.path: Path | None = path
+        """The file to dump the metrics to."""
+        self.interval: float = interval
+        """The interval between file dumps in seconds."""
+
+        buckets = buckets or list(DEFAULT_BUCKETS)
+        self.turns = Counter("operagents_turns_total", "Character acts.")
+        self.sessions = Counter(
+            "operagents_sessions_total", "Scene sessions started by scene."
+        )
+        self.acts = Counter(
+            "operagents_acts_total", "Character acts by scene, character and agent."
+        )
+        self.prop_uses = Counter("operagents_prop_uses_total", "Prop usages by prop.")
+        self.act_duration = Histogram(
+            "operagents_act_duration_seconds", "Duration of character acts.", buckets
+        )
+        self.generation_duration = Histogram(
+            "operagents_generation_duration_seconds",
+            "Duration of backend generations of acts by agent.",
+            buckets,
+        )
+        self.prop_duration = Histogram(
+            "operagents_prop_duration_seconds",
+            "Duration of prop usages in acts.",
+            buckets,
+        )
+        self.requests = Counter(
+            "operagents_backend_requests_total", "Backend requests by model."
+        )
+        self.tokens = Counter(
+            "operagents_tokens_total", "Backend tokens by model and kind."
+        )
+        self.cost = Counter("operagents_cost_total", "Backend cost by model.")
+        self.phase_seconds = Counter(
+            "operagents_phase_seconds_total",
+            "Time spent in flows, directors and hooks.",
+        )
+        self.hook_failures = Counter(
+            "operagents_hook_failures_total", "Failed hook handler runs by hook."
+        )
+        self.pending_summaries = Gauge(
+            "operagents_pending_summaries", "Session summaries pending by agent."
+        )
+
+        self._timeline: "Timeline | None" = None
+        # the run values already added to the counters
+        self._seen: dict[tuple[str, Labels], float] = {}
+        self._server: asyncio.Server | None = None
+        self._dump_task: asyncio.Task[None] | None = None
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}("
+            f"host={self.host!r}, port={self.port!r}, path={self.path!r}"
+            ")"
+        )
+
+    @classmethod
+    def from_config(  # pyright: ignore[reportIncompatibleMethodOverride]
+        cls, config: MetricsHookConfig
+    ) -> Self:
+        return cls(
+            host=config.host,
+            port=config.port,
+            path=Path(config.path) if config.path is not None else None,
+            interval=config.interval,
+            buckets=config.buckets,
+        )
+
+    def _advance(self, counter: Counter, value: float, **labels: str) -> None:
+        """Increase the counter by the growth of a value accumulated by the run.
+
+        The run values are reset by each run, counters must never decrease.
+        """
+        key = (counter.name, tuple(labels.items()))
+        counter.inc(value - self._seen.get(key, 0.0), **labels)
+        self._seen[key] = value
+
+    def _collect(self) -> None:
+        """Update the metrics read from the timeline and the opera."""
+        if (timeline := self._timeline) is None:
+            return
+        for model, usage in timeline.opera.usage.report.by_model.items():
+            self._advance(self.requests, usage.requests, model=model)
+            self._advance(self.tokens, usage.prompt_tokens, model=model, kind="prompt")
+            self._advance(
+                self.tokens, usage.completion_tokens, model=model, kind="completion"
+            )
+            self._advance(self.tokens, usage.cached_tokens, model=model, kind="cached")
+            self._advance(self.cost, usage.cost, model=model)
+        for phase in ("flow", "director", "hook"):
+            # running totals, not the samples
+            self._advance(
+                self.phase_seconds, timeline.durations[phase].total, phase=phase
+            )
+        for hook, failures in timeline.hook_failures.items():
+            self._advance(self.hook_failures, failures, hook=hook)
+        for agent in timeline.opera.agents.values():
+            with contextlib.suppress(TimelineNotStarted):
+                self.pending_summaries.set(
+                    len(agent.memory.pending_summaries), agent=agent.name
+                )
+
+    @property
+    def metrics(self) -> list[Metric]:
+        return [
+            self.turns,
+            self.sessions,
+            self.acts,
+            self.prop_uses,
+            self.act_duration,
+            self.generation_duration,
+            self.prop_duration,
+            self.requests,
+            self.tokens,
+            self.cost,
+            self.phase_seconds,
+            self.hook_failures,
+            self.pending_summaries,
+        ]
+
+    def render(self) -> str:
+        """Render the current metrics in the Prometheus text format."""
+        self._collect()
+        return render_metrics(self.metrics)
+
+    def dump(self) -> None:
+        """Write the current metrics to the file atomically."""
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp = self.path.with_name(f"{self.path.name}.tmp")
+        temp.write_text(self.render(), encoding="utf-8")
+        os.replace(temp, self.path)
+
+    async def _dump_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.dump()
+            except Exception:
+                logger.opt(exception=True).warning("Dumping metrics failed.")
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            if len(request_line) >= 2 and request_line[1].partition("?")[0] in (
+                "/",
+                "/metrics",
+            ):
+                status, content_type = "200 OK", CONTENT_TYPE
+                body = self.render().encode("utf-8")
+            else:
+                status, content_type, body = "404 Not Found", "text/plain", b""
+            writer.write(
+                (
+                    f"HTTP/1.1 {status}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    "Connection: close\r\n\r\n"
+                ).encode("latin-1")
+                + body
+            )
+            await writer.drain()
+        except Exception:
+            logger.opt(exception=True).warning("Serving metrics failed.")
+        finally:
+            writer.close()
+
+    async def on_timeline_start(
+        self, timeline: "Timeline", event: "TimelineEventStart"
+    ):
+        self._timeline = timeline
+        # the run values start over
+        self._seen = {}
+        if self.port is not None and self._server is None:
+            self._server = await asyncio.start_server(
+                self._handle, self.host, self.port
+            )
+            host, port = self._server.sockets[0].getsockname()[:2]
+            logger.info(
+                "Serving metrics on http://{host}:{port}/metrics", host=host, port=port
+            )
+        if self.path is not None and self._dump_task is None:
+            self._dump_task = asyncio.create_task(self._dump_forever())
+
+    async def on_timeline_end(self, timeline: "Timeline", event: "TimelineEventEnd"):
+        if self._dump_task is not None:
+            self._dump_task.cancel()
+            self._dump_task = None
+        # the final metrics of the run
+        self._collect()
+        self.dump()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        self._timeline = None
+
+    async def on_timeline_session_start(
+        self, timeline: "Timeline", event: "TimelineEventSessionStart"
+    ):
+        self.sessions.inc(scene=event.scene.name)
+
+    async def on_timeline_session_act(
+        self, timeline: "Timeline", event: "TimelineEventSessionAct"
+    ):
+        character = event.character
+        self.turns.inc()
+        self.acts.inc(
+            scene=event.scene.name,
+            character=character.name,
+            agent=character.agent_name,
+        )
+        for prop in event.props:
+            self.prop_uses.inc(prop=prop)
+        if event.duration is not None:
+            self.act_duration.observe(event.duration)
+        if event.generation_duration is not None:
+            self.generation_duration.observe(
+                event.generation_duration, agent=character.agent_name
+            )
+        if event.prop_duration is not None:
+            self.prop_duration.observe(event.prop_duration)
@@ -3,10 +3,13 @@ from typing import TYPE_CHECKING
 from typing_extensions import Self
 
 from operagents.config import SummaryHookConfig
+from operagents.log import logger
 
 from ._base import Hook
 
 if TYPE_CHECKING:
+    from operagents.agent import Agent
+    from operagents.backend import Message
     from operagents.timeline import Timeline
     from operagents.timeline.event import TimelineEventSessionEnd
 
@@ -14,21 +17,106 @@ if TYPE_CHECKING:
 class SummaryHook(Hook):
     type_ = "summary"
 
-    def __init__(self, agent_names: list[str] | None) -> None:
+    def __init__(
+        self,
+        agent_names: list[str] | None,
+        share: bool = False,
+        lazy: bool = False,
+        prefetch: bool = False,
+    ) -> None:
         self.agent_names = agent_names
+        self.share: bool = share
+        """Whether agents with the same backend and summary prompt share one call."""
+        self.lazy: bool = lazy
+        """Whether to summarize when the agents need their memory again."""
+        self.prefetch: bool = prefetch
+        """Whether to summarize lazy sessions in the background."""
 
     @classmethod
     def from_config(  # pyright: ignore[reportIncompatibleMethodOverride]
         cls, config: SummaryHookConfig
     ) -> Self:
-        return cls(agent_names=config.agent_names)
+        return cls(
+            agent_names=config.agent_names,
+            share=config.share,
+            lazy=config.lazy,
+            prefetch=config.prefetch,
+        )
+
+    async def _shared_summary(
+        self,
+        timeline: "Timeline",
+        event: "TimelineEventSessionEnd",
+        agents: list["Agent"],
+        messages: list["Message"],
+    ) -> None:
+        summary = await agents[0].generate_summary(timeline, event, messages)
+        if len(agents) > 1:
+            logger.debug(
+                "Sharing summary of {leader} with {agents}",
+                leader=agents[0].name,
+                agents=[agent.name for agent in agents[1:]],
+            )
+        for agent in agents:
+            agent.memory.remember_summary(summary.model_copy(), event.monotonic)
+
+    async def _summarize(
+        self,
+        timeline: "Timeline",
+        event: "TimelineEventSessionEnd",
+        agents: list["Agent"],
+    ) -> None:
+        if not self.share:
+            await asyncio.gather(*(agent.summary(timeline, event) for agent in agents))
+            return
+
+        groups: dict[str, tuple[list["Agent"], list["Message"]]] = {}
+        for agent in agents:
+            if agent.memory.summarized(event.session_id):
+                continue
+            messages = await agent.render_summary(timeline, event, shared=True)
+            group, _ = groups.setdefault(agent.summary_key(messages), ([], messages))
+            group.append(agent)
+        await asyncio.gather(
+            *(
+                self._shared_summary(timeline, event, group, messages)
+                for group, messages in groups.values()
+            )
+        )
+
+    async def _prefetch(
+        self,
+        timeline: "Timeline",
+        event: "TimelineEventSessionEnd",
+        agents: list["Agent"],
+    ) -> None:
+        try:
+            await self._summarize(timeline, event, agents)
+        except Exception:
+            logger.opt(exception=True).warning(
+                "Prefetching summaries of session {session_id} failed.",
+                session_id=event.session_id,
+            )
 
     async def on_timeline_session_end(
         self, timeline: "Timeline", event: "TimelineEventSessionEnd"
     ):
-        agents = (
-            timeline.opera.agents[character.agent_name]
-            for character in event.scene.characters.values()
-            if self.agent_names is None or character.agent_name in self.agent_names
+        # an agent may act as several characters of the scene
+        agents = list(
+            {
+                character.agent_name: timeline.opera.agents[character.agent_name]
+                for character in event.scene.characters.values()
+                if self.agent_names is None or character.agent_name in self.agent_names
+            }.values()
+        )
+        if not self.lazy:
+            await self._summarize(timeline, event, agents)
+            return
+
+        task = (
+            asyncio.create_task(self._prefetch(timeline, event, agents))
+            if self.prefetch
+            else None
         )
-        await asyncio.gather(*(agent.summary(timeline, event) for agent in agents))
+        for agent in agents:
+            agent.memory.defer_summary(event, task)
@@ -0,0 +1,132 @@
+from bisect import bisect_left
+from collections.abc import Iterable
+from typing import Literal, TypeAlias
+
+MetricType: TypeAlias = Literal["counter", "gauge", "histogram"]
+Labels: TypeAlias = tuple[tuple[str, str], ...]
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+"""The default upper bounds of histogram buckets in seconds."""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(labels: Iterable[tuple[str, str]]) -> str:
+    """Format labels in the Prometheus text format."""
+    content = ",".join(f'{name}="{_escape(value)}"' for name, value in labels)
+    return f"{{{content}}}" if content else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """A monotonically increasing value per label set."""
+
+    type_: MetricType = "counter"
+
+    def __init__(self, name: str, help: str) -> None:
+        self.name: str = name
+        """The metric name."""
+        self.help: str = help
+        """The description of the metric."""
+        self.values: dict[Labels, float] = {}
+        """The values by label set."""
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(name={self.name!r})"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(labels.items())
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def set(self, value: float, **labels: str) -> None:
+        self.values[tuple(labels.items())] = value
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in self.values.items():
+            yield f"{self.name}{format_labels(labels)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    """A value that can go up and down per label set."""
+
+    type_ = "gauge"
+
+
+class Histogram:
+    """A distribution of observations in fixed buckets per label set.
+
+    Observing is a binary search and an increment, cumulative counts are only
+    computed on exposition.
+    """
+
+    type_: MetricType = "histogram"
+
+    def __init__(
+        self, name: str, help: str, buckets: Iterable[float] = DEFAULT_BUCKETS
+    ) -> None:
+        self.name: str = name
+        """The metric name."""
+        self.help: str = help
+        """The description of the metric."""
+        self.buckets: list[float] = sorted(buckets)
+        """The upper bounds of the buckets."""
+        self.values: dict[Labels, tuple[list[int], list[float]]] = {}
+        """The bucket counts and the sum by label set."""
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(name={self.name!r})"
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(labels.items())
+        if (data := self.values.get(key)) is None:
+            # the last count is the +Inf bucket, the sum is boxed to update in place
+            data = self.values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+        counts, total = data
+        counts[bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def samples(self) -> Iterable[str]:
+        for labels, (counts, total) in self.values.items():
+            cumulative = 0
+            for bound, count in zip([*self.buckets, float("inf")], counts):
+                cumulative += count
+                bucket_labels = format_labels((*labels, ("le", _format_value(bound))))
+                yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+            yield f"{self.name}_sum{format_labels(labels)} {_format_value(total[0])}"
+            yield f"{self.name}_count{format_labels(labels)} {cumulative}"
+
+
+Metric: TypeAlias = Counter | Histogram
+
+
+def render_metrics(metrics: Iterable[Metric]) -> str:
+    """Render the metrics in the Prometheus text exposition format."""
+    lines: list[str] = []
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.type_}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
@@ -1,3 +1,4 @@
+from contextlib import nullcontext
 from pathlib import Path
 from typing import TypedDict
 from typing_extensions import Self
@@ -7,17 +8,22 @@ from operagents.agent import Agent
 from operagents.agent.memory import AgentEvent
 from operagents.config import OperagentsConfig
 from operagents.exception import OperaFinished
-from operagents.hook import Hook
+from operagents.hook import Hook, HookDispatchTable
 from operagents.log import logger
+from operagents.report import RunReport
 from operagents.scene import Scene
 from operagents.timeline import Timeline
 from operagents.timeline.event import TimelineEvent
+from operagents.tracing import Tracer, tracing
+from operagents.usage import UsageReport, UsageTracker, usage_tracking
 from operagents.utils import save_opera_state
 
 
 class OperaState(TypedDict):
     timeline_events: list[TimelineEvent]
     agent_memories: dict[str, list[AgentEvent]]
+    usage: UsageReport
+    report: RunReport
 
 
 class Opera:
@@ -27,11 +33,19 @@ class Opera:
         scenes: dict[str, Scene],
         opening_scene: str,
         hooks: list[Hook],
+        usage: UsageTracker | None = None,
+        tracer: Tracer | None = None,
     ):
         self.agents: dict[str, Agent] = agents
         self.scenes: dict[str, Scene] = scenes
         self.opening_scene: str = opening_scene
         self.hooks: list[Hook] = hooks
+        self.hook_handlers: HookDispatchTable = HookDispatchTable(self.hooks)
+        """The hook handlers by event type, following the hooks."""
+        self.usage: UsageTracker = usage or UsageTracker()
+        """The live token usage of the current run."""
+        self.tracer: Tracer | None = tracer
+        """The tracer of the run phases, exported after the run."""
 
         self.timeline = Timeline(opera=self)
 
@@ -56,30 +70,49 @@ class Opera:
             },
             opening_scene=config.opening_scene,
             hooks=[hook.from_config(hook_config) for hook_config in config.hooks],
+            usage=UsageTracker.from_config(config.usage),
+            tracer=(
+                Tracer.from_config(config.tracing)
+                if config.tracing is not None
+                else None
+            ),
         )
 
     @property
     def state(self) -> OperaState:
         return OperaState(
-            timeline_events=self.timeline.events,
+            timeline_events=list(self.timeline.events),
             agent_memories={
                 agent.name: agent.memory.events for agent in self.agents.values()
             },
+            usage=self.usage.report,
+            report=self.timeline.report(),
         )
 
     async def run(self) -> OperaState:
         logger.info("Starting opera...")
-        async with self.timeline:
+        self.usage.reset()
+        with (
+            usage_tracking(self.usage),
+            tracing(self.tracer) if self.tracer is not None else nullcontext(),
+        ):
             try:
-                while True:
+                async with self.timeline:
                     try:
-                        await self.timeline.next_time()
-                    except OperaFinished:
-                        break
+                        while True:
+                            try:
+                                await self.timeline.next_time()
+                                self.usage.check_budget()
+                            except OperaFinished:
+                                break
+                    finally:
+                        # preserve state before closing
+                        state = self.state
             finally:
-                # preserve state before closing
-                state = self.state
+                if self.tracer is not None and self.tracer.path is not None:
+                    self.tracer.export()
         logger.info("Opera finished.")
+        logger.info("Run report:\n{report}", report=state["report"].format())
         return state
 
     def save(self, path: Path):
@@ -1,12 +1,19 @@
 import abc
+import asyncio
+from collections.abc import AsyncIterator
+from functools import cached_property
 from typing import TYPE_CHECKING, Any, ClassVar, Generic
 from typing_extensions import Self, TypeVar
+from weakref import WeakKeyDictionary
 
 from pydantic import BaseModel
 
 from operagents.config import PropConfig
 from operagents.exception import OperaFinished
 from operagents.log import logger
+from operagents.tracing import span
+
+from .limit import PropResultLimit, join_stream
 
 if TYPE_CHECKING:
     from operagents.timeline import Timeline
@@ -36,6 +43,49 @@ class Prop(abc.ABC, Generic[P]):
     params: type[P] | None
     """The parameters required by the prop to call functions."""
 
+    timeout: float | None = None
+    """The deadline of a single usage in seconds, overriding the backend's."""
+    max_concurrency: int | None = None
+    """The maximum number of concurrent usages of the prop."""
+    result_limit: PropResultLimit | None = None
+    """The size limit of the prop results."""
+
+    @cached_property
+    def _concurrency_limits(
+        self,
+    ) -> "WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]":
+        return WeakKeyDictionary()
+
+    def _concurrency_limit(self) -> asyncio.Semaphore | None:
+        """Get the usage limit of the running event loop.
+
+        Semaphores are bound to the loop they are first used in, so each loop
+        using the prop gets its own.
+        """
+        if self.max_concurrency is None:
+            return None
+        loop = asyncio.get_running_loop()
+        if (limit := self._concurrency_limits.get(loop)) is None:
+            limit = self._concurrency_limits[loop] = asyncio.Semaphore(
+                self.max_concurrency
+            )
+        return limit
+
+    @cached_property
+    def tool_definition(self) -> dict[str, Any]:
+        """The function definition of the prop used for tool calling.
+
+        The json schema generation of the params is expensive,
+        so the definition is compiled only once per prop.
+        """
+        definition: dict[str, Any] = {
+            "name": self.name,
+            "description": self.description,
+        }
+        if self.params is not None:
+            definition["parameters"] = self.params.model_json_schema()
+        return definition
+
     @classmethod
     @abc.abstractmethod
     def from_config(cls, config: PropConfig) -> Self:
@@ -47,7 +97,12 @@ class Prop(abc.ABC, Generic[P]):
             "Using prop {prop.name} with params: {params!r}", prop=self, params=params
         )
         try:
-            result = await self.call(timeline, params)
+            with span("prop.use", "prop", prop=self.name):
+                if (limit := self._concurrency_limit()) is None:
+                    result = await self._call_and_limit(timeline, params)
+                else:
+                    async with limit:
+                        result = await self._call_and_limit(timeline, params)
         except OperaFinished:
             logger.info("Prop {prop.name} ended the opera", prop=self)
             # allow prop to end the opera
@@ -64,6 +119,17 @@ class Prop(abc.ABC, Generic[P]):
 
         return result
 
+    async def _call_and_limit(self, timeline: "Timeline", params: P | None) -> Any:
+        result = await self.call(timeline, params)
+        # streamed results are consumed incrementally
+        if isinstance(result, AsyncIterator):
+            if self.result_limit is None:
+                return await join_stream(result)
+            return await self.result_limit.collect(self, result)
+        if self.result_limit is not None:
+            return await self.result_limit.apply(self, result)
+        return result
+
     @abc.abstractmethod
     async def call(self, timeline: "Timeline", params: P | None) -> Any:
         """Call function with the given parameters."""
@@ -0,0 +1,42 @@
+import atexit
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+import multiprocessing
+from typing import Literal, TypeAlias
+
+ExecutionMode: TypeAlias = Literal["loop", "thread", "process"]
+
+_executors: dict[tuple[ExecutionMode, int | None], Executor] = {}
+
+
+def get_executor(
+    mode: Literal["thread", "process"], max_workers: int | None = None
+) -> Executor:
+    """Get the executor shared by all props with the same mode and worker count.
+
+    Process pools use the `spawn` start method so that the workers do not inherit
+    the state of the running event loop.
+    """
+    key: tuple[ExecutionMode, int | None] = (mode, max_workers)
+    if (executor := _executors.get(key)) is None:
+        if mode == "thread":
+            executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="operagents-prop"
+            )
+        else:
+            executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        _executors[key] = executor
+    return executor
+
+
+def shutdown_executors(wait: bool = True) -> None:
+    """Shutdown all shared executors."""
+    while _executors:
+        _, executor = _executors.popitem()
+        executor.shutdown(wait=wait, cancel_futures=True)
+
+
+# the executors are shared by all operas in the process, shut them down on exit
+atexit.register(shutdown_executors)
@@ -1,15 +1,25 @@
-from collections.abc import Awaitable, Callable
+import asyncio
+from collections.abc import AsyncGenerator, AsyncIterator, Awaitable, Callable
+import functools
 import inspect
 from typing import TYPE_CHECKING, Any, ParamSpec, cast
 from typing_extensions import Self, TypeVar, override
 
 from pydantic import BaseModel
 
-from operagents.config import FunctionPropConfig, TemplateConfig
+from operagents.cache import CacheStats, MemoryCache, canonical_hash
+from operagents.config import FunctionPropConfig, PropCacheConfig, TemplateConfig
 from operagents.exception import OperagentsException, PropError
-from operagents.utils import get_template_renderer, resolve_dot_notation
+from operagents.log import logger
+from operagents.utils import (
+    generate_dot_notation,
+    get_template_renderer,
+    resolve_dot_notation,
+)
 
 from ._base import Prop
+from .executor import ExecutionMode, get_executor
+from .limit import PropResultLimit
 
 if TYPE_CHECKING:
     from operagents.timeline import Timeline
@@ -17,8 +27,31 @@ if TYPE_CHECKING:
 P = ParamSpec("P")
 M = TypeVar("M", bound=BaseModel, default=BaseModel)
 R = TypeVar("R", default=Any)
-FunctionNoParams = Callable[[], Awaitable[R]]
-FunctionWithParams = Callable[[M], Awaitable[R]]
+FunctionNoParams = Callable[[], Awaitable[R] | R]
+FunctionWithParams = Callable[[M], Awaitable[R] | R]
+
+_MISSING = object()
+
+_shared_caches: dict[str, MemoryCache[Any]] = {}
+
+
+def get_result_cache(
+    function: Callable[..., Any], config: PropCacheConfig
+) -> MemoryCache[Any]:
+    """Get the result cache of a function prop.
+
+    Shared caches are used by all props calling the same function
+    with the same cache config, e.g. across operas in the same process.
+    """
+    if not config.shared:
+        return MemoryCache(max_entries=config.max_entries, ttl=config.ttl)
+
+    key = f"{generate_dot_notation(function)}:{canonical_hash(config)}"
+    if (cache := _shared_caches.get(key)) is None:
+        cache = _shared_caches[key] = MemoryCache(
+            max_entries=config.max_entries, ttl=config.ttl
+        )
+    return cache
 
 
 class FunctionProp(Prop[M]):
@@ -31,10 +64,37 @@ class FunctionProp(Prop[M]):
         function: FunctionNoParams[R] | FunctionWithParams[M, R],
         *,
         exception_template: TemplateConfig,
+        timeout: float | None = None,
+        max_concurrency: int | None = None,
+        execution: ExecutionMode = "loop",
+        max_workers: int | None = None,
+        cache: MemoryCache[Any] | None = None,
+        result_limit: PropResultLimit | None = None,
     ) -> None:
         super().__init__()
 
         self.function = function
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+
+        if execution != "loop" and (
+            inspect.iscoroutinefunction(function)
+            or inspect.isasyncgenfunction(function)
+        ):
+            raise PropError(
+                f"Function prop {function.__name__} must be synchronous "
+                f"to be executed in {execution} mode."
+            )
+        self.execution: ExecutionMode = execution
+        """Where to run the function: event loop, thread pool or process pool."""
+        self.max_workers: int | None = max_workers
+        """The number of workers of the shared thread or process pool."""
+
+        self.cache: MemoryCache[Any] | None = cache
+        """The cache of successful results keyed by the params."""
+        self.cache_stats = CacheStats()
+        """The hit and miss counters of the result cache for this prop."""
+        self.result_limit = result_limit
 
         func_params = inspect.signature(function).parameters
         if func_params:
@@ -59,9 +119,24 @@ class FunctionProp(Prop[M]):
     def from_config(  # pyright: ignore[reportIncompatibleMethodOverride]
         cls, config: FunctionPropConfig
     ) -> Self:
+        function = resolve_dot_notation(config.function)
         return cls(
-            function=resolve_dot_notation(config.function),
+            function=function,
             exception_template=config.exception_template,
+            timeout=config.timeout,
+            max_concurrency=config.max_concurrency,
+            execution=config.execution,
+            max_workers=config.max_workers,
+            cache=(
+                get_result_cache(function, config.cache)
+                if config.cache is not None
+                else None
+            ),
+            result_limit=(
+                PropResultLimit.from_config(config.result_limit)
+                if config.result_limit is not None
+                else None
+            ),
         )
 
     @override
@@ -76,13 +151,68 @@ class FunctionProp(Prop[M]):
             cast(FunctionWithParams[M, R], self.function), params
         )
 
+    async def _dispatch(
+        self,
+        function: Callable[P, Awaitable[R] | R],
+        *args: P.args,
+        **kwargs: P.kwargs,
+    ) -> R:
+        if self.execution == "loop":
+            result = function(*args, **kwargs)
+            if inspect.isawaitable(result):
+                return await result
+            return cast(R, result)
+
+        # params are pickled to the worker in process mode
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            get_executor(self.execution, self.max_workers),
+            functools.partial(function, *args, **kwargs),
+        )
+        return cast(R, result)
+
     async def _call_with_catch(
-        self, function: Callable[P, Awaitable[R]], *args: P.args, **kwargs: P.kwargs
+        self,
+        function: Callable[P, Awaitable[R] | R],
+        *args: P.args,
+        **kwargs: P.kwargs,
     ) -> R | str:
+        key = None
+        if self.cache is not None:
+            key = canonical_hash({"args": args, "kwargs": kwargs})
+            cached = self.cache.get(key, _MISSING)
+            if cached is not _MISSING:
+                self.cache_stats.hits += 1
+                logger.debug("Prop {prop.name} result cache hit", prop=self)
+                return cast(R, cached)
+            self.cache_stats.misses += 1
+
         try:
-            return await function(*args, **kwargs)
+            result = await self._dispatch(function, *args, **kwargs)
         except OperagentsException:
             # bypass operagents exceptions
             raise
         except Exception as e:
             return await self.exception_renderer.render_async(prop=self, exc=e)
+
+        if isinstance(result, AsyncIterator):
+            return cast(R, self._guard_stream(result))
+
+        # only successful results are cached
+        if self.cache is not None and key is not None:
+            self.cache.set(key, result)
+        return result
+
+    async def _guard_stream(
+        self, stream: AsyncIterator[Any]
+    ) -> AsyncGenerator[Any, None]:
+        try:
+            async for chunk in stream:
+                yield chunk
+        except OperagentsException:
+            raise
+        except Exception as e:
+            yield await self.exception_renderer.render_async(prop=self, exc=e)
+        finally:
+            if inspect.isasyncgen(stream):
+                await stream.aclose()
@@ -0,0 +1,175 @@
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable
+import inspect
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Literal, TypeAlias
+from typing_extensions import Self
+from uuid import uuid4
+
+from pydantic_core import to_json
+
+from operagents.config import PropResultLimitConfig, TemplateConfig
+from operagents.log import logger
+from operagents.utils import get_template_renderer, resolve_dot_notation
+
+if TYPE_CHECKING:
+    from ._base import Prop
+
+LimitStrategy: TypeAlias = Literal["truncate", "head_tail", "function"]
+Summarizer: TypeAlias = Callable[[str, int], Awaitable[str] | str]
+
+
+async def join_stream(stream: AsyncIterator[Any]) -> str:
+    """Consume a streamed prop result completely."""
+    return "".join([str(chunk) async for chunk in stream])
+
+
+class PropResultLimit:
+    """Limit the size of prop results to protect the context of agents.
+
+    Results exceeding the limit are shortened by the strategy and
+    optionally spilled to a side store, referenced by the result id.
+    """
+
+    def __init__(
+        self,
+        max_chars: int,
+        *,
+        strategy: LimitStrategy = "truncate",
+        summarizer: Summarizer | None = None,
+        spill_path: Path | None = None,
+        truncated_template: TemplateConfig,
+    ) -> None:
+        if strategy == "function" and summarizer is None:
+            raise ValueError("A summarizer is required for the function strategy.")
+
+        self.max_chars: int = max_chars
+        """The maximum number of characters of a result."""
+        self.strategy: LimitStrategy = strategy
+        """How to shorten results exceeding the limit."""
+        self.summarizer: Summarizer | None = summarizer
+        """The function shortening results for the function strategy."""
+        self.spill_path: Path | None = spill_path
+        """The directory to store full results exceeding the limit in."""
+
+        self.truncated_renderer = get_template_renderer(truncated_template)
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}("
+            f"max_chars={self.max_chars}, strategy={self.strategy!r}, "
+            f"spill_path={self.spill_path!r}"
+            ")"
+        )
+
+    @classmethod
+    def from_config(cls, config: PropResultLimitConfig) -> Self:
+        limits = []
+        if config.max_chars is not None:
+            limits.append(config.max_chars)
+        if config.max_tokens is not None:
+            # estimate the characters since tokenizers are model specific
+            limits.append(int(config.max_tokens * config.chars_per_token))
+        return cls(
+            max_chars=min(limits),
+            strategy=config.strategy,
+            summarizer=(
+                resolve_dot_notation(config.function)
+                if config.function is not None
+                else None
+            ),
+            spill_path=Path(config.spill_path) if config.spill_path else None,
+            truncated_template=config.truncated_template,
+        )
+
+    def _write_spill(self, result_id: str, text: str) -> None:
+        assert self.spill_path is not None
+        self.spill_path.mkdir(parents=True, exist_ok=True)
+        (self.spill_path / f"{result_id}.txt").write_text(text, encoding="utf-8")
+
+    async def _spill(self, text: str) -> str | None:
+        if self.spill_path is None:
+            return None
+        result_id = uuid4().hex
+        # large results must not block the event loop while written
+        await asyncio.to_thread(self._write_spill, result_id, text)
+        return result_id
+
+    async def _shorten(self, text: str, budget: int) -> str:
+        if self.strategy == "truncate":
+            return text[:budget]
+        elif self.strategy == "head_tail":
+            separator = "\n...\n"
+            if budget <= len(separator):
+                return text[:budget]
+            head = (budget - len(separator)) // 2
+            tail = budget - len(separator) - head
+            return f"{text[:head]}{separator}{text[-tail:]}" if tail else text[:head]
+
+        assert self.summarizer is not None
+        summary = self.summarizer(text, budget)
+        if inspect.isawaitable(summary):
+            summary = await summary
+        # the summarizer is not trusted to respect the budget
+        return str(summary)[:budget]
+
+    async def _render(
+        self,
+        prop: "Prop[Any]",
+        text: str,
+        length: int,
+        complete: bool,
+        spill: bool,
+    ) -> str:
+        result_id = await self._spill(text) if spill else None
+        logger.debug(
+            "Prop {prop.name} result with {length} characters exceeds the limit",
+            prop=prop,
+            length=length,
+        )
+        params = {
+            "prop": prop,
+            "length": length,
+            "complete": complete,
+            "result_id": result_id,
+        }
+        # the notice of the template counts towards the limit
+        notice = await self.truncated_renderer.render_async(result="", **params)
+        budget = max(self.max_chars - len(notice), 0)
+        return await self.truncated_renderer.render_async(
+            result=await self._shorten(text, budget), **params
+        )
+
+    async def apply(self, prop: "Prop[Any]", result: Any) -> Any:
+        """Limit the size of a prop result."""
+        text = (
+            result
+            if isinstance(result, str)
+            else to_json(result, fallback=str).decode()
+        )
+        if len(text) <= self.max_chars:
+            return result
+        return await self._render(prop, text, len(text), True, True)
+
+    async def collect(self, prop: "Prop[Any]", stream: AsyncIterator[Any]) -> str:
+        """Consume a streamed prop result incrementally up to the limit."""
+        if self.strategy != "truncate" or self.spill_path is not None:
+            # the full result is required to shorten or spill
+            return await self.apply(prop, await join_stream(stream))
+
+        chunks: list[str] = []
+        length = 0
+        try:
+            async for chunk in stream:
+                text = str(chunk)
+                chunks.append(text)
+                length += len(text)
+                if length > self.max_chars:
+                    break
+            else:
+                return "".join(chunks)
+        finally:
+            if inspect.isasyncgen(stream):
+                await stream.aclose()
+
+        return await self._render(prop, "".join(chunks), length, False, False)
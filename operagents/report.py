@@ -0,0 +1,157 @@
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
+import math
+import random
+from typing_extensions import Self
+
+
+def percentile(sorted_samples: list[float], q: float) -> float:
+    """Get the nearest-rank percentile of sorted samples, `q` between 0 and 1."""
+    if not sorted_samples:
+        return 0.0
+    index = math.ceil(q * len(sorted_samples)) - 1
+    return sorted_samples[min(len(sorted_samples) - 1, max(0, index))]
+
+
+@dataclass(kw_only=True)
+class LatencySummary:
+    """Latency distribution of a run component in seconds."""
+
+    count: int = 0
+    """The number of measured operations."""
+    total: float = 0.0
+    """The total time spent."""
+    mean: float = 0.0
+    """The mean latency."""
+    p50: float = 0.0
+    """The median latency."""
+    p95: float = 0.0
+    """The 95th percentile latency."""
+    p99: float = 0.0
+    """The 99th percentile latency."""
+    max: float = 0.0
+    """The maximum latency."""
+
+    @classmethod
+    def from_samples(cls, samples: Iterable[float]) -> Self:
+        ordered = sorted(samples)
+        if not ordered:
+            return cls()
+        total = sum(ordered)
+        return cls(
+            count=len(ordered),
+            total=total,
+            mean=total / len(ordered),
+            p50=percentile(ordered, 0.5),
+            p95=percentile(ordered, 0.95),
+            p99=percentile(ordered, 0.99),
+            max=ordered[-1],
+        )
+
+
+class LatencyReservoir:
+    """Latency samples of a run component with bounded memory.
+
+    The count, total and maximum are exact. Percentiles are computed from a
+    uniform random sample of at most `size` latencies.
+    """
+
+    def __init__(self, size: int = 1024, *, seed: int | None = None) -> None:
+        self.size: int = size
+        """The maximum number of samples kept."""
+        self.count: int = 0
+        """The number of recorded latencies."""
+        self.total: float = 0.0
+        """The sum of the recorded latencies."""
+        self.max: float = 0.0
+        """The maximum recorded latency."""
+        self.samples: list[float] = []
+        """The sampled latencies."""
+
+        self._random = random.Random(seed)
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}("
+            f"size={self.size}, count={self.count}, total={self.total}"
+            ")"
+        )
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, latency: float) -> None:
+        """Record a latency."""
+        self.count += 1
+        self.total += latency
+        self.max = max(self.max, latency)
+        if len(self.samples) < self.size:
+            self.samples.append(latency)
+        elif (index := self._random.randrange(self.count)) < self.size:
+            self.samples[index] = latency
+
+    def summary(self) -> LatencySummary:
+        """Summarize the recorded latencies."""
+        if not self.count:
+            return LatencySummary()
+        ordered = sorted(self.samples)
+        return LatencySummary(
+            count=self.count,
+            total=self.total,
+            mean=self.total / self.count,
+            p50=percentile(ordered, 0.5),
+            p95=percentile(ordered, 0.95),
+            p99=percentile(ordered, 0.99),
+            max=self.max,
+        )
+
+
+@dataclass(kw_only=True)
+class RunReport:
+    """Throughput and latency summary of an opera run."""
+
+    duration: float = 0.0
+    """The wall time of the run in seconds."""
+    turns: int = 0
+    """The number of character acts."""
+    turns_per_second: float = 0.0
+    """The throughput of character acts."""
+    components: dict[str, LatencySummary] = field(default_factory=dict)
+    """The latency of acts, generations, props, flows, directors and hooks."""
+
+    @classmethod
+    def from_durations(
+        cls,
+        duration: float,
+        turns: int,
+        durations: Mapping[str, LatencyReservoir | Iterable[float]],
+    ) -> Self:
+        return cls(
+            duration=duration,
+            turns=turns,
+            turns_per_second=turns / duration if duration > 0 else 0.0,
+            components={
+                component: (
+                    samples.summary()
+                    if isinstance(samples, LatencyReservoir)
+                    else LatencySummary.from_samples(samples)
+                )
+                for component, samples in durations.items()
+            },
+        )
+
+    def format(self) -> str:
+        """Format the report as a text table in milliseconds."""
+        lines = [
+            f"{self.turns} turns in {self.duration:.3f}s "
+            f"({self.turns_per_second:.2f} turns/s)",
+            f"{'component (ms)':<16}{'count':>8}{'total':>12}"
+            f"{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}",
+        ]
+        lines.extend(
+            f"{name:<16}{s.count:>8}{s.total * 1000:>12.2f}"
+            f"{s.p50 * 1000:>10.2f}{s.p95 * 1000:>10.2f}"
+            f"{s.p99 * 1000:>10.2f}{s.max * 1000:>10.2f}"
+            for name, s in self.components.items()
+        )
+        return "\n".join(lines)
@@ -40,4 +40,4 @@ class PrefaceScenePrepare(ScenePrepare):
         event = await character.fake_act(
             timeline, self.content, do_observe=timeline.current_act_num != 0
         )
-        timeline.events.append(event)
+        timeline.record_event(event)
@@ -1,13 +1,21 @@
-from contextlib import AsyncExitStack
+import asyncio
+from collections import defaultdict
+from collections.abc import Generator, Sequence
+from contextlib import AsyncExitStack, contextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass
+import time
 from types import TracebackType
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Literal, overload
 from typing_extensions import Self
 from uuid import UUID, uuid4
 import weakref
 
 from operagents.exception import SceneNotPrepared, TimelineNotStarted
 from operagents.log import logger
+from operagents.report import LatencyReservoir, RunReport
+from operagents.tracing import span
+from operagents.usage import usage_scope
 
 from .event import TimelineEvent as TimelineEvent
 from .event import (
@@ -22,9 +30,14 @@ from .event import (
 if TYPE_CHECKING:
     from operagents.agent import Agent
     from operagents.character import Character
+    from operagents.director import Decision
     from operagents.opera import Opera
     from operagents.scene import Scene
 
+_acting_character: ContextVar["Character | None"] = ContextVar(
+    "operagents_acting_character", default=None
+)
+
 
 @dataclass(eq=False, kw_only=True)
 class SceneSession:
@@ -38,6 +51,34 @@ class SceneSession:
     """Character in the session."""
 
 
+class EventHistory(Sequence[TimelineEvent]):
+    """A read-only view of the event history.
+
+    Events are recorded by the timeline only, so that the session index
+    stays in sync with the history.
+    """
+
+    __slots__ = ("_events",)
+
+    def __init__(self, events: list[TimelineEvent]) -> None:
+        self._events = events
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self._events!r})"
+
+    @overload
+    def __getitem__(self, index: int) -> TimelineEvent: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[TimelineEvent]: ...
+
+    def __getitem__(self, index: int | slice) -> TimelineEvent | list[TimelineEvent]:
+        return self._events[index]
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+
 class Timeline:
     def __init__(self, opera: "Opera") -> None:
         self._opera_ref = weakref.ref(opera)
@@ -47,6 +88,17 @@ class Timeline:
 
         self._current_session: SceneSession | None = None
 
+        self._session_events: dict[UUID, list[TimelineEvent]] = {}
+        self._session_acts: dict[UUID, list[TimelineEventSessionAct]] = {}
+
+        self.durations: defaultdict[str, LatencyReservoir] = defaultdict(
+            LatencyReservoir
+        )
+        """The measured latencies of the run components in seconds."""
+        self.hook_failures: defaultdict[str, int] = defaultdict(int)
+        """The number of failed hook handler runs by hook class."""
+        self._started_at: float | None = None
+
     @property
     def opera(self) -> "Opera":
         """The opera this timeline belongs to."""
@@ -56,18 +108,41 @@ class Timeline:
         return opera
 
     @property
-    def events(self) -> list[TimelineEvent]:
+    def events(self) -> EventHistory:
         """The timeline's event history."""
         if self._events is None:
             raise TimelineNotStarted("The timeline has not been started.")
-        return self._events
+        return EventHistory(self._events)
+
+    def record_event(self, event: TimelineEvent) -> None:
+        """Record an event in the history without invoking hooks."""
+        if self._events is None:
+            raise TimelineNotStarted("The timeline has not been started.")
+        self._events.append(event)
+        if isinstance(event, TimelineSessionEvent):
+            self._session_events.setdefault(event.session_id, []).append(event)
+            if isinstance(event, TimelineEventSessionAct):
+                self._session_acts.setdefault(event.session_id, []).append(event)
 
     async def encounter_event(self, event: TimelineEvent) -> None:
         """Encounter an event."""
-        self.events.append(event)
-        # invoke hooks sequentially
-        for hook in self.opera.hooks:
-            await hook.invoke(self, event)
+        self.record_event(event)
+        # invoke the subscribed hooks sequentially
+        for hook, handler in self.opera.hook_handlers.get(event.type_):
+            start = time.perf_counter()
+            if not await hook.run(handler, self, event):
+                self.hook_failures[hook.__class__.__name__] += 1
+            self.durations["hook"].append(time.perf_counter() - start)
+
+    def report(self) -> RunReport:
+        """Summarize the throughput and latency of the run so far."""
+        if self._started_at is None:
+            raise TimelineNotStarted("The timeline has not been started.")
+        return RunReport.from_durations(
+            time.monotonic() - self._started_at,
+            self.durations["act"].count,
+            self.durations,
+        )
 
     @property
     def current_session(self) -> SceneSession:
@@ -88,32 +163,44 @@ class Timeline:
 
     @property
     def current_character(self) -> "Character":
-        """The current character."""
+        """The current character.
+
+        In a group of characters acting concurrently, the character acting
+        in the current task.
+        """
+        if (character := _acting_character.get()) is not None:
+            return character
         if (character := self.current_session.character) is None:
             raise SceneNotPrepared("The scene has not been prepared.")
         return character
 
     def session_events(self, session_id: UUID) -> list[TimelineEvent]:
         """Get the events in the scene session."""
-        return [
-            event
-            for event in self.events
-            if isinstance(event, TimelineSessionEvent)
-            and event.session_id == session_id
-        ]
+        if self._events is None:
+            raise TimelineNotStarted("The timeline has not been started.")
+        return list(self._session_events.get(session_id, ()))
 
     @property
     def current_events(self) -> list[TimelineEvent]:
         """The events in the current scene session."""
         return self.session_events(self.current_session_id)
 
+    def session_acts(self, session_id: UUID) -> list[TimelineEventSessionAct]:
+        """Get the act events in the scene session."""
+        if self._events is None:
+            raise TimelineNotStarted("The timeline has not been started.")
+        return list(self._session_acts.get(session_id, ()))
+
+    @property
+    def current_acts(self) -> list[TimelineEventSessionAct]:
+        """The act events in the current scene session."""
+        return self.session_acts(self.current_session_id)
+
     def session_act_num(self, session_id: UUID) -> int:
         """Get the number of acts in the scene session."""
-        return sum(
-            1
-            for event in self.session_events(session_id)
-            if isinstance(event, TimelineEventSessionAct)
-        )
+        if self._events is None:
+            raise TimelineNotStarted("The timeline has not been started.")
+        return len(self._session_acts.get(session_id, ()))
 
     @property
     def current_act_num(self) -> int:
@@ -137,22 +224,93 @@ class Timeline:
         """Events since the last time the agent acted in current scene session."""
         return self.session_past_events(agent, self.current_session_id)
 
+    @contextmanager
+    def _phase(
+        self, component: Literal["flow", "director"], name: str
+    ) -> Generator[None, None, None]:
+        """Attribute, trace and measure a flow or director decision."""
+        start = time.perf_counter()
+        try:
+            with (
+                usage_scope(
+                    component,
+                    scene=self.current_scene.name,
+                    session_id=self.current_session_id,
+                ),
+                span(name, component, scene=self.current_scene.name),
+            ):
+                yield
+        finally:
+            self.durations[component].append(time.perf_counter() - start)
+
     async def _begin_character(self) -> "Character":
         """Get the first character to act in the scene."""
-        return await self.current_scene.flow.begin(self)
+        with self._phase("flow", "flow.begin"):
+            return await self.current_scene.flow.begin(self)
 
     async def _next_character(self) -> "Character":
         """Get the next character to act in the scene."""
-        return await self.current_scene.flow.next(self)
+        with self._phase("flow", "flow.next"):
+            return await self.current_scene.flow.next(self)
+
+    async def _act(self, character: "Character") -> TimelineEventSessionAct:
+        """Make the character act without committing the event."""
+        token = _acting_character.set(character)
+        try:
+            start = time.perf_counter()
+            with span(
+                "character.act",
+                "agent",
+                agent=character.agent_name,
+                character=character.name,
+            ):
+                event = await character.act(self)
+            self.durations["act"].append(time.perf_counter() - start)
+            return event
+        finally:
+            _acting_character.reset(token)
+
+    async def _commit_acts(self, events: list[TimelineEventSessionAct]) -> None:
+        """Commit the act events in order."""
+        for event in events:
+            if event.generation_duration is not None:
+                self.durations["generation"].append(event.generation_duration)
+            if event.prop_duration is not None:
+                self.durations["prop"].append(event.prop_duration)
+            await self.encounter_event(event)
 
     async def _character_act(self) -> None:
-        """Make the current character act in the scene."""
-        event = await self.current_character.act(self)
-        await self.encounter_event(event)
+        """Make the current character, or its group, act in the scene."""
+        group = await self.current_scene.flow.group(self, self.current_character)
+        if len(group) == 1:
+            await self._commit_acts([await self._act(group[0])])
+            return
+
+        # act concurrently on the same snapshot of the timeline
+        tasks = [asyncio.create_task(self._act(character)) for character in group]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # the finished acts are already remembered by their agents,
+            # commit them to keep the timeline consistent
+            await self._commit_acts(
+                [
+                    task.result()
+                    for task in tasks
+                    if not task.cancelled() and task.exception() is None
+                ]
+            )
+            raise
+        # commit the events in the group order
+        await self._commit_acts([task.result() for task in tasks])
 
-    async def _next_scene(self) -> "Scene | None":
-        """Get the next scene."""
-        return await self.current_scene.director.next_scene(self)
+    async def _decide(self) -> "Decision":
+        """Decide the next scene and maybe the next character."""
+        with self._phase("director", "director.decide"):
+            return await self.current_scene.director.decide(self)
 
     async def _prepare_scene(self) -> None:
         """Prepare the current scene."""
@@ -178,36 +336,50 @@ class Timeline:
 
     async def next_time(self) -> None:
         """Go to the next character or scene."""
-        logger.debug(
-            "Current character {current_character.name} starts to act.",
-            scene=self.current_scene,
-            current_character=self.current_character,
-        )
-        # OperationFinished may be raise here by props
-        await self._character_act()
-        # OperationFinished may be raise here by director
-        if next_scene := await self._next_scene():
-            # change to next scene
-            logger.info(
-                "Next scene: {next_scene}.",
-                scene=self.current_scene,
-                next_scene=next_scene,
-            )
-            await self._switch_scene(next_scene)
-
-            await self._switch_character(await self._begin_character())
-        else:
-            # continue current scene with next character
-            await self._switch_character(await self._next_character())
+        with span(
+            "timeline.next_time",
+            "timeline",
+            scene=self.current_scene.name,
+            character=self.current_character.name,
+        ):
             logger.debug(
-                "Next character: {next_character.name}",
+                "Current character {current_character.name} starts to act.",
                 scene=self.current_scene,
-                next_character=self.current_character,
+                current_character=self.current_character,
             )
+            # OperationFinished may be raise here by props
+            await self._character_act()
+            # OperationFinished may be raise here by director
+            decision = await self._decide()
+            if next_scene := decision.scene:
+                # change to next scene
+                logger.info(
+                    "Next scene: {next_scene}.",
+                    scene=self.current_scene,
+                    next_scene=next_scene,
+                )
+                await self._switch_scene(next_scene)
+
+                await self._switch_character(await self._begin_character())
+            else:
+                # continue current scene with next character
+                await self._switch_character(
+                    decision.character or await self._next_character()
+                )
+                logger.debug(
+                    "Next character: {next_character.name}",
+                    scene=self.current_scene,
+                    next_character=self.current_character,
+                )
 
     async def __aenter__(self) -> Self:
         self._events = []
+        self._session_events = {}
+        self._session_acts = {}
         self._exit_stack = AsyncExitStack()
+        self.durations.clear()
+        self.hook_failures.clear()
+        self._started_at = time.monotonic()
 
         for agent in self.opera.agents.values():
             await self._exit_stack.enter_async_context(agent)
@@ -239,5 +411,8 @@ class Timeline:
                     await self._exit_stack.aclose()
         finally:
             self._events = None
+            self._session_events = {}
+            self._session_acts = {}
             self._exit_stack = None
             self._current_session = None
+            self._started_at = None
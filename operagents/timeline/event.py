@@ -1,26 +1,30 @@
 from typing import Annotated, Literal, TypeAlias
 from uuid import UUID
 
-from pydantic import BaseModel, ConfigDict, Field, field_serializer
+from pydantic import ConfigDict, Field, field_serializer
 
 from operagents.character import Character
 from operagents.scene import Scene
-from operagents.utils import character_serializer, scene_serializer
+from operagents.utils import (
+    TimestampedEvent,
+    character_serializer,
+    scene_serializer,
+)
 
 
-class TimelineEventStart(BaseModel):
+class TimelineEventStart(TimestampedEvent):
     """Event indicating the start of a timeline."""
 
     type_: Literal["start"] = "start"
 
 
-class TimelineEventEnd(BaseModel):
+class TimelineEventEnd(TimestampedEvent):
     """Event indicating the end of a timeline."""
 
     type_: Literal["end"] = "end"
 
 
-class TimelineSessionEvent(BaseModel):
+class TimelineSessionEvent(TimestampedEvent):
     """Abstract class for timeline events that are associated with a session."""
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
@@ -39,6 +43,10 @@ class TimelineEventSessionAct(TimelineSessionEvent):
     type_: Literal["session_act"] = "session_act"
     character: Character
     content: str
+    duration: float | None = None
+    generation_duration: float | None = None
+    prop_duration: float | None = None
+    props: list[str] = Field(default_factory=list)
 
     _character_serializer = field_serializer("character")(character_serializer)
 
@@ -0,0 +1,256 @@
+import asyncio
+from collections.abc import Generator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import json
+import os
+from pathlib import Path
+import threading
+import time
+from types import TracebackType
+from typing import Any, Literal, TypeAlias
+from typing_extensions import Self
+
+from operagents.config import TracingConfig
+from operagents.log import logger
+
+TraceFormat: TypeAlias = Literal["chrome", "otlp"]
+
+
+@dataclass(kw_only=True)
+class Span:
+    """A timed operation."""
+
+    name: str
+    """The name of the operation."""
+    category: str
+    """The component of the operation."""
+    span_id: int
+    """The unique id of the span in the trace."""
+    parent_id: int | None
+    """The id of the enclosing span."""
+    lane: int
+    """The task the span runs in, spans of the same lane are nested."""
+    start_ns: int
+    """The wall-clock start time in nanoseconds."""
+    duration_ns: int = 0
+    """The monotonic duration in nanoseconds."""
+    attributes: dict[str, Any] = field(default_factory=dict)
+    """Extra information of the operation."""
+    error: str | None = None
+    """The error raised by the operation."""
+
+
+class _SpanContext:
+    __slots__ = ("_start", "_token", "span", "tracer")
+
+    def __init__(self, tracer: "Tracer", span: Span) -> None:
+        self.tracer = tracer
+        self.span = span
+
+    def set(self, **attributes: Any) -> None:
+        self.span.attributes.update(attributes)
+
+    def __enter__(self) -> Self:
+        self._token = _current_span.set(self.span)
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.span.duration_ns = time.perf_counter_ns() - self._start
+        if exc_value is not None:
+            self.span.error = f"{exc_type.__name__ if exc_type else ''}: {exc_value}"
+        _current_span.reset(self._token)
+        self.tracer.spans.append(self.span)
+
+
+class _NoopSpanContext:
+    __slots__ = ()
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpanContext()
+
+
+class Tracer:
+    """Collect spans of a run and export them to a trace file."""
+
+    def __init__(self, path: Path | None = None, format: TraceFormat = "chrome"):
+        self.path: Path | None = path
+        """The file to export the trace to."""
+        self.format: TraceFormat = format
+        """The trace file format."""
+
+        self.trace_id: int = int.from_bytes(os.urandom(16), "big")
+        """The unique id of the trace."""
+        self.spans: list[Span] = []
+        """The finished spans."""
+
+        self._next_id: int = 1
+        self._lanes: dict[int, int] = {}
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}("
+            f"path={self.path!r}, format={self.format!r}, spans={len(self.spans)}"
+            ")"
+        )
+
+    @classmethod
+    def from_config(cls, config: TracingConfig) -> Self:
+        return cls(path=Path(config.path), format=config.format)
+
+    def _lane(self) -> int:
+        try:
+            key = id(asyncio.current_task())
+        except RuntimeError:
+            key = threading.get_ident()
+        if (lane := self._lanes.get(key)) is None:
+            lane = self._lanes[key] = len(self._lanes) + 1
+        return lane
+
+    def span(self, name: str, category: str, **attributes: Any) -> _SpanContext:
+        """Create a span of an operation."""
+        parent = _current_span.get()
+        span_id = self._next_id
+        self._next_id += 1
+        return _SpanContext(
+            self,
+            Span(
+                name=name,
+                category=category,
+                span_id=span_id,
+                parent_id=parent.span_id if parent is not None else None,
+                lane=self._lane(),
+                start_ns=time.time_ns(),
+                attributes=attributes,
+            ),
+        )
+
+    def to_chrome(self) -> dict[str, Any]:
+        """Get the trace in the Chrome trace event format."""
+        pid = os.getpid()
+        return {
+            "traceEvents": [
+                {
+                    "name": span.name,
+                    "cat": span.category,
+                    "ph": "X",
+                    "ts": span.start_ns / 1000,
+                    "dur": span.duration_ns / 1000,
+                    "pid": pid,
+                    "tid": span.lane,
+                    "args": {
+                        **{k: _to_str(v) for k, v in span.attributes.items()},
+                        **({"error": span.error} if span.error else {}),
+                    },
+                }
+                for span in sorted(self.spans, key=lambda s: s.start_ns)
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+    def _to_otlp_span(self, span: Span) -> dict[str, Any]:
+        attributes = {"operagents.category": span.category, **span.attributes}
+        data: dict[str, Any] = {
+            "traceId": f"{self.trace_id:032x}",
+            "spanId": f"{span.span_id:016x}",
+            "name": span.name,
+            "kind": 1,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.start_ns + span.duration_ns),
+            "attributes": [
+                {"key": key, "value": {"stringValue": _to_str(value)}}
+                for key, value in attributes.items()
+            ],
+            "status": (
+                {"code": 2, "message": span.error} if span.error else {"code": 1}
+            ),
+        }
+        if span.parent_id is not None:
+            data["parentSpanId"] = f"{span.parent_id:016x}"
+        return data
+
+    def to_otlp(self) -> dict[str, Any]:
+        """Get the trace in the OTLP JSON format."""
+        resource = {
+            "attributes": [
+                {"key": "service.name", "value": {"stringValue": "operagents"}}
+            ]
+        }
+        return {
+            "resourceSpans": [
+                {
+                    "resource": resource,
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "operagents"},
+                            "spans": [self._to_otlp_span(span) for span in self.spans],
+                        }
+                    ],
+                }
+            ]
+        }
+
+    def export(self, path: Path | None = None) -> None:
+        """Write the trace file."""
+        if (path := path or self.path) is None:
+            raise ValueError("No path to export the trace to.")
+        data = self.to_chrome() if self.format == "chrome" else self.to_otlp()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(data), encoding="utf-8")
+        logger.info(
+            "Exported {count} spans to {path}", count=len(self.spans), path=str(path)
+        )
+
+
+def _to_str(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    if (name := getattr(value, "name", None)) is not None and isinstance(name, str):
+        return name
+    return str(value)
+
+
+_current_tracer: ContextVar[Tracer | None] = ContextVar(
+    "operagents_tracer", default=None
+)
+_current_span: ContextVar[Span | None] = ContextVar(
+    "operagents_trace_span", default=None
+)
+
+
+def span(
+    name: str, category: str, **attributes: Any
+) -> _SpanContext | _NoopSpanContext:
+    """Trace an operation if tracing is enabled in the context.
+
+    A shared no-op context is returned when tracing is disabled.
+    """
+    if (tracer := _current_tracer.get()) is None:
+        return _NOOP_SPAN
+    return tracer.span(name, category, **attributes)
+
+
+@contextmanager
+def tracing(tracer: Tracer) -> Generator[Tracer, None, None]:
+    """Trace the operations in the context with the tracer."""
+    token = _current_tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _current_tracer.reset(token)
@@ -0,0 +1,229 @@
+from collections.abc import Generator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Literal, TypeAlias
+from typing_extensions import Self
+from uuid import UUID
+
+from operagents.config import UsageBudgetConfig, UsageConfig, UsagePriceConfig
+from operagents.exception import OperaFinished
+from operagents.log import logger
+
+UsageComponent: TypeAlias = Literal["agent", "summary", "flow", "director"]
+
+
+@dataclass(kw_only=True)
+class Usage:
+    """Token usage of backend requests."""
+
+    requests: int = 0
+    """The number of requests."""
+    prompt_tokens: int = 0
+    """The number of tokens in the prompts."""
+    completion_tokens: int = 0
+    """The number of tokens in the generated completions."""
+    cached_tokens: int = 0
+    """The number of prompt tokens served from the prompt cache of the provider."""
+    cost: float = 0.0
+    """The cost computed by the configured prices."""
+
+    @property
+    def total_tokens(self) -> int:
+        """The total number of tokens."""
+        return self.prompt_tokens + self.completion_tokens
+
+    def add(self, other: "Usage") -> None:
+        """Accumulate another usage."""
+        self.requests += other.requests
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.cached_tokens += other.cached_tokens
+        self.cost += other.cost
+
+
+@dataclass(frozen=True, kw_only=True)
+class UsageScope:
+    """What a backend request is made for."""
+
+    component: UsageComponent
+    """The component making the request."""
+    agent: str | None = None
+    """The name of the agent making the request."""
+    character: str | None = None
+    """The name of the character acted by the agent."""
+    scene: str | None = None
+    """The name of the scene."""
+    session_id: UUID | None = None
+    """The scene session."""
+
+
+@dataclass(kw_only=True)
+class UsageReport:
+    """Token usage of a run, aggregated by attribution."""
+
+    total: Usage = field(default_factory=Usage)
+    """The usage of all requests."""
+    by_component: dict[str, Usage] = field(default_factory=dict)
+    """The usage of agents, summaries, flows and directors."""
+    by_agent: dict[str, Usage] = field(default_factory=dict)
+    """The usage by agent name."""
+    by_character: dict[str, Usage] = field(default_factory=dict)
+    """The usage by character, keyed by `scene.character`."""
+    by_scene: dict[str, Usage] = field(default_factory=dict)
+    """The usage by scene name."""
+    by_session: dict[str, Usage] = field(default_factory=dict)
+    """The usage by scene session id."""
+    by_model: dict[str, Usage] = field(default_factory=dict)
+    """The usage by model name."""
+
+
+class UsageTracker:
+    """Accumulate the token usage of a run and enforce the budget."""
+
+    def __init__(
+        self,
+        *,
+        prices: dict[str, UsagePriceConfig] | None = None,
+        budget: UsageBudgetConfig | None = None,
+    ) -> None:
+        self.prices: dict[str, UsagePriceConfig] = prices or {}
+        """The prices per million tokens by model."""
+        self.budget: UsageBudgetConfig | None = budget
+        """The limits of the run."""
+
+        self.report = UsageReport()
+        """The accumulated usage."""
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(total={self.report.total!r})"
+
+    @classmethod
+    def from_config(cls, config: UsageConfig) -> Self:
+        return cls(prices=config.prices, budget=config.budget)
+
+    def reset(self) -> None:
+        """Clear the accumulated usage."""
+        self.report = UsageReport()
+
+    def record(self, model: str, usage: Usage, scope: UsageScope | None) -> None:
+        """Accumulate the usage of a request."""
+        if (price := self.prices.get(model)) is not None:
+            usage.cost = (
+                (usage.prompt_tokens - usage.cached_tokens) * price.prompt
+                + usage.cached_tokens
+                * (price.cached if price.cached is not None else price.prompt)
+                + usage.completion_tokens * price.completion
+            ) / 1_000_000
+
+        report = self.report
+        targets = [report.total, report.by_model.setdefault(model, Usage())]
+        if scope is not None:
+            targets.append(report.by_component.setdefault(scope.component, Usage()))
+            if scope.agent is not None:
+                targets.append(report.by_agent.setdefault(scope.agent, Usage()))
+            if scope.scene is not None:
+                targets.append(report.by_scene.setdefault(scope.scene, Usage()))
+                if scope.character is not None:
+                    targets.append(
+                        report.by_character.setdefault(
+                            f"{scope.scene}.{scope.character}", Usage()
+                        )
+                    )
+            if scope.session_id is not None:
+                targets.append(
+                    report.by_session.setdefault(str(scope.session_id), Usage())
+                )
+        for target in targets:
+            target.add(usage)
+
+    def exceeded(self) -> str | None:
+        """Get the exceeded limit of the budget, if any."""
+        if self.budget is None:
+            return None
+        total = self.report.total
+        limits = {
+            "max_requests": total.requests,
+            "max_prompt_tokens": total.prompt_tokens,
+            "max_completion_tokens": total.completion_tokens,
+            "max_total_tokens": total.total_tokens,
+            "max_cost": total.cost,
+        }
+        for name, value in limits.items():
+            if (limit := getattr(self.budget, name)) is not None and value >= limit:
+                return name
+        return None
+
+    def check_budget(self) -> None:
+        """Finish the opera if the budget is exceeded."""
+        if name := self.exceeded():
+            logger.warning(
+                "Usage budget {name} exceeded, finishing opera: {total}",
+                name=name,
+                total=self.report.total,
+            )
+            raise OperaFinished()
+
+
+_current_tracker: ContextVar[UsageTracker | None] = ContextVar(
+    "operagents_usage_tracker", default=None
+)
+_current_scope: ContextVar[UsageScope | None] = ContextVar(
+    "operagents_usage_scope", default=None
+)
+
+
+@contextmanager
+def usage_tracking(tracker: UsageTracker) -> Generator[UsageTracker, None, None]:
+    """Record the usage of backend requests in the context to the tracker."""
+    token = _current_tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _current_tracker.reset(token)
+
+
+@contextmanager
+def usage_scope(
+    component: UsageComponent,
+    *,
+    agent: str | None = None,
+    character: str | None = None,
+    scene: str | None = None,
+    session_id: UUID | None = None,
+) -> Generator[UsageScope, None, None]:
+    """Attribute the usage of backend requests in the context."""
+    scope = UsageScope(
+        component=component,
+        agent=agent,
+        character=character,
+        scene=scene,
+        session_id=session_id,
+    )
+    token = _current_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _current_scope.reset(token)
+
+
+def record_usage(
+    model: str,
+    *,
+    prompt_tokens: int = 0,
+    completion_tokens: int = 0,
+    cached_tokens: int = 0,
+) -> None:
+    """Record the usage of a backend request made in the current context."""
+    if (tracker := _current_tracker.get()) is None:
+        return
+    tracker.record(
+        model,
+        Usage(
+            requests=1,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            cached_tokens=cached_tokens,
+        ),
+        _current_scope.get(),
+    )
@@ -1,10 +1,11 @@
 from collections.abc import Generator
 import importlib
 from pathlib import Path
+import time
 from typing import TYPE_CHECKING, Any, TypeVar
 
 import jinja2
-from pydantic import SerializerFunctionWrapHandler
+from pydantic import BaseModel, Field, SerializerFunctionWrapHandler
 from pydantic_core import to_json
 
 from operagents.config import TemplateConfig
@@ -20,6 +21,15 @@ if TYPE_CHECKING:
 T = TypeVar("T")
 
 
+class TimestampedEvent(BaseModel):
+    """Base class for events recording when they happened."""
+
+    timestamp: float = Field(default_factory=time.time)
+    """The wall-clock time of the event in seconds since the epoch."""
+    monotonic: float = Field(default_factory=time.monotonic)
+    """The monotonic time of the event in seconds, for measuring intervals."""
+
+
 def resolve_dot_notation(obj_str: str) -> Any:
     """Resolve a string to an object using dot notation.
 
@@ -0,0 +1,58 @@
+"""Benchmark dispatching timeline events to hooks.
+
+Usage: python scripts/benchmark_hook_dispatch.py [HOOK_NUM] [EVENT_NUM]
+"""
+
+import asyncio
+import sys
+import time
+from typing import Any
+
+from operagents.hook import Hook, HookDispatchTable
+
+EVENT_TYPES = ["start", "session_start", "session_act", "session_end", "end"]
+
+
+class ActHook(Hook):
+    type_ = "benchmark"
+
+    @classmethod
+    def from_config(cls, config: Any) -> "ActHook":
+        return cls()
+
+    async def on_timeline_session_act(self, timeline: Any, event: Any) -> None:
+        pass
+
+
+class Event:
+    def __init__(self, type_: str) -> None:
+        self.type_ = type_
+
+
+async def main(hook_num: int, event_num: int) -> None:
+    hooks: list[Hook] = [ActHook() for _ in range(hook_num)]
+    events = [Event(EVENT_TYPES[i % len(EVENT_TYPES)]) for i in range(event_num)]
+    timeline: Any = None
+
+    start = time.perf_counter()
+    for event in events:
+        for hook in hooks:
+            await hook.invoke(timeline, event)  # pyright: ignore[reportArgumentType]
+    invoke_time = time.perf_counter() - start
+
+    table = HookDispatchTable(hooks)
+    start = time.perf_counter()
+    for event in events:
+        for hook, handler in table.get(event.type_):
+            await hook.run(handler, timeline, event)  # pyright: ignore[reportArgumentType]
+    table_time = time.perf_counter() - start
+
+    print(f"hooks: {hook_num}, events: {event_num}")  # noqa: T201
+    print(f"invoke all: {invoke_time / event_num * 1e6:.2f} us/event")  # noqa: T201
+    print(f"dispatch table: {table_time / event_num * 1e6:.2f} us/event")  # noqa: T201
+
+
+if __name__ == "__main__":
+    hook_num = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    event_num = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    asyncio.run(main(hook_num, event_num))
@@ -0,0 +1,62 @@
+"""Benchmark choosing the next character of the order flow.
+
+Usage: python scripts/benchmark_order_flow.py [CHARACTER_NUM] [TURN_NUM]
+"""
+
+import asyncio
+import sys
+import time
+from types import SimpleNamespace
+from typing import Any
+from uuid import uuid4
+
+from operagents.character import Character
+from operagents.flow import OrderFlow
+
+
+async def index_next(timeline: Any, order: list[str]) -> Character:
+    # the rotation searching the order on every turn
+    character_names = list(order)
+    next_character_name = character_names[
+        (character_names.index(timeline.current_character.name) + 1)
+        % len(character_names)
+    ]
+    return timeline.current_scene.characters[next_character_name]
+
+
+async def main(character_num: int, turn_num: int) -> None:
+    characters = {
+        f"character_{i}": Character(
+            name=f"character_{i}", description=None, agent_name="test"
+        )
+        for i in range(character_num)
+    }
+    order = list(characters)
+    timeline: Any = SimpleNamespace(
+        current_scene=SimpleNamespace(characters=characters),
+        current_session_id=uuid4(),
+        current_character=None,
+    )
+
+    timeline.current_character = characters[order[0]]
+    start = time.perf_counter()
+    for _ in range(turn_num):
+        timeline.current_character = await index_next(timeline, order)
+    index_time = time.perf_counter() - start
+
+    flow = OrderFlow(order=list(order))
+    timeline.current_character = await flow.begin(timeline)
+    start = time.perf_counter()
+    for _ in range(turn_num):
+        timeline.current_character = await flow.next(timeline)
+    cursor_time = time.perf_counter() - start
+
+    print(f"characters: {character_num}, turns: {turn_num}")  # noqa: T201
+    print(f"index: {index_time / turn_num * 1e6:.2f} us/turn")  # noqa: T201
+    print(f"cursor: {cursor_time / turn_num * 1e6:.2f} us/turn")  # noqa: T201
+
+
+if __name__ == "__main__":
+    character_num = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    turn_num = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    asyncio.run(main(character_num, turn_num))
@@ -0,0 +1,77 @@
+"""Benchmark the per-request overhead of converting character props to tools.
+
+Usage: python scripts/benchmark_prop_tools.py [PROP_NUM] [REQUEST_NUM]
+"""
+
+import sys
+import time
+import timeit
+from types import SimpleNamespace
+from typing import Any
+
+from pydantic import BaseModel, Field, create_model
+
+from operagents.backend.openai import OpenAIBackend
+from operagents.character import Character
+from operagents.prop import FunctionProp, Prop
+
+
+class Address(BaseModel):
+    street: str = Field(description="The street name")
+    city: str = Field(description="The city name")
+    country: str | None = Field(default=None, description="The country name")
+
+
+def make_prop(index: int) -> Prop:
+    params = create_model(
+        f"Params{index}",
+        query=(str, Field(description="The search query")),
+        limit=(int, Field(default=10, description="The max number of results")),
+        tags=(list[str], Field(default_factory=list, description="The tags")),
+        address=(Address | None, Field(default=None, description="The address")),
+    )
+
+    async def function(args: params) -> str:  # pyright: ignore[reportInvalidTypeForm]
+        return ""
+
+    function.__name__ = f"function_{index}"
+    function.__doc__ = f"Test function {index}."
+    return FunctionProp(function=function, exception_template="")
+
+
+def uncached_tools(props: list[Prop]) -> list[dict]:
+    # the conversion without cached tool definitions
+    tools = []
+    for prop in props:
+        function: dict[str, Any] = {"name": prop.name, "description": prop.description}
+        if prop.params is not None:
+            function["parameters"] = prop.params.model_json_schema()
+        tools.append({"type": "function", "function": function})
+    return tools
+
+
+if __name__ == "__main__":
+    prop_num = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    request_num = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    props = [make_prop(i) for i in range(prop_num)]
+    start = time.perf_counter()
+    character = Character(name="test", description=None, agent_name="test", props=props)
+    load_time = time.perf_counter() - start
+    # the backend only reads the acting character from the timeline
+    timeline: Any = SimpleNamespace(current_character=character)
+    backend = object.__new__(OpenAIBackend)
+
+    def compiled_tools() -> None:
+        # the path taken by the backend when acting with the character props
+        backend._compile_props(timeline, character.props)
+
+    uncached_time = timeit.timeit(lambda: uncached_tools(props), number=request_num)
+    compiled_time = timeit.timeit(compiled_tools, number=request_num)
+
+    print(f"props: {prop_num}, requests: {request_num}")  # noqa: T201
+    print(f"character load (compile): {load_time * 1e3:.3f} ms")  # noqa: T201
+    print(  # noqa: T201
+        f"uncached: {uncached_time / request_num * 1e6:.1f} us/request"
+    )
+    print(f"compiled: {compiled_time / request_num * 1e6:.2f} us/request")  # noqa: T201